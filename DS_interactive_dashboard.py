@@ -1,22 +1,59 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import os
+import re
+import sys
+import threading
+import time
 import warnings
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import config
+import fingerprint
+import geography
+import warm_start
 warnings.filterwarnings('ignore')
 
-# 页面配置
-st.set_page_config(
-    page_title="数据分析师岗位综合分析看板",
-    page_icon="📊",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
+# 重量级模块（pandas/numpy/plotly）延迟导入：首屏可直接使用预计算结果渲染
+pd = None
+np = None
+px = None
+column_store = None
+partitioned_store = None
+company_search = None
+outlier_engine = None
+figure_cache = None
+sampling = None
+ranking_stability = None
+similar_companies = None
+cohorts = None
+snapshot_diff = None
+aggregates = None
+query_backend = None
+
+def ensure_heavy_modules():
+    """导入pandas/numpy/plotly及依赖它们的模块，并绑定为模块全局名"""
+    global pd, np, px, column_store, partitioned_store, company_search, outlier_engine, figure_cache, sampling, \
+        ranking_stability, similar_companies, cohorts, snapshot_diff, aggregates, query_backend
+    # 后台预热线程与会话线程可能同时导入，同一时刻只有一个线程执行导入
+    with get_import_lock():
+        import pandas as pd
+        import numpy as np
+        import plotly.express as px
+        import column_store
+        import partitioned_store
+        import company_search
+        import outlier_engine
+        import figure_cache
+        import sampling
+        import ranking_stability
+        import similar_companies
+        import cohorts
+        import snapshot_diff
+        import aggregates
+        import query_backend
 
 # 自定义CSS样式
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -34,81 +71,45 @@ st.markdown("""
         background-color: #f8f9fa;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# 各分析视图所需的列：加载时只读取当前视图所需列的并集，其余列（数据明细、导出）按需从列式存储读取
+FILTER_COLUMNS = ['行业', '城市', '头腰尾', '岗位']
+VIEW_COLUMNS = {
+    'salary': ['行业', '平均年收入'],
+    'jobs': ['行业', '在职人数'],
+    'ratio': ['行业', '在职人数', '员工人数', '公司名称', '岗位'],
+    'score': ['行业', '头腰尾', '公司名称', '平均年收入', '在职人数', '员工人数', '平均在职天数'],
+    'other': ['员工人数', '头腰尾', '城市', '平均年收入', '在职人数'],
+    'detail': None  # 全部列
+}
+ACTIVE_VIEWS = ['salary', 'jobs', 'ratio', 'score', 'other']
+
+def view_columns(views):
+    """视图所需列的并集（含筛选列）"""
+    columns = list(FILTER_COLUMNS)
+    for view in views:
+        columns += [col for col in VIEW_COLUMNS[view] if col not in columns]
+    return tuple(columns)
 
-@st.cache_data
-def load_data():
-    """加载和预处理数据"""
+@st.cache_resource(max_entries=4, show_spinner=False)
+def attach_dataset(columns, version):
+    """挂载共享的内存映射数据集；进程内所有会话共用同一只读DataFrame，数据集版本变化时重新挂载"""
+    return column_store.read_columns(columns)
+
+def load_data(columns=None):
+    """加载和预处理数据；columns 为需要读取的列（None 表示全部列）
+    
+    返回的DataFrame为进程内共享的只读数据，筛选后再修改，不要原地修改。
+    """
+    ensure_heavy_modules()
     try:
-        # 尝试不同的编码方式
-        encodings = ['utf-8', 'gbk', 'gb2312', 'utf-8-sig', 'latin1']
-        df = None
-        
-        for encoding in encodings:
-            try:
-                df = pd.read_csv('DS_raw.csv', encoding=encoding)
-                # 检查是否成功读取到数据
-                if len(df) > 0 and len(df.columns) > 0:
-                    break
-            except UnicodeDecodeError:
-                continue
-            except Exception as e:
-                st.warning(f"使用 {encoding} 编码时出错: {str(e)}")
-                continue
-        
-        if df is None or len(df) == 0:
-            st.error("无法读取数据文件，请检查文件编码")
+        try:
+            df = attach_dataset(columns, fingerprint.dataset_tag())
+        except ValueError as e:
+            st.error(str(e))
             return None
         
-        # 显示原始列名
-        
-        
-        # 直接使用成功加载的数据，跳过编码检测
-        
-        
-        # 标准化列名
-        column_mapping = {}
-        for col in df.columns:
-            col_lower = col.lower()
-            if '行业' in col or 'industry' in col_lower:
-                column_mapping[col] = '行业'
-            elif '岗位' in col or 'position' in col_lower or 'job' in col_lower:
-                column_mapping[col] = '岗位'
-            elif '公司' in col and '名称' in col:
-                column_mapping[col] = '公司名称'
-            elif '公司' in col and '主名' in col:
-                column_mapping[col] = '公司主名'
-            elif '员工' in col and '人数' in col:
-                column_mapping[col] = '员工人数'
-            elif '收入' in col and '年' in col:
-                column_mapping[col] = '平均年收入'
-            elif '在职' in col and '人数' in col:
-                column_mapping[col] = '在职人数'
-            elif '在职' in col and '天数' in col:
-                column_mapping[col] = '平均在职天数'
-            elif '头腰尾' in col:
-                column_mapping[col] = '头腰尾'
-            elif '城市' in col or 'city' in col_lower:
-                column_mapping[col] = '城市'
-            elif '规模' in col:
-                column_mapping[col] = '规模'
-            elif '企业' in col and '性质' in col:
-                column_mapping[col] = '企业性质'
-            elif '成立' in col and '日期' in col:
-                column_mapping[col] = '成立日期'
-            elif '工作' in col and '数' in col:
-                column_mapping[col] = '平均工作数'
-            elif '工商' in col and '类型' in col:
-                column_mapping[col] = '企业工商类型'
-        
-        # 应用列名映射
-        if column_mapping:
-            df = df.rename(columns=column_mapping)
-            
-        
-        # 显示处理后的列名
-        
-        
         # 检查必要的列是否存在
         required_columns = ['岗位', '行业']
         missing_columns = [col for col in required_columns if col not in df.columns]
@@ -122,233 +123,351 @@ def load_data():
         st.error(f"数据加载失败: {str(e)}")
         return None
 
-def detect_and_remove_outliers(df, column, method='iqr', multiplier=1.5, remove_outliers=True):
-    """检测和移除异常值"""
-    if column not in df.columns:
+def load_view_data():
+    """只加载当前各分析视图所需的列"""
+    return load_data(view_columns(ACTIVE_VIEWS))
+
+@st.cache_resource(max_entries=2)
+def attach_sample(columns, version):
+    """挂载近似模式的分层样本，进程内所有会话共用；SQLite布局下在库内抽样"""
+    if config.DATA_LAYOUT == 'sqlite':
+        return sampling.load_sample(columns, draw=query_backend.SQLiteBackend().draw_sample)
+    return sampling.load_sample(columns)
+
+def load_sample_data():
+    """近似模式的分层样本（含当前各分析视图所需的列）"""
+    return attach_sample(view_columns(ACTIVE_VIEWS), fingerprint.dataset_tag())
+
+def row_source():
+    """按行号读取列的数据源（store_columns、take_columns）：SQLite布局下为数据库，否则为列式存储"""
+    if config.DATA_LAYOUT == 'sqlite':
+        return query_backend.SQLiteBackend()
+    return column_store
+
+def fetch_columns(df, columns=None):
+    """按需从列式存储（SQLite布局下为数据库）补充未加载的列（None 表示全部列），列顺序与原始数据一致"""
+    source = row_source()
+    all_columns = source.store_columns()
+    wanted = all_columns if columns is None else [col for col in all_columns if col in columns]
+    missing = [col for col in wanted if col not in df.columns]
+    if not missing:
         return df
     
-    # 转换为数值类型
-    df[column] = pd.to_numeric(df[column], errors='coerce')
-    
-    # 移除0值和负值
-    df = df[df[column] > 0]
+    extra = source.take_columns(df.index.to_numpy(), missing)
+    result = df.join(extra)
+    ordered = [col for col in wanted if col in result.columns]
+    return result[ordered + [col for col in result.columns if col not in ordered]]
+
+def outlier_mask(df, column, method='iqr', multiplier=1.5, remove_outliers=True, grouped=False, masks=None):
+    """异常值处理的保留掩码（与 df 的行一一对应）
     
-    # 如果不进行异常值处理，直接返回
+    masks 为异常值引擎按筛选条件预先计算的保留掩码，命中时直接查表；grouped 为True时按行业分组检测。
+    """
+    # 不进行异常值处理时只移除0值和负值
     if not remove_outliers:
-        return df
+        method = None
     
-    if method == 'iqr':
-        # IQR方法
-        Q1 = df[column].quantile(0.25)
-        Q3 = df[column].quantile(0.75)
-        IQR = Q3 - Q1
-        lower_bound = Q1 - multiplier * IQR
-        upper_bound = Q3 + multiplier * IQR
-        df_clean = df[(df[column] >= lower_bound) & (df[column] <= upper_bound)]
-    elif method == 'zscore':
-        # Z-score方法
-        z_scores = np.abs((df[column] - df[column].mean()) / df[column].std())
-        df_clean = df[z_scores < multiplier]
-    else:
-        df_clean = df
-    
-    return df_clean
+    key = outlier_engine.mask_key(column, method, multiplier, grouped)
+    if masks is not None and key in masks.columns:
+        return masks[key].reindex(df.index, fill_value=False).to_numpy()
+    return outlier_engine.compute_mask(df, column, method, multiplier, grouped)
+
+def numeric_column(df, column):
+    """把列转换为数值类型（不原地修改：各分析视图在线程池中并行使用同一份筛选结果）"""
+    values = pd.to_numeric(df[column], errors='coerce')
+    if values.dtype != df[column].dtype:
+        df = df.assign(**{column: values})
+    return df
 
 def filter_ds_jobs(df):
     """筛选数据分析师相关岗位"""
-    ds_keywords = ['数据分析', '数据挖掘', '数据科学', '商业分析', 'BI', '数据运营', '数据工程师']
-    ds_mask = df['岗位'].str.contains('|'.join(ds_keywords), na=False, case=False)
+    pattern = '|'.join(re.escape(keyword) for keyword in config.DS_KEYWORDS)
+    ds_mask = df['岗位'].str.contains(pattern, na=False, case=False)
     return df[ds_mask].copy()
 
-def create_salary_analysis(df_filtered, remove_outliers=True):
-    """薪资分析"""
-    if remove_outliers:
-        df_salary = detect_and_remove_outliers(df_filtered, '平均年收入', remove_outliers=True)
-    else:
-        df_salary = detect_and_remove_outliers(df_filtered, '平均年收入', remove_outliers=False)
+def column_stats(df, column, names):
+    """列的统计指标；names 为 指标名 -> 统计量（count、total、mean、median、std、min、max）
+    
+    近似模式下的样本数据返回加权估计，并在 'ci' 中给出可估计指标的95%置信区间。
+    """
+    if sampling.is_sample(df):
+        estimate = sampling.estimate_stats(df, column)
+        stats = {name: estimate[stat] for name, stat in names.items()}
+        stats['ci'] = {name: estimate['ci'][stat] for name, stat in names.items() if stat in estimate['ci']}
+        return stats
+    
+    values = df[column]
+    compute = {
+        'count': lambda: len(values),
+        'total': values.sum,
+        'mean': values.mean,
+        'median': values.median,
+        'std': values.std,
+        'min': values.min,
+        'max': values.max
+    }
+    return {name: compute[stat]() for name, stat in names.items()}
+
+def histogram_options(df, column, labels):
+    """直方图的输入数据和参数；样本数据按抽样权重累加频次"""
+    if sampling.is_sample(df):
+        weight = sampling.WEIGHT_COLUMN
+        return df[[column, weight]], {'y': weight, 'histfunc': 'sum', 'labels': dict(labels, **{weight: '频次'})}
+    return df[[column]], {'labels': labels}
+
+def distribution_histogram(chart_id, distribution, column, title, labels, vline):
+    """分布直方图：distribution 含明细行 'rows' 时由plotly分箱，否则为库内分箱的结果 'bins'（列 [column, 'count']）"""
+    if 'rows' in distribution:
+        hist_data, hist_options = histogram_options(distribution['rows'], column, labels)
+        return figure_cache.cached_px(chart_id, 'histogram', hist_data, x=column, nbins=30, title=title, vline=vline,
+                                      **hist_options)
+    return figure_cache.cached_px(chart_id, 'bar', distribution['bins'], x=column, y='count', title=title,
+                                  labels=labels, vline=vline, layout=dict(bargap=0))
+
+def group_agg(agg, by, column, aggs, rows=None):
+    """分组统计（mean、sum、count），由筛选结果的共享聚合计算；rows 为参与统计的行（如异常值保留掩码）
+    
+    样本数据按抽样权重估计，count 为样本行数。
+    """
+    return aggregates.group_stats(agg, by, column, rows)[[by] + aggs]
+
+def salary_data(df_filtered, remove_outliers=True, outlier_options=None, agg=None):
+    """薪资分析的数据：去除异常值后的数据、统计指标及各行业平均薪资；没有有效数据时返回None
+    
+    agg 为 df_filtered 的共享聚合（None 时现场构建）。
+    """
+    keep = outlier_mask(df_filtered, '平均年收入', remove_outliers=remove_outliers, **(outlier_options or {}))
+    df_salary = numeric_column(df_filtered, '平均年收入')[keep]
     
     if len(df_salary) == 0:
-        return None, "没有有效的薪资数据"
+        return None
+    
+    stats = column_stats(df_salary, '平均年收入', {
+        'count': 'count', 'mean': 'mean', 'median': 'median', 'std': 'std', 'min': 'min', 'max': 'max'
+    })
     
+    industry_salary = group_agg(agg or aggregates.build(df_filtered), '行业', '平均年收入', ['mean', 'count'], keep)
+    industry_salary = industry_salary[industry_salary['count'] >= 3].sort_values('mean', ascending=False)
+    return df_salary, stats, industry_salary
+
+def create_salary_analysis(df_filtered, remove_outliers=True, outlier_options=None, agg=None):
+    """薪资分析"""
+    data = salary_data(df_filtered, remove_outliers, outlier_options, agg)
+    if data is None:
+        return None, "没有有效的薪资数据"
+    df_salary, stats, industry_salary = data
+    return salary_figures({'rows': df_salary}, stats, industry_salary), None
+
+def salary_figures(distribution, stats, industry_salary):
+    """薪资分析的图表；distribution 为去除异常值后的薪资分布：明细行 'rows'，或库内计算的直方图分箱 'bins'
+    和箱线统计量 'box'"""
     # 薪资分布图
-    fig1 = px.histogram(
-        df_salary, 
-        x='平均年收入', 
-        nbins=30,
+    fig1 = distribution_histogram(
+        'salary.fig1', distribution, '平均年收入',
         title='薪资分布直方图',
-        labels={'平均年收入': '平均年收入（元）', 'count': '频次'}
+        labels={'平均年收入': '平均年收入（元）', 'count': '频次'},
+        vline=dict(x=stats['mean'], line_dash="dash", line_color="red",
+                   annotation_text=f"平均值: {stats['mean']:.1f}")
     )
-    fig1.add_vline(x=df_salary['平均年收入'].mean(), line_dash="dash", line_color="red",
-                   annotation_text=f"平均值: {df_salary['平均年收入'].mean():.1f}")
     
     # 各行业平均薪资
-    industry_salary = df_salary.groupby('行业')['平均年收入'].agg(['mean', 'count']).reset_index()
-    industry_salary = industry_salary[industry_salary['count'] >= 3].sort_values('mean', ascending=False)
-    
-    fig2 = px.bar(
-        industry_salary, 
-        x='行业', 
+    fig2 = figure_cache.cached_px(
+        'salary.fig2', 'bar', industry_salary,
+        x='行业',
         y='mean',
         title='各行业平均薪资',
         labels={'mean': '平均年收入（元）'},
         color='mean',
-        color_continuous_scale='viridis'
+        color_continuous_scale='viridis',
+        xaxes=dict(tickangle=45)
     )
-    fig2.update_xaxes(tickangle=45)
     
     # 薪资箱线图
-    fig3 = px.box(
-        df_salary, 
-        y='平均年收入',
-        title='薪资箱线图',
-        labels={'平均年收入': '平均年收入（元）'}
-    )
+    box_options = dict(y='平均年收入', title='薪资箱线图', labels={'平均年收入': '平均年收入（元）'})
+    if 'rows' in distribution:
+        fig3 = figure_cache.cached_px('salary.fig3', 'box', distribution['rows'][['平均年收入']], **box_options)
+    else:
+        fig3 = figure_cache.cached_box('salary.fig3', distribution['box'], **box_options)
     
     return {
         'fig1': fig1,
         'fig2': fig2,
         'fig3': fig3,
-        'stats': {
-            'count': len(df_salary),
-            'mean': df_salary['平均年收入'].mean(),
-            'median': df_salary['平均年收入'].median(),
-            'std': df_salary['平均年收入'].std(),
-            'min': df_salary['平均年收入'].min(),
-            'max': df_salary['平均年收入'].max()
-        }
-    }, None
+        'stats': stats
+    }
 
-def create_job_distribution_analysis(df_filtered, remove_outliers=True):
-    """岗位分布分析"""
-    if remove_outliers:
-        df_jobs = detect_and_remove_outliers(df_filtered, '在职人数', remove_outliers=True)
-    else:
-        df_jobs = detect_and_remove_outliers(df_filtered, '在职人数', remove_outliers=False)
+def job_distribution_data(df_filtered, remove_outliers=True, outlier_options=None, agg=None):
+    """岗位分布分析的数据：去除异常值后的数据、统计指标及各行业总岗位人数和平均岗位人数；没有有效数据时返回None
+    
+    agg 为 df_filtered 的共享聚合（None 时现场构建）。
+    """
+    keep = outlier_mask(df_filtered, '在职人数', remove_outliers=remove_outliers, **(outlier_options or {}))
+    df_jobs = numeric_column(df_filtered, '在职人数')[keep]
     
     if len(df_jobs) == 0:
-        return None, "没有有效的岗位数据"
+        return None
+    
+    stats = column_stats(df_jobs, '在职人数', {
+        'count': 'count', 'total_jobs': 'total', 'mean': 'mean', 'median': 'median', 'std': 'std'
+    })
     
+    industry_jobs = group_agg(agg or aggregates.build(df_filtered), '行业', '在职人数', ['sum', 'count', 'mean'], keep)
+    industry_jobs = industry_jobs[industry_jobs['count'] >= 3].sort_values('sum', ascending=False)
+    return df_jobs, stats, industry_jobs
+
+def create_job_distribution_analysis(df_filtered, remove_outliers=True, outlier_options=None, agg=None):
+    """岗位分布分析"""
+    data = job_distribution_data(df_filtered, remove_outliers, outlier_options, agg)
+    if data is None:
+        return None, "没有有效的岗位数据"
+    df_jobs, stats, industry_jobs = data
+    return job_distribution_figures({'rows': df_jobs}, stats, industry_jobs), None
+
+def job_distribution_figures(distribution, stats, industry_jobs):
+    """岗位分布分析的图表；distribution 为去除异常值后的岗位人数分布：明细行 'rows'，或库内计算的直方图分箱 'bins'"""
     # 岗位人数分布
-    fig1 = px.histogram(
-        df_jobs, 
-        x='在职人数', 
-        nbins=30,
+    fig1 = distribution_histogram(
+        'jobs.fig1', distribution, '在职人数',
         title='岗位人数分布',
-        labels={'在职人数': '在职人数', 'count': '频次'}
+        labels={'在职人数': '在职人数', 'count': '频次'},
+        vline=dict(x=stats['mean'], line_dash="dash", line_color="red",
+                   annotation_text=f"平均值: {stats['mean']:.1f}")
     )
-    fig1.add_vline(x=df_jobs['在职人数'].mean(), line_dash="dash", line_color="red",
-                   annotation_text=f"平均值: {df_jobs['在职人数'].mean():.1f}")
     
     # 各行业岗位人数
-    industry_jobs = df_jobs.groupby('行业')['在职人数'].agg(['sum', 'count']).reset_index()
-    industry_jobs = industry_jobs[industry_jobs['count'] >= 3].sort_values('sum', ascending=False)
-    
-    fig2 = px.bar(
-        industry_jobs, 
-        x='行业', 
+    fig2 = figure_cache.cached_px(
+        'jobs.fig2', 'bar', industry_jobs,
+        x='行业',
         y='sum',
         title='各行业总岗位人数',
         labels={'sum': '总岗位人数'},
         color='sum',
-        color_continuous_scale='plasma'
+        color_continuous_scale='plasma',
+        xaxes=dict(tickangle=45)
     )
-    fig2.update_xaxes(tickangle=45)
     
     # 平均岗位人数
-    avg_jobs = df_jobs.groupby('行业')['在职人数'].mean().reset_index()
-    avg_jobs = avg_jobs[avg_jobs['行业'].isin(industry_jobs['行业'])].sort_values('在职人数', ascending=False)
+    avg_jobs = industry_jobs.sort_index()[['行业', 'mean']].rename(columns={'mean': '在职人数'})
+    avg_jobs = avg_jobs.sort_values('在职人数', ascending=False)
     
-    fig3 = px.bar(
-        avg_jobs, 
-        x='行业', 
+    fig3 = figure_cache.cached_px(
+        'jobs.fig3', 'bar', avg_jobs,
+        x='行业',
         y='在职人数',
         title='各行业平均岗位人数',
         labels={'在职人数': '平均岗位人数'},
         color='在职人数',
-        color_continuous_scale='inferno'
+        color_continuous_scale='inferno',
+        xaxes=dict(tickangle=45)
     )
-    fig3.update_xaxes(tickangle=45)
     
     return {
         'fig1': fig1,
         'fig2': fig2,
         'fig3': fig3,
-        'stats': {
-            'count': len(df_jobs),
-            'total_jobs': df_jobs['在职人数'].sum(),
-            'mean': df_jobs['在职人数'].mean(),
-            'median': df_jobs['在职人数'].median(),
-            'std': df_jobs['在职人数'].std()
-        }
-    }, None
+        'stats': stats
+    }
 
-def create_employee_ratio_analysis(df_filtered, remove_outliers=True):
-    """员工占比分析"""
-    # 计算占比
-    df_ratio = df_filtered.copy()
-    df_ratio['在职人数'] = pd.to_numeric(df_ratio['在职人数'], errors='coerce')
-    df_ratio['员工人数'] = pd.to_numeric(df_ratio['员工人数'], errors='coerce')
+def employee_ratio_data(df_filtered, remove_outliers=True, outlier_options=None, agg=None):
+    """员工占比分析的数据：去除异常值后的数据、统计指标及各行业平均占比；没有有效数据时返回None
+    
+    agg 为 df_filtered 的共享聚合（None 时现场构建）。
+    """
+    agg = agg or aggregates.build(df_filtered)
+    # 保留掩码已含有效值条件（在职人数、员工人数均大于0）
+    keep = outlier_mask(df_filtered, 'DS占比', remove_outliers=remove_outliers, **(outlier_options or {}))
+    valid_ratio = df_filtered[keep].assign(
+        在职人数=pd.to_numeric(df_filtered['在职人数'][keep], errors='coerce'),
+        员工人数=pd.to_numeric(df_filtered['员工人数'][keep], errors='coerce'),
+        DS占比=agg['values']['DS占比'][keep]
+    )
     
-    valid_ratio = df_ratio[(df_ratio['在职人数'] > 0) & (df_ratio['员工人数'] > 0)].copy()
-    valid_ratio['DS占比'] = valid_ratio['在职人数'] / valid_ratio['员工人数'] * 100
+    if len(valid_ratio) == 0:
+        return None
     
-    if remove_outliers:
-        valid_ratio = detect_and_remove_outliers(valid_ratio, 'DS占比', remove_outliers=True)
-    else:
-        valid_ratio = detect_and_remove_outliers(valid_ratio, 'DS占比', remove_outliers=False)
+    stats = column_stats(valid_ratio, 'DS占比', {
+        'count': 'count', 'mean_ratio': 'mean', 'median_ratio': 'median', 'max_ratio': 'max', 'min_ratio': 'min'
+    })
     
-    if len(valid_ratio) == 0:
+    industry_ratio = group_agg(agg, '行业', 'DS占比', ['mean', 'count'], keep)
+    industry_ratio = industry_ratio[industry_ratio['count'] >= 3].sort_values('mean', ascending=False)
+    return valid_ratio, stats, industry_ratio
+
+def create_employee_ratio_analysis(df_filtered, remove_outliers=True, outlier_options=None, agg=None):
+    """员工占比分析"""
+    data = employee_ratio_data(df_filtered, remove_outliers, outlier_options, agg)
+    if data is None:
         return None, "没有有效的占比数据"
-    
+    valid_ratio, stats, industry_ratio = data
+    return employee_ratio_figures({'rows': valid_ratio}, stats, industry_ratio), None
+
+def employee_ratio_figures(distribution, stats, industry_ratio):
+    """员工占比分析的图表；distribution 为去除异常值后的占比分布：明细行 'rows'，或库内计算的直方图分箱 'bins'
+    和散点图的取点 'points'"""
     # 占比分布
-    fig1 = px.histogram(
-        valid_ratio, 
-        x='DS占比', 
-        nbins=30,
+    fig1 = distribution_histogram(
+        'ratio.fig1', distribution, 'DS占比',
         title='数据分析师占比分布',
-        labels={'DS占比': '占比（%）', 'count': '频次'}
+        labels={'DS占比': '占比（%）', 'count': '频次'},
+        vline=dict(x=stats['mean_ratio'], line_dash="dash", line_color="red",
+                   annotation_text=f"平均值: {stats['mean_ratio']:.3f}%")
     )
-    fig1.add_vline(x=valid_ratio['DS占比'].mean(), line_dash="dash", line_color="red",
-                   annotation_text=f"平均值: {valid_ratio['DS占比'].mean():.3f}%")
     
     # 各行业平均占比
-    industry_ratio = valid_ratio.groupby('行业')['DS占比'].agg(['mean', 'count']).reset_index()
-    industry_ratio = industry_ratio[industry_ratio['count'] >= 3].sort_values('mean', ascending=False)
-    
-    fig2 = px.bar(
-        industry_ratio, 
-        x='行业', 
+    fig2 = figure_cache.cached_px(
+        'ratio.fig2', 'bar', industry_ratio,
+        x='行业',
         y='mean',
         title='各行业平均占比',
         labels={'mean': '平均占比（%）'},
         color='mean',
-        color_continuous_scale='viridis'
+        color_continuous_scale='viridis',
+        xaxes=dict(tickangle=45)
     )
-    fig2.update_xaxes(tickangle=45)
     
     # 占比与公司规模关系
-    fig3 = px.scatter(
-        valid_ratio, 
-        x='员工人数', 
+    points = distribution['rows'][SCATTER_COLUMNS] if 'rows' in distribution else distribution['points']
+    fig3 = figure_cache.cached_px(
+        'ratio.fig3', 'scatter', points,
+        x='员工人数',
         y='DS占比',
         title='占比与公司规模关系',
         labels={'员工人数': '员工人数', 'DS占比': '占比（%）'},
-        hover_data=['公司名称', '岗位']
+        hover_data=['公司名称', '岗位'],
+        xaxes=dict(type="log")
     )
-    fig3.update_xaxes(type="log")
     
     return {
         'fig1': fig1,
         'fig2': fig2,
         'fig3': fig3,
-        'stats': {
-            'count': len(valid_ratio),
-            'mean_ratio': valid_ratio['DS占比'].mean(),
-            'median_ratio': valid_ratio['DS占比'].median(),
-            'max_ratio': valid_ratio['DS占比'].max(),
-            'min_ratio': valid_ratio['DS占比'].min()
-        }
-    }, None
+        'stats': stats
+    }
+
+# 占比与公司规模散点图的列
+SCATTER_COLUMNS = ['员工人数', 'DS占比', '公司名称', '岗位']
+
+# SQLite布局下各视图的图表函数及无数据提示
+QUERY_VIEWS = {
+    'salary': (salary_figures, "没有有效的薪资数据"),
+    'jobs': (job_distribution_figures, "没有有效的岗位数据"),
+    'ratio': (employee_ratio_figures, "没有有效的占比数据")
+}
+
+def create_query_analysis(query, view):
+    """SQLite布局下的薪资、岗位分布、员工占比分析：统计指标、各行业汇总、直方图分箱和箱线统计量均在库内计算，
+    散点图至多取 query_backend.SCATTER_MAX_POINTS 个点"""
+    figures, error = QUERY_VIEWS[view]
+    data = query.measure(view)
+    if data is None:
+        return None, error
+    stats, industry = data
+    distribution = {'bins': query.histogram(view)}
+    if view == 'salary':
+        distribution['box'] = query.box(view)
+    elif view == 'ratio':
+        distribution['points'] = query.points(view, SCATTER_COLUMNS)
+    return figures(distribution, stats, industry), None
 
 def calculate_company_scores(df_filtered):
     """计算企业综合评分"""
@@ -455,18 +574,46 @@ def calculate_company_scores(df_filtered):
     
     return valid_df, None
 
-def create_score_analysis(df_scored):
-    """创建评分分析图表"""
+def create_score_analysis(df_scored, agg=None):
+    """创建评分分析图表；agg 为评分前筛选结果的共享聚合（None 时由评分结果现场构建）"""
     if len(df_scored) == 0:
         return None, "没有评分数据"
     
-    # 前100名企业
+    # 前100名企业（rows 为评分结果各行在共享聚合中的位置，按排名顺序）
     top_100 = df_scored.head(100)
-    
+    agg = agg or aggregates.build(df_scored)
+    rows = aggregates.positions(agg, df_scored.index)
+    industry_avg_score = aggregates.group_stats(agg, '行业', df_scored['综合评分'].to_numpy(), rows)
+    return score_figures(
+        top_100, len(df_scored),
+        aggregates.value_counts(agg, '行业', rows[:100]),
+        aggregates.value_counts(agg, '头腰尾', rows[:100]),
+        industry_avg_score.set_index('行业')['mean']
+    ), None
+
+def create_query_score_analysis(query):
+    """SQLite布局下的评分分析：评分和排名在库内计算，只取回前100名企业和各行业平均综合评分"""
+    top_100, error = query.top_companies(100)
+    if error:
+        return None, error
+    summary, _ = query.score_summary()
+    analysis = score_figures(
+        top_100, summary['count'],
+        top_100['行业'].value_counts(),
+        top_100['头腰尾'].value_counts(),
+        summary['industries'].set_index('行业')['mean']
+    )
+    # 榜单的行业选项（没有完整的评分结果）
+    analysis['industries'] = summary['industries']['行业'].tolist()
+    return analysis, None
+
+def score_figures(top_100, total_companies, industry_dist, head_tail_dist, industry_avg_score):
+    """评分分析的图表：top_100 为前100名企业，industry_dist、head_tail_dist 为其行业、头腰尾分布，
+    industry_avg_score 为全部评分企业的各行业平均综合评分"""
     # 1. 综合评分分布
-    fig1 = px.histogram(
-        top_100, 
-        x='综合评分', 
+    fig1 = figure_cache.cached_px(
+        'score.fig1', 'histogram', top_100[['综合评分']],
+        x='综合评分',
         nbins=20,
         title='前100名企业综合评分分布',
         labels={'综合评分': '综合评分', 'count': '企业数量'}
@@ -476,39 +623,41 @@ def create_score_analysis(df_scored):
     score_columns = ['薪资评分', '规模评分', '头腰尾评分', 'DS团队评分', '占比评分', '稳定性评分']
     avg_scores = top_100[score_columns].mean()
     
-    fig2 = px.bar(
+    fig2 = figure_cache.cached_px(
+        'score.fig2', 'bar', None,
         x=score_columns,
         y=avg_scores.values,
         title='前100名企业各维度平均评分',
         labels={'x': '评分维度', 'y': '平均评分'},
         color=avg_scores.values,
-        color_continuous_scale='viridis'
+        color_continuous_scale='viridis',
+        xaxes=dict(tickangle=45)
     )
-    fig2.update_xaxes(tickangle=45)
     
     # 3. 行业分布
-    industry_dist = top_100['行业'].value_counts().head(15)
-    fig3 = px.bar(
+    industry_dist = industry_dist.head(15)
+    fig3 = figure_cache.cached_px(
+        'score.fig3', 'bar', None,
         x=industry_dist.index,
         y=industry_dist.values,
         title='前100名企业行业分布',
         labels={'x': '行业', 'y': '企业数量'},
         color=industry_dist.values,
-        color_continuous_scale='plasma'
+        color_continuous_scale='plasma',
+        xaxes=dict(tickangle=45)
     )
-    fig3.update_xaxes(tickangle=45)
     
     # 4. 头腰尾分布
-    head_tail_dist = top_100['头腰尾'].value_counts()
-    fig4 = px.pie(
+    fig4 = figure_cache.cached_px(
+        'score.fig4', 'pie', None,
         values=head_tail_dist.values,
         names=head_tail_dist.index,
         title='前100名企业头腰尾分布'
     )
     
     # 5. 薪资vs综合评分散点图
-    fig5 = px.scatter(
-        top_100,
+    fig5 = figure_cache.cached_px(
+        'score.fig5', 'scatter', top_100[['平均年收入', '综合评分', '公司名称', '行业']],
         x='平均年收入',
         y='综合评分',
         title='薪资与综合评分关系',
@@ -519,16 +668,17 @@ def create_score_analysis(df_scored):
     )
     
     # 6. 各行业平均综合评分
-    industry_avg_score = df_scored.groupby('行业')['综合评分'].mean().sort_values(ascending=False).head(15)
-    fig6 = px.bar(
+    industry_avg_score = industry_avg_score.sort_values(ascending=False).head(15)
+    fig6 = figure_cache.cached_px(
+        'score.fig6', 'bar', None,
         x=industry_avg_score.index,
         y=industry_avg_score.values,
         title='各行业平均综合评分',
         labels={'x': '行业', 'y': '平均综合评分'},
         color=industry_avg_score.values,
-        color_continuous_scale='inferno'
+        color_continuous_scale='inferno',
+        xaxes=dict(tickangle=45)
     )
-    fig6.update_xaxes(tickangle=45)
     
     return {
         'fig1': fig1,
@@ -538,7 +688,7 @@ def create_score_analysis(df_scored):
         'fig5': fig5,
         'fig6': fig6,
         'stats': {
-            'total_companies': len(df_scored),
+            'total_companies': total_companies,
             'top_100_avg_score': top_100['综合评分'].mean(),
             'top_100_avg_salary': top_100['平均年收入'].mean(),
             'top_100_avg_size': top_100['员工人数'].mean(),
@@ -546,444 +696,1452 @@ def create_score_analysis(df_scored):
             'top_100_avg_ratio': top_100['DS占比'].mean(),
             'top_100_avg_days': top_100['平均在职天数'].mean()
         }
+    }
+
+# 城市分布各层级的图表
+GEO_CHARTS = {'城市等级': 'other.city_tier', '省份': 'other.province', '标准城市': 'other.city'}
+
+def create_other_dimensions_analysis(df_filtered, agg=None, df_scored=None):
+    """其他维度分析（公司规模、头腰尾、城市）；agg 为 df_filtered 的共享聚合（None 时现场构建），df_scored 为评分结果
+    
+    城市分布按城市等级、省份、标准城市三级各汇总一次（见 aggregates.geo_rollups），标签页切换层级、
+    省份下钻到城市时只读取这些汇总。
+    """
+    agg = agg or aggregates.build(df_filtered)
+    
+    # 公司规模分析
+    valid_size = df_filtered[pd.to_numeric(df_filtered['员工人数'], errors='coerce') > 0]
+    fig_size = None
+    size_stats = {'count': len(valid_size)}
+    if len(valid_size) > 0:
+        size_data = valid_size['员工人数'].astype(float)
+        size_stats['mean'] = size_data.mean()
+        size_stats['median'] = size_data.median()
+        fig_size = figure_cache.cached_px(
+            'other.size', 'histogram', None,
+            x=size_data,
+            nbins=30,
+            title='公司规模分布',
+            labels={'x': '员工人数', 'y': '频次'},
+            xaxes=dict(type="log")
+        )
+    
+    # 头腰尾分布
+    head_tail_dist = aggregates.value_counts(agg, '头腰尾')
+    fig_head_tail = figure_cache.cached_px(
+        'other.head_tail', 'pie', None,
+        values=head_tail_dist.values,
+        names=head_tail_dist.index,
+        title='头腰尾分布'
+    )
+    
+    # 城市分布：各地理层级的汇总
+    scores = None
+    if df_scored is not None:
+        scores = (aggregates.positions(agg, df_scored.index), df_scored['综合评分'].to_numpy())
+    rollups = aggregates.geo_rollups(agg, scores)
+    figures, geo = {}, {}
+    for level, chart_id in GEO_CHARTS.items():
+        table = rollups[level]
+        figures[chart_id] = figure_cache.cached_px(
+            chart_id, 'bar', table,
+            x=level,
+            y='岗位数',
+            hover_data=[col for col in table.columns if col not in (level, '岗位数')],
+            title=f'{level}分布',
+            labels={'岗位数': '岗位数量'},
+            xaxes=dict(tickangle=45) if level != '城市等级' else None
+        )
+        # 汇总表以记录列表保存，可随预计算结果序列化
+        geo[level] = table.round(2).to_dict('records')
+    
+    return {
+        'fig_size': fig_size,
+        'fig_head_tail': fig_head_tail,
+        'fig_city_tier': figures['other.city_tier'],
+        'fig_province': figures['other.province'],
+        'fig_city': figures['other.city'],
+        'geo': geo,
+        'stats': size_stats
     }, None
 
-def main():
-    """主函数"""
-    st.markdown('<h1 class="main-header">📊 数据分析师岗位综合分析看板</h1>', unsafe_allow_html=True)
+@st.cache_resource(max_entries=2, show_spinner=False)
+def get_cohort_tables(version):
+    """成立年份队列汇总表及其分组编码（每个数据集版本由全部数据分析师岗位构建一次，进程内所有会话共享；SQLite布局下在库内汇总）"""
+    if config.DATA_LAYOUT == 'sqlite':
+        cube = query_backend.SQLiteBackend().cohort_cube()
+    else:
+        cube = cohorts.build_cube(filter_ds_jobs(column_store.read_columns(cohorts.SOURCE_COLUMNS + ['岗位'])))
+    return cohorts.build_tables(cube)
+
+def create_cohort_analysis(tables, selection):
+    """成立年份队列分析：按筛选条件对预先分组的汇总表求和，重跑时不做分组"""
+    by_industry, by_size, by_year, unknown = cohorts.cohort_tables(tables, selection)
+    if len(by_year) == 0:
+        return None, "筛选条件下没有成立日期已知的数据"
+    
+    first_year, last_year = int(by_year['成立年份'].min()), int(by_year['成立年份'].max())
+    stats = {
+        'known': int(by_year['记录数'].sum()),
+        'unknown': unknown,
+        'first_year': first_year,
+        'last_year': last_year
+    }
     
-    # 侧边栏配置
-    st.sidebar.header("🔧 数据筛选设置")
+    # 各成立年份的记录数（按行业堆叠）
+    fig_count = figure_cache.cached_px(
+        'cohort.fig_count', 'bar', by_industry[['成立年份', '行业', '记录数']],
+        x='成立年份',
+        y='记录数',
+        color='行业',
+        title='各成立年份企业的岗位记录数'
+    )
     
-    # 数据加载
-    with st.spinner("正在加载数据..."):
-        df = load_data()
+    # 各成立年份的平均薪资、平均在职天数、平均DS占比
+    fig_salary = figure_cache.cached_px(
+        'cohort.fig_salary', 'line', by_year[['成立年份', '平均年收入']],
+        x='成立年份',
+        y='平均年收入',
+        markers=True,
+        title='各成立年份企业的平均薪资',
+        labels={'平均年收入': '平均年收入（元）'}
+    )
+    fig_tenure = figure_cache.cached_px(
+        'cohort.fig_tenure', 'line', by_year[['成立年份', '平均在职天数']],
+        x='成立年份',
+        y='平均在职天数',
+        markers=True,
+        title='各成立年份企业的平均在职天数'
+    )
+    fig_ratio = figure_cache.cached_px(
+        'cohort.fig_ratio', 'line', by_year[['成立年份', 'DS占比']],
+        x='成立年份',
+        y='DS占比',
+        markers=True,
+        title='各成立年份企业的平均DS占比',
+        labels={'DS占比': '平均DS占比（%）'}
+    )
     
-    if df is None:
-        st.error("数据加载失败，请检查数据文件")
-        return
+    # 成立年份 × 行业 平均薪资
+    fig_heatmap = figure_cache.cached_px(
+        'cohort.fig_heatmap', 'density_heatmap', by_industry[['成立年份', '行业', '平均年收入']].dropna(),
+        x='成立年份',
+        y='行业',
+        z='平均年收入',
+        histfunc='avg',
+        nbinsx=last_year - first_year + 1,
+        title='各成立年份、行业的平均薪资',
+        labels={'平均年收入': '平均年收入（元）'}
+    )
+    
+    # 成立年份 × 头腰尾（公司规模等级）平均薪资
+    fig_size = figure_cache.cached_px(
+        'cohort.fig_size', 'line', by_size[['成立年份', '头腰尾', '平均年收入']].dropna(),
+        x='成立年份',
+        y='平均年收入',
+        color='头腰尾',
+        markers=True,
+        title='各成立年份、公司规模等级的平均薪资',
+        labels={'平均年收入': '平均年收入（元）'}
+    )
+    
+    return {
+        'fig_count': fig_count,
+        'fig_salary': fig_salary,
+        'fig_tenure': fig_tenure,
+        'fig_ratio': fig_ratio,
+        'fig_heatmap': fig_heatmap,
+        'fig_size': fig_size,
+        'stats': stats
+    }, None
+
+def build_leaderboard(df_scored, rank_type, top_n, selected_industry):
+    """生成排名榜单表格"""
+    if rank_type == "总排名":
+        display_df = df_scored.head(top_n)
+        title = f"综合评分前{top_n}名企业"
+    else:  # 行业排名
+        if selected_industry == "全部":
+            display_df = df_scored[df_scored['行业排名'] <= top_n].head(top_n * 3)
+            title = f"各行业前{top_n}名企业"
+        else:
+            industry_df = df_scored[df_scored['行业'] == selected_industry].copy()
+            display_df = industry_df.head(top_n)
+            title = f"{selected_industry}行业前{top_n}名企业"
+    
+    # 选择显示的列
+    display_columns = [
+        '总排名', '行业排名', '公司名称', '行业', '头腰尾', 
+        '平均年收入', '员工人数', '在职人数', 'DS占比', 
+        '薪资评分', '规模评分', '头腰尾评分', 'DS团队评分', '占比评分', '稳定性评分', '综合评分'
+    ]
+    
+    # 格式化数据
+    display_data = display_df[display_columns].copy()
+    display_data['平均年收入'] = display_data['平均年收入'].round(0).astype(int)
+    display_data['员工人数'] = display_data['员工人数'].round(0).astype(int)
+    display_data['在职人数'] = display_data['在职人数'].round(0).astype(int)
+    display_data['DS占比'] = display_data['DS占比'].round(3)
+    display_data['综合评分'] = display_data['综合评分'].round(2)
+    
+    # 重命名列
+    column_mapping = {
+        '平均年收入': '平均年收入（元）',
+        'DS占比': 'DS占比（%）'
+    }
+    display_data = display_data.rename(columns=column_mapping)
+    return display_data, title
+
+def query_leaderboard(query, rank_type, top_n, selected_industry):
+    """由查询生成排名榜单表格（同 build_leaderboard）：排名在库内计算，只取回榜单中的企业"""
+    if rank_type == "总排名":
+        df_top, _ = query.top_companies(top_n)
+    elif selected_industry == "全部":
+        df_top, _ = query.top_companies(top_n * 3, industry_top=top_n)
+    else:
+        df_top, _ = query.top_companies(top_n, industry=selected_industry)
+    return build_leaderboard(df_top, rank_type, top_n, selected_industry)
+
+def get_filter_options(df):
+    """侧边栏筛选项"""
+    return {
+        'industries': sorted(df['行业'].dropna().unique()),
+        'cities': sorted(df['城市'].dropna().unique()),
+        'head_tail': sorted(df['头腰尾'].dropna().unique())
+    }
+
+def get_default_selection(options):
+    """默认视图：前10个行业、前10个城市、全部头腰尾，去除异常值"""
+    industries = options['industries']
+    cities = options['cities']
+    return {
+        'remove_outliers': True,
+        'outlier_method': config.DEFAULT_OUTLIER_METHOD,
+        'outlier_multiplier': config.DEFAULT_OUTLIER_MULTIPLIER,
+        'outlier_grouped': False,
+        'approximate': False,
+        'industries': industries[:10] if len(industries) > 10 else industries,
+        'cities': cities[:10] if len(cities) > 10 else cities,
+        'head_tail': options['head_tail']
+    }
+
+def apply_filters(df, selection):
+    """按侧边栏选择筛选数据"""
+    filtered_df = df
+    if selection['industries']:
+        filtered_df = filtered_df[filtered_df['行业'].isin(selection['industries'])]
+    if selection['cities']:
+        filtered_df = filtered_df[filtered_df['城市'].isin(selection['cities'])]
+    if selection['head_tail']:
+        filtered_df = filtered_df[filtered_df['头腰尾'].isin(selection['head_tail'])]
+    return filtered_df
+
+def load_filtered_data(df, selection):
+    """按筛选条件取数：分区、SQLite布局下把条件下推到读取阶段，否则在共享数据集上筛选
+    
+    SQLite布局下只读取数据分析师岗位的行（岗位关键词在库内判断；摘要等由 query_backend 在库内统计）。
+    """
+    if config.DATA_LAYOUT == 'partitioned':
+        return partitioned_store.read_filtered(selection, view_columns(ACTIVE_VIEWS))
+    if config.DATA_LAYOUT == 'sqlite':
+        return query_backend.SQLiteBackend().read_filtered(selection, view_columns(ACTIVE_VIEWS), ds_only=True)
+    return apply_filters(df, selection)
+
+def create_query(selection):
+    """查询后端（见 query_backend）上一个筛选条件的查询"""
+    return query_backend.create_backend(sys.modules[__name__]).query(selection)
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def get_outlier_masks(filter_key, _df):
+    """同一筛选条件下全部检测方法、倍数和分组模式的异常值保留掩码（按筛选指纹缓存）"""
+    return outlier_engine.compute_masks(_df, config.OUTLIER_METHODS, config.OUTLIER_MULTIPLIERS)
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def get_geo_codes(version):
+    """城市列的地理编码（标准城市、省份、城市等级，按行号对齐；每个数据集版本在加载时解析、编码一次，进程内所有会话共享）"""
+    return aggregates.encode_geography(column_store.read_columns(['城市'])['城市'])
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def get_aggregates(filter_key, _df):
+    """同一筛选条件下各标签页共用的分组聚合（按筛选指纹缓存，每个筛选条件只遍历一次筛选结果）
+    
+    列式存储布局下按行号取加载时的地理编码；分区、SQLite布局不读取全量城市列，由筛选结果的城市列就地编码
+    （只解析其中不同的取值）。
+    """
+    geo = get_geo_codes(fingerprint.dataset_tag()) if config.DATA_LAYOUT == 'columns' else None
+    return aggregates.build(_df, geo)
+
+ANALYSIS_VIEWS = ['salary', 'jobs', 'ratio', 'score', 'other', 'cohort']
+# 近似模式下在分层样本上估计的视图
+APPROX_VIEWS = ['salary', 'jobs', 'ratio']
+NO_DS_DATA = "筛选条件下没有数据分析师岗位数据"
+
+def lazy(func):
+    """线程安全的惰性求值：首次调用时计算，之后返回同一结果"""
+    lock = threading.Lock()
+    result = []
+    
+    def wrapper():
+        with lock:
+            if not result:
+                result.append(func())
+        return result[0]
+    return wrapper
+
+def compute_score_view(filtered_ds_df, agg=None):
+    """企业评分视图：评分结果及评分分析"""
+    df_scored, error = calculate_company_scores(filtered_ds_df)
+    if error:
+        return {'score': (None, error), 'df_scored': None}
+    return {'score': create_score_analysis(df_scored, agg), 'df_scored': df_scored}
+
+def exact_view(load_ds, key, compute):
+    """基于完整筛选结果计算的视图；load_ds 返回筛选后的DS岗位数据，为空时返回无数据提示"""
+    filtered_ds_df = load_ds()
+    if len(filtered_ds_df) == 0:
+        return {key: (None, NO_DS_DATA)}
+    return compute(filtered_ds_df)
+
+def analysis_tasks(filtered_ds_df, selection, mask_key):
+    """薪资、岗位分布、员工占比视图的计算任务；mask_key 为异常值掩码和共享聚合的缓存键
+    
+    异常值掩码和共享聚合由第一个执行的任务在线程池中计算（其余任务等待同一次计算），不阻塞摘要的渲染。
+    """
+    remove_outliers = selection['remove_outliers']
+    
+    @lazy
+    def shared():
+        # 切换检测方法、倍数或分组模式时只查表，不重新计算
+        outlier_options = {
+            'method': selection['outlier_method'],
+            'multiplier': selection['outlier_multiplier'],
+            'grouped': selection['outlier_grouped'],
+            'masks': get_outlier_masks(mask_key, filtered_ds_df)
+        }
+        return outlier_options, get_aggregates(mask_key, filtered_ds_df)
+    
+    def view(key, compute):
+        return lambda: {key: compute(filtered_ds_df, remove_outliers, *shared())}
+    
+    return {
+        'salary': view('salary', create_salary_analysis),
+        'jobs': view('jobs', create_job_distribution_analysis),
+        'ratio': view('ratio', create_employee_ratio_analysis)
+    }
+
+def exact_tasks(load_ds, selection):
+    """企业评分、其他维度、成立年份视图的计算任务（始终基于完整数据，与精确模式下的薪资等视图共用共享聚合）"""
+    filter_key = fingerprint.filter_fingerprint(selection)
+    
+    def with_aggregates(compute):
+        return lambda df: compute(df, get_aggregates(filter_key, df))
+    
+    # 其他维度的地理汇总用到企业评分，与评分视图共用同一次计算
+    score = lazy(lambda: exact_view(load_ds, 'score', with_aggregates(compute_score_view)))
+    
+    def other(df, agg):
+        return {'other': create_other_dimensions_analysis(df, agg, score().get('df_scored'))}
+    
+    return {
+        'score': score,
+        'other': lambda: exact_view(load_ds, 'other', with_aggregates(other)),
+        'cohort': lambda: {'cohort': create_cohort_analysis(get_cohort_tables(fingerprint.dataset_tag()), selection)}
+    }
+
+def prepare_views(filtered_df, selection, total):
+    """筛选结果摘要及各分析视图的计算任务；total 为筛选前的总记录数
+    
+    返回 (views, tasks)：tasks 为 视图名 -> 无参函数，函数返回需要合并到 views 的结果。各任务互不依赖，可并行执行。
+    """
+    filtered_ds_df = filter_ds_jobs(filtered_df)
+    
+    views = {
+        'summary': {
+            'total': total,
+            'filtered_total': len(filtered_df),
+            'filtered_ds': len(filtered_ds_df)
+        },
+        'filtered_ds_df': filtered_ds_df,
+        'df_scored': None,
+        'filter_key': fingerprint.filter_fingerprint(selection)
+    }
+    
+    if len(filtered_ds_df) == 0:
+        for key in ANALYSIS_VIEWS:
+            views[key] = (None, NO_DS_DATA)
+        return views, {}
+    
+    tasks = analysis_tasks(filtered_ds_df, selection, fingerprint.filter_fingerprint(selection))
+    tasks.update(exact_tasks(lambda: filtered_ds_df, selection))
+    return views, tasks
+
+def query_exact_tasks(query, selection):
+    """SQLite布局下企业评分、其他维度、成立年份视图和数据明细的计算任务
+    
+    评分和排名在库内计算；其他维度和数据明细共用一次读取，只读取筛选后的数据分析师岗位行。
+    """
+    filter_key = fingerprint.filter_fingerprint(selection)
+    load_ds = lazy(lambda: load_filtered_data(None, selection))
+    
+    def other(df):
+        return {'other': create_other_dimensions_analysis(df, get_aggregates(filter_key, df), query.scores())}
+    
+    return {
+        'score': lambda: {'score': create_query_score_analysis(query)},
+        'other': lambda: exact_view(load_ds, 'other', other),
+        'cohort': lambda: {'cohort': create_cohort_analysis(get_cohort_tables(fingerprint.dataset_tag()), selection)},
+        'detail': lambda: {'filtered_ds_df': load_ds()}
+    }
+
+def prepare_query_views(selection):
+    """SQLite布局：摘要、薪资/岗位分布/员工占比的统计、各行业汇总、直方图和企业评分均经 query_backend 在库内计算，
+    只取回汇总结果；返回值同 prepare_views
+    
+    返回的 views 中 'query' 为该筛选条件的查询（企业评分榜单按需查询），filtered_ds_df 由 'detail' 任务补上。
+    """
+    query = create_query(selection)
+    views = {
+        'summary': query.summary(),
+        'df_scored': None,
+        'filter_key': fingerprint.filter_fingerprint(selection),
+        'query': query
+    }
+    
+    if views['summary']['filtered_ds'] == 0:
+        for key in ANALYSIS_VIEWS:
+            views[key] = (None, NO_DS_DATA)
+        views['filtered_ds_df'] = load_filtered_data(None, selection)
+        return views, {}
+    
+    tasks = {key: (lambda key=key: {key: create_query_analysis(query, key)}) for key in APPROX_VIEWS}
+    tasks.update(query_exact_tasks(query, selection))
+    return views, tasks
+
+def prepare_approximate_views(load_filtered, sample_df, selection, total):
+    """近似模式：摘要和薪资、岗位分布、员工占比视图在分层样本上加权估计
+    
+    企业评分、其他维度和数据明细仍基于完整数据：load_filtered 为读取完整筛选结果的无参函数，在线程池中调用
+    （SQLite布局下改为库内计算，见 query_exact_tasks）；返回的 views 中暂无 filtered_ds_df，由 'detail' 任务补上。
+    """
+    sample_filtered = apply_filters(sample_df, selection)
+    sample_ds = filter_ds_jobs(sample_filtered)
+    filtered_total, filtered_total_ci = sampling.estimate_count(sample_filtered)
+    filtered_ds, filtered_ds_ci = sampling.estimate_count(sample_ds)
+    
+    views = {
+        'summary': {
+            'total': total,
+            'filtered_total': filtered_total,
+            'filtered_ds': filtered_ds,
+            'ci': {'filtered_total': filtered_total_ci, 'filtered_ds': filtered_ds_ci}
+        },
+        'df_scored': None,
+        'filter_key': fingerprint.filter_fingerprint(selection)
+    }
+    
+    tasks = {}
+    if len(sample_ds) == 0:
+        for key in APPROX_VIEWS:
+            views[key] = (None, NO_DS_DATA)
+    else:
+        tasks.update(analysis_tasks(sample_ds, selection, f"{fingerprint.filter_fingerprint(selection)}:sample"))
+    
+    if config.DATA_LAYOUT == 'sqlite':
+        views['query'] = create_query(selection)
+        tasks.update(query_exact_tasks(views['query'], selection))
+        return views, tasks
+    
+    load_ds = lazy(lambda: filter_ds_jobs(load_filtered()))
+    tasks.update(exact_tasks(load_ds, selection))
+    tasks['detail'] = lambda: {'filtered_ds_df': load_ds()}
+    return views, tasks
+
+def prepare_exact_views(df, selection, total):
+    """精确模式的摘要及计算任务：SQLite布局下在库内计算（见 prepare_query_views），否则按筛选结果计算；
+    df 为 load_layout_data 加载的数据"""
+    if config.DATA_LAYOUT == 'sqlite':
+        return prepare_query_views(selection)
+    return prepare_views(load_filtered_data(df, selection), selection, total)
+
+def compute_views(df, selection, total):
+    """依次计算筛选结果及各标签页的分析结果（预计算等非交互场景使用）；df 为 load_layout_data 加载的数据"""
+    views, tasks = prepare_exact_views(df, selection, total)
+    for task in tasks.values():
+        views.update(task())
+    return views
+
+@st.cache_resource
+def get_analysis_executor():
+    """进程内共享的分析线程池（有界）
+    
+    池中线程没有会话上下文：其中调用的缓存函数设 show_spinner=False，不在后台线程渲染缓存加载提示。
+    """
+    return ThreadPoolExecutor(max_workers=config.ANALYSIS_WORKERS, thread_name_prefix='ds-analysis')
+
+def submit_views(tasks, selection):
+    """把各分析视图的计算任务提交到线程池，返回 视图名 -> future
+    
+    同一会话中筛选指纹未变（如只调整榜单参数）时复用上一次的任务；筛选指纹变化时取消上一次尚未开始的任务，
+    已在执行的任务结果直接丢弃。
+    """
+    job_key = fingerprint.selection_fingerprint(selection)
+    previous = st.session_state.get('analysis_jobs')
+    if previous is not None:
+        if previous['key'] == job_key and not any(future.cancelled() for future in previous['futures'].values()):
+            return previous['futures']
+        for future in previous['futures'].values():
+            future.cancel()
+    
+    executor = get_analysis_executor()
+    futures = {key: executor.submit(task) for key, task in tasks.items()}
+    st.session_state['analysis_jobs'] = {'key': job_key, 'futures': futures}
+    return futures
+
+def plotly_chart(spec):
+    """渲染图表规格（图表缓存或预计算文件中的plotly JSON字典）
+
+    Streamlit 收到字典时会重建plotly图表并逐属性校验；规格均由plotly序列化得到，这里关闭校验包装后直接渲染。
+    """
+    import plotly.graph_objects as go
+    st.plotly_chart(go.Figure(spec, _validate=False), use_container_width=True)
+
+def render_view(key, views, leaderboard=None):
+    """渲染单个视图（各分析标签页及数据明细）；leaderboard 为预计算的默认榜单"""
+    if key == 'salary':
+        render_salary_tab(*views['salary'])
+    elif key == 'jobs':
+        render_jobs_tab(*views['jobs'])
+    elif key == 'ratio':
+        render_ratio_tab(*views['ratio'])
+    elif key == 'score':
+        if leaderboard is not None:
+            render_score_tab(*views['score'], leaderboard=leaderboard)
+        else:
+            render_score_tab(*views['score'], df_scored=views['df_scored'], filter_key=views['filter_key'],
+                             query=views.get('query'))
+    elif key == 'other':
+        render_other_tab(*views['other'])
+    elif key == 'cohort':
+        render_cohort_tab(*views['cohort'])
+    elif key == 'detail':
+        render_detail_tab(fetch_columns(views['filtered_ds_df']))
+
+def render_sidebar(options, overview):
+    """渲染侧边栏，返回当前筛选选择"""
+    defaults = get_default_selection(options)
     
     # 基本信息
     st.sidebar.markdown("### 📋 数据概览")
-    st.sidebar.metric("总记录数", f"{len(df):,}")
-    
-    # 筛选数据分析师岗位
-    ds_df = filter_ds_jobs(df)
-    st.sidebar.metric("数据分析师岗位", f"{len(ds_df):,}")
-    st.sidebar.metric("占比", f"{len(ds_df)/len(df)*100:.1f}%")
+    st.sidebar.metric("总记录数", f"{overview['total']:,}")
+    st.sidebar.metric("数据分析师岗位", f"{overview['ds_total']:,}")
+    st.sidebar.metric("占比", f"{overview['ds_total']/overview['total']*100:.1f}%")
     
     # 异常值处理设置
     st.sidebar.markdown("### 🧹 异常值处理")
-    remove_outliers = st.sidebar.checkbox("自动去除异常值", value=True)
+    remove_outliers = st.sidebar.checkbox("自动去除异常值", value=defaults['remove_outliers'])
     outlier_method = st.sidebar.selectbox(
         "异常值检测方法",
-        ["iqr", "zscore"],
-        help="IQR: 四分位距方法，Z-score: 标准差方法"
+        config.OUTLIER_METHODS,
+        index=config.OUTLIER_METHODS.index(defaults['outlier_method']),
+        help="IQR: 四分位距方法，Z-score: 标准差方法，MAD: 中位数绝对偏差方法"
+    )
+    outlier_multiplier = st.sidebar.select_slider(
+        "检测倍数",
+        options=config.OUTLIER_MULTIPLIERS,
+        value=defaults['outlier_multiplier'],
+        help="IQR为四分位距的倍数，Z-score和MAD为标准差的倍数；倍数越小剔除越多"
+    )
+    outlier_grouped = st.sidebar.checkbox(
+        "按行业分组检测",
+        value=defaults['outlier_grouped'],
+        help="在各行业内部分别计算检测边界，避免高薪行业整体被判为异常"
+    )
+    
+    # 计算模式
+    st.sidebar.markdown("### ⚡ 计算模式")
+    approximate = st.sidebar.checkbox(
+        "近似模式",
+        value=defaults['approximate'],
+        help="在分层抽样样本上估计薪资、岗位分布和员工占比，指标附95%置信区间；适合数据量很大时交互筛选"
     )
     
     # 数据筛选
     st.sidebar.markdown("### 🎯 数据筛选")
     
     # 行业筛选
-    industries = sorted(df['行业'].dropna().unique())
     selected_industries = st.sidebar.multiselect(
         "选择行业",
-        industries,
-        default=industries[:10] if len(industries) > 10 else industries
+        options['industries'],
+        default=defaults['industries']
     )
     
-    # 城市筛选
-    cities = sorted(df['城市'].dropna().unique())
+    # 城市筛选：可按省份、城市等级整组选择，选中的组展开为城市列表
+    city_groups = geography.city_groups(options['cities'])
+    
+    def select_city_groups():
+        chosen = {city for level, key in [('省份', 'city_provinces'), ('城市等级', 'city_tiers')]
+                  for group in st.session_state[key] for city in city_groups[level][group]}
+        if chosen:
+            st.session_state['selected_cities'] = [city for city in options['cities'] if city in chosen]
+    
+    st.sidebar.multiselect(
+        "按省份选择城市",
+        list(city_groups['省份']),
+        key='city_provinces',
+        on_change=select_city_groups
+    )
+    st.sidebar.multiselect(
+        "按城市等级选择城市",
+        list(city_groups['城市等级']),
+        key='city_tiers',
+        on_change=select_city_groups,
+        help="一线、新一线、二线城市名单见 config.CITY_TIERS"
+    )
+    if 'selected_cities' not in st.session_state:
+        st.session_state['selected_cities'] = defaults['cities']
     selected_cities = st.sidebar.multiselect(
         "选择城市",
-        cities,
-        default=cities[:10] if len(cities) > 10 else cities
+        options['cities'],
+        key='selected_cities'
     )
     
     # 头腰尾筛选
-    head_tail_options = sorted(df['头腰尾'].dropna().unique())
     selected_head_tail = st.sidebar.multiselect(
         "选择头腰尾",
-        head_tail_options,
-        default=head_tail_options
+        options['head_tail'],
+        default=defaults['head_tail']
     )
     
-    # 应用筛选
-    filtered_df = df.copy()
-    if selected_industries:
-        filtered_df = filtered_df[filtered_df['行业'].isin(selected_industries)]
-    if selected_cities:
-        filtered_df = filtered_df[filtered_df['城市'].isin(selected_cities)]
-    if selected_head_tail:
-        filtered_df = filtered_df[filtered_df['头腰尾'].isin(selected_head_tail)]
-    
-    # 筛选后的数据分析师岗位
-    filtered_ds_df = filter_ds_jobs(filtered_df)
+    return {
+        'remove_outliers': remove_outliers,
+        'outlier_method': outlier_method,
+        'outlier_multiplier': outlier_multiplier,
+        'outlier_grouped': outlier_grouped,
+        'approximate': approximate,
+        'industries': selected_industries,
+        'cities': selected_cities,
+        'head_tail': selected_head_tail
+    }
+
+def stat_metric(label, stats, key, fmt):
+    """显示统计指标；近似结果（stats 含 'ci'）加“≈”前缀，并在下方显示95%置信区间"""
+    value = fmt.format(stats[key])
+    if 'ci' not in stats:
+        st.metric(label, value)
+        return
     
-    # 显示筛选结果
+    st.metric(label, f"≈{value}")
+    ci = stats['ci'].get(key)
+    if ci is not None:
+        st.caption(f"95%置信区间: {fmt.format(ci[0])} ~ {fmt.format(ci[1])}")
+    else:
+        st.caption("无置信区间")
+
+def render_summary(summary):
+    """显示筛选结果"""
+    prefix = "≈" if 'ci' in summary else ""
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("筛选后总记录", f"{len(filtered_df):,}")
+        stat_metric("筛选后总记录", summary, 'filtered_total', "{:,}")
     with col2:
-        st.metric("筛选后DS岗位", f"{len(filtered_ds_df):,}")
+        stat_metric("筛选后DS岗位", summary, 'filtered_ds', "{:,}")
     with col3:
-        st.metric("DS岗位占比", f"{len(filtered_ds_df)/len(filtered_df)*100:.1f}%" if len(filtered_df) > 0 else "0%")
+        st.metric("DS岗位占比", f"{prefix}{summary['filtered_ds']/summary['filtered_total']*100:.1f}%" if summary['filtered_total'] > 0 else "0%")
     with col4:
-        st.metric("筛选比例", f"{len(filtered_df)/len(df)*100:.1f}%")
+        st.metric("筛选比例", f"{prefix}{summary['filtered_total']/summary['total']*100:.1f}%")
+
+def request_exact(selection):
+    """“精确计算”按钮回调：当前筛选条件改用完整数据计算"""
+    st.session_state['exact_view'] = fingerprint.selection_fingerprint(selection)
+
+def render_salary_tab(salary_analysis, error):
+    """薪资分析标签页"""
+    st.header("💰 薪资分析")
+    if error:
+        st.warning(error)
+        return
     
-    # 创建标签页
-    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["💰 薪资分析", "👥 岗位分布", "📊 员工占比", "🏆 企业评分", "📈 其他维度", "📋 数据明细"])
+    # 显示统计信息
+    col1, col2, col3, col4, col5, col6 = st.columns(6)
+    stats = salary_analysis['stats']
+    with col1:
+        stat_metric("有效数据", stats, 'count', "{:,}")
+    with col2:
+        stat_metric("平均薪资", stats, 'mean', "{:.1f}")
+    with col3:
+        stat_metric("中位数", stats, 'median', "{:.1f}")
+    with col4:
+        stat_metric("标准差", stats, 'std', "{:.1f}")
+    with col5:
+        stat_metric("最低薪资", stats, 'min', "{:.1f}")
+    with col6:
+        stat_metric("最高薪资", stats, 'max', "{:.1f}")
+    
+    # 显示图表
+    col1, col2 = st.columns(2)
+    with col1:
+        plotly_chart(salary_analysis['fig1'])
+    with col2:
+        plotly_chart(salary_analysis['fig3'])
     
-    with tab1:
-        st.header("💰 薪资分析")
-        
-        if len(filtered_ds_df) > 0:
-            salary_analysis, error = create_salary_analysis(filtered_ds_df, remove_outliers)
-            
-            if error:
-                st.warning(error)
-            else:
-                # 显示统计信息
-                col1, col2, col3, col4, col5, col6 = st.columns(6)
-                with col1:
-                    st.metric("有效数据", f"{salary_analysis['stats']['count']:,}")
-                with col2:
-                    st.metric("平均薪资", f"{salary_analysis['stats']['mean']:.1f}")
-                with col3:
-                    st.metric("中位数", f"{salary_analysis['stats']['median']:.1f}")
-                with col4:
-                    st.metric("标准差", f"{salary_analysis['stats']['std']:.1f}")
-                with col5:
-                    st.metric("最低薪资", f"{salary_analysis['stats']['min']:.1f}")
-                with col6:
-                    st.metric("最高薪资", f"{salary_analysis['stats']['max']:.1f}")
-                
-                # 显示图表
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.plotly_chart(salary_analysis['fig1'], use_container_width=True)
-                with col2:
-                    st.plotly_chart(salary_analysis['fig3'], use_container_width=True)
-                
-                st.plotly_chart(salary_analysis['fig2'], use_container_width=True)
-        else:
-            st.warning("筛选条件下没有数据分析师岗位数据")
+    plotly_chart(salary_analysis['fig2'])
+
+def render_jobs_tab(job_analysis, error):
+    """岗位分布标签页"""
+    st.header("👥 岗位分布分析")
+    if error:
+        st.warning(error)
+        return
     
-    with tab2:
-        st.header("👥 岗位分布分析")
-        
-        if len(filtered_ds_df) > 0:
-            job_analysis, error = create_job_distribution_analysis(filtered_ds_df, remove_outliers)
-            
-            if error:
-                st.warning(error)
-            else:
-                # 显示统计信息
-                col1, col2, col3, col4, col5 = st.columns(5)
-                with col1:
-                    st.metric("有效数据", f"{job_analysis['stats']['count']:,}")
-                with col2:
-                    st.metric("总岗位人数", f"{job_analysis['stats']['total_jobs']:,}")
-                with col3:
-                    st.metric("平均岗位人数", f"{job_analysis['stats']['mean']:.1f}")
-                with col4:
-                    st.metric("中位数", f"{job_analysis['stats']['median']:.1f}")
-                with col5:
-                    st.metric("标准差", f"{job_analysis['stats']['std']:.1f}")
-                
-                # 显示图表
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.plotly_chart(job_analysis['fig1'], use_container_width=True)
-                with col2:
-                    st.plotly_chart(job_analysis['fig3'], use_container_width=True)
-                
-                st.plotly_chart(job_analysis['fig2'], use_container_width=True)
-        else:
-            st.warning("筛选条件下没有数据分析师岗位数据")
+    # 显示统计信息
+    col1, col2, col3, col4, col5 = st.columns(5)
+    stats = job_analysis['stats']
+    with col1:
+        stat_metric("有效数据", stats, 'count', "{:,}")
+    with col2:
+        stat_metric("总岗位人数", stats, 'total_jobs', "{:,.0f}")
+    with col3:
+        stat_metric("平均岗位人数", stats, 'mean', "{:.1f}")
+    with col4:
+        stat_metric("中位数", stats, 'median', "{:.1f}")
+    with col5:
+        stat_metric("标准差", stats, 'std', "{:.1f}")
     
-    with tab3:
-        st.header("📊 员工占比分析")
-        
-        if len(filtered_ds_df) > 0:
-            ratio_analysis, error = create_employee_ratio_analysis(filtered_ds_df, remove_outliers)
-            
-            if error:
-                st.warning(error)
-            else:
-                # 显示统计信息
-                col1, col2, col3, col4, col5 = st.columns(5)
-                with col1:
-                    st.metric("有效数据", f"{ratio_analysis['stats']['count']:,}")
-                with col2:
-                    st.metric("平均占比", f"{ratio_analysis['stats']['mean_ratio']:.3f}%")
-                with col3:
-                    st.metric("中位数占比", f"{ratio_analysis['stats']['median_ratio']:.3f}%")
-                with col4:
-                    st.metric("最高占比", f"{ratio_analysis['stats']['max_ratio']:.3f}%")
-                with col5:
-                    st.metric("最低占比", f"{ratio_analysis['stats']['min_ratio']:.3f}%")
-                
-                # 显示图表
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.plotly_chart(ratio_analysis['fig1'], use_container_width=True)
-                with col2:
-                    st.plotly_chart(ratio_analysis['fig2'], use_container_width=True)
-                
-                st.plotly_chart(ratio_analysis['fig3'], use_container_width=True)
-        else:
-            st.warning("筛选条件下没有数据分析师岗位数据")
+    # 显示图表
+    col1, col2 = st.columns(2)
+    with col1:
+        plotly_chart(job_analysis['fig1'])
+    with col2:
+        plotly_chart(job_analysis['fig3'])
     
-    with tab4:
-        st.header("🏆 企业评分")
-        
-        if len(filtered_ds_df) > 0:
-            # 计算企业评分
-            df_scored, error = calculate_company_scores(filtered_ds_df)
-            
-            if error:
-                st.warning(error)
-            else:
-                # 显示评分分析
-                score_analysis, error = create_score_analysis(df_scored)
-                
-                if error:
-                    st.warning(error)
-                else:
-                    # 显示统计信息
-                    col1, col2, col3, col4, col5, col6 = st.columns(6)
-                    with col1:
-                        st.metric("有效数据", f"{score_analysis['stats']['total_companies']:,}")
-                    with col2:
-                        st.metric("前100名平均综合评分", f"{score_analysis['stats']['top_100_avg_score']:.1f}")
-                    with col3:
-                        st.metric("前100名平均薪资", f"{score_analysis['stats']['top_100_avg_salary']:.1f}")
-                    with col4:
-                        st.metric("前100名平均公司规模", f"{score_analysis['stats']['top_100_avg_size']:.0f}人")
-                    with col5:
-                        st.metric("前100名平均团队规模", f"{score_analysis['stats']['top_100_avg_team']:.0f}人")
-                    with col6:
-                        st.metric("前100名平均DS占比", f"{score_analysis['stats']['top_100_avg_ratio']:.3f}%")
-                    
-                    # 显示图表
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.plotly_chart(score_analysis['fig1'], use_container_width=True)
-                    with col2:
-                        st.plotly_chart(score_analysis['fig2'], use_container_width=True)
-                    
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.plotly_chart(score_analysis['fig3'], use_container_width=True)
-                    with col2:
-                        st.plotly_chart(score_analysis['fig4'], use_container_width=True)
-                    
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.plotly_chart(score_analysis['fig5'], use_container_width=True)
-                    with col2:
-                        st.plotly_chart(score_analysis['fig6'], use_container_width=True)
-                    
-                    # 企业排名榜单
-                    st.subheader("📊 企业排名榜单")
-                    
-                    # 排名筛选选项
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        rank_type = st.selectbox(
-                            "排名类型",
-                            ["总排名", "行业排名"],
-                            help="选择查看总排名或行业排名"
-                        )
-                    with col2:
-                        top_n = st.selectbox(
-                            "显示前N名",
-                            [10, 20, 50, 100],
-                            help="选择显示前多少名企业"
-                        )
-                    with col3:
-                        selected_industry = st.selectbox(
-                            "选择行业（仅行业排名时有效）",
-                            ["全部"] + sorted(df_scored['行业'].unique().tolist()),
-                            help="选择特定行业查看排名"
-                        )
-                    
-                    # 筛选数据
-                    if rank_type == "总排名":
-                        display_df = df_scored.head(top_n)
-                        title = f"综合评分前{top_n}名企业"
-                    else:  # 行业排名
-                        if selected_industry == "全部":
-                            display_df = df_scored[df_scored['行业排名'] <= top_n].head(top_n * 3)
-                            title = f"各行业前{top_n}名企业"
-                        else:
-                            industry_df = df_scored[df_scored['行业'] == selected_industry].copy()
-                            display_df = industry_df.head(top_n)
-                            title = f"{selected_industry}行业前{top_n}名企业"
-                    
-                    # 显示排名表格
-                    st.write(f"**{title}**")
-                    
-                    # 选择显示的列
-                    display_columns = [
-                        '总排名', '行业排名', '公司名称', '行业', '头腰尾', 
-                        '平均年收入', '员工人数', '在职人数', 'DS占比', 
-                        '薪资评分', '规模评分', '头腰尾评分', 'DS团队评分', '占比评分', '稳定性评分', '综合评分'
-                    ]
-                    
-                    # 格式化数据
-                    display_data = display_df[display_columns].copy()
-                    display_data['平均年收入'] = display_data['平均年收入'].round(0).astype(int)
-                    display_data['员工人数'] = display_data['员工人数'].round(0).astype(int)
-                    display_data['在职人数'] = display_data['在职人数'].round(0).astype(int)
-                    display_data['DS占比'] = display_data['DS占比'].round(3)
-                    display_data['综合评分'] = display_data['综合评分'].round(2)
-                    
-                    # 重命名列
-                    column_mapping = {
-                        '总排名': '总排名',
-                        '行业排名': '行业排名',
-                        '公司名称': '公司名称',
-                        '行业': '行业',
-                        '头腰尾': '头腰尾',
-                        '平均年收入': '平均年收入（元）',
-                        '员工人数': '员工人数',
-                        '在职人数': '在职人数',
-                        'DS占比': 'DS占比（%）',
-                        '薪资评分': '薪资评分',
-                        '规模评分': '规模评分',
-                        '头腰尾评分': '头腰尾评分',
-                        'DS团队评分': 'DS团队评分',
-                        '占比评分': '占比评分',
-                        '稳定性评分': '稳定性评分',
-                        '综合评分': '综合评分'
-                    }
-                    display_data = display_data.rename(columns=column_mapping)
-                    
-                    # 显示表格
-                    st.dataframe(
-                        display_data,
-                        use_container_width=True,
-                        height=400
-                    )
-                    
-                    # 下载按钮
-                    csv = display_data.to_csv(index=False, encoding='utf-8-sig')
-                    st.download_button(
-                        label=f"📥 下载{title}数据",
-                        data=csv,
-                        file_name=f'{title}_{pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")}.csv',
-                        mime='text/csv'
-                    )
-                    
-                    # 评分维度说明
-                    st.subheader("📋 评分维度说明")
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.markdown("""
-                        **评分维度权重：**
-                        - 薪资评分：25分 (25%)
-                        - 公司规模评分：20分 (20%)
-                        - 头腰尾评分：15分 (15%)
-                        - DS团队规模评分：15分 (15%)
-                        - DS占比评分：10分 (10%)
-                        - 工作稳定性评分：15分 (15%)
-                        - **总分：100分**
-                        """)
-                    with col2:
-                        st.markdown("""
-                        **评分标准：**
-                        - 薪资评分：基于薪资分位数计算
-                        - 规模评分：1000-10000人规模得分最高
-                        - 头腰尾评分：头(15分)、腰(10分)、尾(5分)
-                        - DS团队评分：基于团队规模分位数计算
-                        - 占比评分：2-8%占比得分最高
-                        - 稳定性评分：基于在职天数分位数计算
-                        """)
+    plotly_chart(job_analysis['fig2'])
+
+def render_ratio_tab(ratio_analysis, error):
+    """员工占比标签页"""
+    st.header("📊 员工占比分析")
+    if error:
+        st.warning(error)
+        return
+    
+    # 显示统计信息
+    col1, col2, col3, col4, col5 = st.columns(5)
+    stats = ratio_analysis['stats']
+    with col1:
+        stat_metric("有效数据", stats, 'count', "{:,}")
+    with col2:
+        stat_metric("平均占比", stats, 'mean_ratio', "{:.3f}%")
+    with col3:
+        stat_metric("中位数占比", stats, 'median_ratio', "{:.3f}%")
+    with col4:
+        stat_metric("最高占比", stats, 'max_ratio', "{:.3f}%")
+    with col5:
+        stat_metric("最低占比", stats, 'min_ratio', "{:.3f}%")
+    
+    # 显示图表
+    col1, col2 = st.columns(2)
+    with col1:
+        plotly_chart(ratio_analysis['fig1'])
+    with col2:
+        plotly_chart(ratio_analysis['fig2'])
+    
+    plotly_chart(ratio_analysis['fig3'])
+
+def render_score_tab(score_analysis, error, df_scored=None, leaderboard=None, filter_key=None, query=None):
+    """企业评分标签页；榜单优先使用实时评分结果，其次由查询（SQLite布局）在库内排名，否则使用预计算的默认榜单；
+    filter_key 为筛选指纹"""
+    st.header("🏆 企业评分")
+    if error:
+        st.warning(error)
+        return
+    
+    # 显示统计信息
+    col1, col2, col3, col4, col5, col6 = st.columns(6)
+    with col1:
+        st.metric("有效数据", f"{score_analysis['stats']['total_companies']:,}")
+    with col2:
+        st.metric("前100名平均综合评分", f"{score_analysis['stats']['top_100_avg_score']:.1f}")
+    with col3:
+        st.metric("前100名平均薪资", f"{score_analysis['stats']['top_100_avg_salary']:.1f}")
+    with col4:
+        st.metric("前100名平均公司规模", f"{score_analysis['stats']['top_100_avg_size']:.0f}人")
+    with col5:
+        st.metric("前100名平均团队规模", f"{score_analysis['stats']['top_100_avg_team']:.0f}人")
+    with col6:
+        st.metric("前100名平均DS占比", f"{score_analysis['stats']['top_100_avg_ratio']:.3f}%")
+    
+    # 显示图表
+    col1, col2 = st.columns(2)
+    with col1:
+        plotly_chart(score_analysis['fig1'])
+    with col2:
+        plotly_chart(score_analysis['fig2'])
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        plotly_chart(score_analysis['fig3'])
+    with col2:
+        plotly_chart(score_analysis['fig4'])
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        plotly_chart(score_analysis['fig5'])
+    with col2:
+        plotly_chart(score_analysis['fig6'])
+    
+    # 企业排名榜单
+    st.subheader("📊 企业排名榜单")
+    
+    # 排名筛选选项
+    if df_scored is not None:
+        industry_options = sorted(df_scored['行业'].unique().tolist())
+    elif query is not None:
+        industry_options = score_analysis['industries']
+    else:
+        industry_options = leaderboard['industries']
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        rank_type = st.selectbox(
+            "排名类型",
+            ["总排名", "行业排名"],
+            help="选择查看总排名或行业排名"
+        )
+    with col2:
+        top_n = st.selectbox(
+            "显示前N名",
+            [10, 20, 50, 100],
+            help="选择显示前多少名企业"
+        )
+    with col3:
+        selected_industry = st.selectbox(
+            "选择行业（仅行业排名时有效）",
+            ["全部"] + industry_options,
+            help="选择特定行业查看排名"
+        )
+    
+    # 筛选数据
+    if df_scored is not None or query is not None:
+        if df_scored is not None:
+            display_data, title = build_leaderboard(df_scored, rank_type, top_n, selected_industry)
         else:
-            st.warning("筛选条件下没有数据分析师岗位数据")
+            display_data, title = query_leaderboard(query, rank_type, top_n, selected_industry)
+        csv = display_data.to_csv(index=False, encoding='utf-8-sig')
+    else:
+        display_data, title, csv = leaderboard['records'], leaderboard['title'], leaderboard['csv']
+    
+    # 显示排名表格
+    st.write(f"**{title}**")
+    st.dataframe(
+        display_data,
+        use_container_width=True,
+        height=400
+    )
     
-    with tab5:
-        st.header("📈 其他分析维度")
-        
-        if len(filtered_ds_df) > 0:
-            # 公司规模分析
-            st.subheader("🏢 公司规模分析")
-            valid_size = filtered_ds_df[pd.to_numeric(filtered_ds_df['员工人数'], errors='coerce') > 0]
-            
-            if len(valid_size) > 0:
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("有效规模数据", f"{len(valid_size):,}")
-                with col2:
-                    avg_size = valid_size['员工人数'].astype(float).mean()
-                    st.metric("平均公司规模", f"{avg_size:.0f}人")
-                with col3:
-                    median_size = valid_size['员工人数'].astype(float).median()
-                    st.metric("中位数规模", f"{median_size:.0f}人")
-                
-                # 公司规模分布
-                size_data = valid_size['员工人数'].astype(float)
-                fig_size = px.histogram(
-                    x=size_data,
-                    nbins=30,
-                    title='公司规模分布',
-                    labels={'x': '员工人数', 'y': '频次'}
-                )
-                fig_size.update_xaxes(type="log")
-                st.plotly_chart(fig_size, use_container_width=True)
-            
-            # 头腰尾分布
-            st.subheader("🏆 头腰尾分布")
-            head_tail_dist = filtered_ds_df['头腰尾'].value_counts()
-            fig_head_tail = px.pie(
-                values=head_tail_dist.values, 
-                names=head_tail_dist.index,
-                title='头腰尾分布'
-            )
-            st.plotly_chart(fig_head_tail, use_container_width=True)
-            
-            # 城市分布
-            st.subheader("🌆 城市分布")
-            city_dist = filtered_ds_df['城市'].value_counts()
-            fig_city = px.bar(
-                x=city_dist.index, 
-                y=city_dist.values,
-                title='城市分布',
-                labels={'x': '城市', 'y': '岗位数量'}
-            )
-            fig_city.update_xaxes(tickangle=45)
-            st.plotly_chart(fig_city, use_container_width=True)
+    # 下载按钮
+    st.download_button(
+        label=f"📥 下载{title}数据",
+        data=csv,
+        file_name=f'{title}_{time.strftime("%Y%m%d_%H%M%S")}.csv',
+        mime='text/csv'
+    )
+    
+    # 相似企业（需要实时评分结果）
+    if df_scored is not None and len(display_data) > 0:
+        render_similar_companies(df_scored, display_data, filter_key)
+    
+    # 企业搜索
+    render_company_search(df_scored)
+    
+    # 排名稳定性（需要实时评分结果）
+    if df_scored is not None:
+        render_ranking_stability(df_scored)
+    
+    # 评分维度说明
+    st.subheader("📋 评分维度说明")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("""
+        **评分维度权重：**
+        - 薪资评分：25分 (25%)
+        - 公司规模评分：20分 (20%)
+        - 头腰尾评分：15分 (15%)
+        - DS团队规模评分：15分 (15%)
+        - DS占比评分：10分 (10%)
+        - 工作稳定性评分：15分 (15%)
+        - **总分：100分**
+        """)
+    with col2:
+        st.markdown("""
+        **评分标准：**
+        - 薪资评分：基于薪资分位数计算
+        - 规模评分：1000-10000人规模得分最高
+        - 头腰尾评分：头(15分)、腰(10分)、尾(5分)
+        - DS团队评分：基于团队规模分位数计算
+        - 占比评分：2-8%占比得分最高
+        - 稳定性评分：基于在职天数分位数计算
+        """)
+
+@st.cache_resource(max_entries=8)
+def get_similarity_index(filter_key, _df_scored):
+    """相似企业索引（每个筛选条件构建一次，进程内所有会话共享）"""
+    return similar_companies.build_index(_df_scored)
+
+def render_similar_companies(df_scored, display_data, filter_key):
+    """相似企业：从当前榜单中选择企业，按评分特征查找最相似的企业"""
+    st.subheader("🧭 相似企业")
+    col1, col2, col3 = st.columns([3, 1, 1])
+    with col1:
+        row_id = st.selectbox(
+            "选择榜单中的企业",
+            display_data.index.tolist(),
+            format_func=lambda row: f"{display_data.at[row, '总排名']}. {display_data.at[row, '公司名称']}",
+            help="按薪资、员工人数、在职人数、DS占比、平均在职天数和头腰尾查找相似企业"
+        )
+    with col2:
+        k = st.number_input("相似企业数", min_value=1, max_value=50, value=10)
+    with col3:
+        same_industry = st.checkbox("仅同行业", value=False)
+    
+    index = get_similarity_index(filter_key, df_scored)
+    row_ids, distances = similar_companies.query(index, row_id, int(k), same_industry)
+    if len(row_ids) == 0:
+        st.info("没有可比较的其他企业")
+        return
+    
+    similar = df_scored.loc[row_ids, ['总排名', '公司名称', '行业', '头腰尾', '平均年收入', '员工人数', '在职人数',
+                                      'DS占比', '平均在职天数', '综合评分']].copy()
+    similar.insert(0, '距离', distances.round(3))
+    similar['平均年收入'] = similar['平均年收入'].round(0).astype(int)
+    similar['DS占比'] = similar['DS占比'].round(3)
+    similar['综合评分'] = similar['综合评分'].round(2)
+    st.dataframe(similar, use_container_width=True)
+
+@st.cache_resource(max_entries=2)
+def load_company_index(version):
+    """公司搜索索引（每个数据集版本构建一次，进程内所有会话共享）；只读取两个名称列"""
+    if config.DATA_LAYOUT == 'sqlite':
+        df = query_backend.SQLiteBackend().read_columns(('公司名称', '公司主名'))
+    else:
+        df = column_store.read_columns(('公司名称', '公司主名'))
+    return company_search.build_index(df['公司名称'], df['公司主名'], df.index.to_numpy())
+
+def render_company_search(df_scored):
+    """企业搜索：按公司名称或简称查找，显示该公司的岗位记录及当前筛选条件下的评分和排名"""
+    st.subheader("🔍 企业搜索")
+    query = st.text_input(
+        "输入公司名称或简称关键字",
+        placeholder="例如：星邮",
+        help="匹配公司名称和公司主名中的任意连续文字"
+    )
+    if not query.strip():
+        return
+    
+    index = load_company_index(fingerprint.dataset_tag())
+    matches, total = company_search.search(index, query, limit=50)
+    if not matches:
+        st.info("未找到匹配的公司")
+        return
+    
+    st.caption(f"共找到 {total} 家公司" + (f"，显示前 {len(matches)} 家" if total > len(matches) else ""))
+    company_rows = dict(matches)
+    company = st.selectbox("选择公司", list(company_rows.keys()))
+    row_ids = company_rows[company]
+    
+    st.write(f"**{company} 的岗位记录**")
+    st.dataframe(
+        row_source().take_columns(row_ids, row_source().store_columns()),
+        use_container_width=True
+    )
+    
+    scored = df_scored.loc[df_scored.index.intersection(row_ids)] if df_scored is not None else None
+    if scored is None or len(scored) == 0:
+        st.info("该公司在当前筛选条件下没有评分数据（仅对筛选后的数据分析师岗位评分）")
+        return
+    st.write(f"**{company} 的评分与排名**")
+    score_columns = ['总排名', '行业排名', '岗位', '行业', '平均年收入', '在职人数', 'DS占比',
+                     '薪资评分', '规模评分', '头腰尾评分', 'DS团队评分', '占比评分', '稳定性评分', '综合评分']
+    st.dataframe(scored[score_columns], use_container_width=True)
+
+@st.cache_resource(max_entries=8)
+def get_ranking_stability(score_key, _df_scored, top_n, n_samples, spread):
+    """排名稳定性分析结果，按评分结果指纹和分析参数缓存"""
+    return ranking_stability.analyze(_df_scored, top_n, n_samples, spread, config.RANKING_SEED)
+
+def render_ranking_stability(df_scored):
+    """排名稳定性：随机扰动评分权重，统计各企业排名的分布及各行业榜单的Kendall tau"""
+    st.subheader("📐 排名稳定性")
+    st.caption("在当前权重附近随机扰动各评分维度的权重（总分仍为100），观察榜单对权重设定的敏感程度")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        n_samples = st.select_slider(
+            "权重样本数",
+            options=[1000, 2000, 5000, 10000],
+            value=config.RANKING_SAMPLES
+        )
+    with col2:
+        spread = st.select_slider(
+            "权重扰动幅度",
+            options=[0.1, 0.2, 0.3, 0.5],
+            value=config.RANKING_WEIGHT_SPREAD,
+            help="各维度权重乘以对数正态随机因子，此值为其标准差"
+        )
+    with col3:
+        top_n = st.selectbox(
+            "考察前N名",
+            config.RANKING_OPTIONS['top_n_options'],
+            index=config.RANKING_OPTIONS['top_n_options'].index(config.RANKING_OPTIONS['default_top_n']),
+            key='stability_top_n'
+        )
+    if not st.checkbox("计算排名稳定性", help="数据量大时需要数秒"):
+        return
+    
+    score_key = figure_cache.fingerprint(df_scored[['公司名称', '行业'] + ranking_stability.SCORE_COLUMNS])
+    with st.spinner("正在模拟权重扰动..."):
+        result = get_ranking_stability(score_key, df_scored, top_n, n_samples, spread)
+    
+    tau_mean, tau_low = result['overall_tau']
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric(f"总榜前{top_n}名 Kendall tau均值", f"{tau_mean:.3f}")
+    with col2:
+        st.metric(f"总榜前{top_n}名 Kendall tau 5%分位", f"{tau_low:.3f}")
+    with col3:
+        st.metric(f"可能进入前{result['depth']}名的企业", f"{result['pool_size']:,}")
+    
+    st.write(f"**各企业进入前{top_n}名的概率及排名分布**（排名超过{result['depth']}名记为{result['depth'] + 1}）")
+    st.dataframe(result['companies'].head(100), use_container_width=True, height=400)
+    st.write(f"**各行业榜单（行业内前{top_n}名）的稳定性**")
+    st.dataframe(result['industries'], use_container_width=True)
+
+def render_other_tab(other_analysis, error):
+    """其他维度标签页"""
+    st.header("📈 其他分析维度")
+    if error:
+        st.warning(error)
+        return
+    
+    # 公司规模分析
+    st.subheader("🏢 公司规模分析")
+    size_stats = other_analysis['stats']
+    if size_stats['count'] > 0:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("有效规模数据", f"{size_stats['count']:,}")
+        with col2:
+            st.metric("平均公司规模", f"{size_stats['mean']:.0f}人")
+        with col3:
+            st.metric("中位数规模", f"{size_stats['median']:.0f}人")
+        plotly_chart(other_analysis['fig_size'])
+    
+    # 头腰尾分布
+    st.subheader("🏆 头腰尾分布")
+    plotly_chart(other_analysis['fig_head_tail'])
+    
+    # 城市分布
+    st.subheader("🌆 城市分布")
+    level = st.radio("汇总层级", geography.LEVELS, horizontal=True, key='geo_level')
+    figures = {'城市等级': 'fig_city_tier', '省份': 'fig_province', '标准城市': 'fig_city'}
+    plotly_chart(other_analysis[figures[level]])
+    geo = other_analysis['geo']
+    st.dataframe(geo[level], use_container_width=True, hide_index=True)
+    
+    # 省份下钻到城市：筛选城市级汇总
+    provinces = [record['省份'] for record in geo['省份']]
+    if provinces:
+        province = st.selectbox("下钻到省份内的城市", provinces, key='geo_province')
+        st.dataframe([record for record in geo['标准城市'] if record['省份'] == province],
+                     use_container_width=True, hide_index=True)
+
+def render_cohort_tab(cohort_analysis, error):
+    """成立年份标签页"""
+    st.header("🏢 成立年份分析")
+    if error:
+        st.warning(error)
+        return
+    
+    stats = cohort_analysis['stats']
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("成立日期已知的记录", f"{stats['known']:,}")
+    with col2:
+        st.metric("成立日期未知的记录", f"{stats['unknown']:,}")
+    with col3:
+        st.metric("成立年份范围", f"{stats['first_year']} - {stats['last_year']}")
+    
+    plotly_chart(cohort_analysis['fig_count'])
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        plotly_chart(cohort_analysis['fig_salary'])
+    with col2:
+        plotly_chart(cohort_analysis['fig_tenure'])
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        plotly_chart(cohort_analysis['fig_ratio'])
+    with col2:
+        plotly_chart(cohort_analysis['fig_heatmap'])
+    
+    plotly_chart(cohort_analysis['fig_size'])
+
+@st.cache_resource(max_entries=4)
+def load_snapshot(path, version):
+    """读取一个数据快照中版本对比所需的列并筛选数据分析师岗位，同时计算键哈希（每个快照版本一次，进程内共享）"""
+    df = filter_ds_jobs(column_store.read_columns(snapshot_diff.SOURCE_COLUMNS, path=path))
+    df[snapshot_diff.HASH_COLUMN] = snapshot_diff.key_hashes(df)
+    return df
+
+def score_snapshot(path, selection):
+    """按当前筛选条件筛选并评分一个快照，返回按键汇总的结果"""
+    df = apply_filters(load_snapshot(path, fingerprint.dataset_version(path)), selection)
+    df_scored, _ = calculate_company_scores(df)
+    return snapshot_diff.snapshot_table(df, df_scored)
+
+@st.cache_resource(max_entries=8)
+def get_snapshot_diff(base_path, base_version, current_path, current_version, filter_key, _selection):
+    """两个快照在同一筛选条件下的逐键变化表，按快照版本和筛选指纹缓存"""
+    return snapshot_diff.diff_snapshots(score_snapshot(base_path, _selection), score_snapshot(current_path, _selection))
+
+def render_compare_sidebar():
+    """侧边栏的版本对比设置，返回 (基准快照, 对比快照)，未启用或快照不足两个时返回 None"""
+    st.sidebar.markdown("### 📅 版本对比")
+    if not st.sidebar.checkbox("对比两个数据版本", help=f"比较 {config.SNAPSHOT_DIR}/ 目录下历次抓取的数据快照与当前数据文件"):
+        return None
+    
+    ensure_heavy_modules()
+    files = snapshot_diff.snapshot_files()
+    if len(files) < 2:
+        st.sidebar.info(f"将历次抓取的CSV文件放入 {config.SNAPSHOT_DIR}/ 目录后即可对比")
+        return None
+    base_path = st.sidebar.selectbox("基准版本", files, index=len(files) - 2, format_func=os.path.basename)
+    current_path = st.sidebar.selectbox("对比版本", files, index=len(files) - 1, format_func=os.path.basename)
+    if base_path == current_path:
+        st.sidebar.warning("请选择两个不同的版本")
+        return None
+    return base_path, current_path
+
+def render_snapshot_compare(snapshots, selection):
+    """版本对比：当前筛选条件下两个快照之间的新进入、退出岗位，以及薪资、DS团队规模、评分和排名的变化"""
+    base_path, current_path = snapshots
+    st.header(f"📅 版本对比：{os.path.basename(base_path)} → {os.path.basename(current_path)}")
+    with st.spinner("正在对比两个版本..."):
+        diff = get_snapshot_diff(base_path, fingerprint.dataset_version(base_path),
+                                 current_path, fingerprint.dataset_version(current_path),
+                                 fingerprint.filter_fingerprint(selection), selection)
+    if len(diff) == 0:
+        st.warning(NO_DS_DATA)
+        return
+    
+    summary = snapshot_diff.summarize(diff)
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        st.metric("持续岗位", f"{summary['kept']:,}")
+    with col2:
+        st.metric("新进入", f"{summary['new']:,}")
+    with col3:
+        st.metric("退出", f"{summary['exited']:,}")
+    with col4:
+        median = summary['salary_change_median']
+        st.metric("年收入变化中位数", "-" if pd.isna(median) else f"{median:,.0f}")
+    with col5:
+        st.metric("在职人数合计变化", f"{summary['team_change']:+,.0f}")
+    st.caption("按 公司名称+岗位 对齐；两个版本分别在当前筛选条件下重新评分，排名变化为正表示名次上升")
+    
+    industries = snapshot_diff.industry_summary(diff)
+    col1, col2 = st.columns(2)
+    with col1:
+        fig = figure_cache.cached_px(
+            'compare.fig_flow', 'bar', industries,
+            x='行业',
+            y=[snapshot_diff.STATUS_NEW, snapshot_diff.STATUS_EXITED],
+            barmode='group',
+            title='各行业新进入与退出的岗位数',
+            labels={'value': '岗位数', 'variable': '状态'},
+            xaxes=dict(tickangle=45)
+        )
+        plotly_chart(fig)
+    with col2:
+        fig = figure_cache.cached_px(
+            'compare.fig_salary', 'bar', industries,
+            x='行业',
+            y='年收入变化均值',
+            title='各行业持续岗位的平均年收入变化',
+            labels={'年收入变化均值': '年收入变化（元）'},
+            color='年收入变化均值',
+            color_continuous_scale='RdBu',
+            xaxes=dict(tickangle=45)
+        )
+        plotly_chart(fig)
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        metric = st.selectbox("变动指标", snapshot_diff.MOVER_METRICS)
+    with col2:
+        n = st.number_input("每个行业显示", min_value=1, max_value=50, value=5)
+    movers = snapshot_diff.top_movers(diff, metric, int(n))
+    st.write(f"**各行业{metric}幅度最大的岗位**")
+    st.dataframe(
+        movers[['行业', '公司名称', '岗位', '基准年收入', '当前年收入', '年收入变化', '年收入变化率',
+                '基准在职人数', '当前在职人数', '在职人数变化', '基准排名', '当前排名', '排名变化', '评分变化']].round(2),
+        use_container_width=True,
+        hide_index=True
+    )
+    
+    with st.expander("新进入与退出的岗位"):
+        changed = diff[diff['状态'] != snapshot_diff.STATUS_KEPT]
+        st.dataframe(changed[['状态', '行业', '公司名称', '岗位', '基准年收入', '当前年收入', '基准在职人数', '当前在职人数',
+                              '基准排名', '当前排名']].round(2), use_container_width=True, hide_index=True)
+    
+    csv = diff.to_csv(index=False, encoding='utf-8-sig')
+    st.download_button(
+        label="📥 下载版本对比结果",
+        data=csv,
+        file_name=f'版本对比_{time.strftime("%Y%m%d_%H%M%S")}.csv',
+        mime='text/csv'
+    )
+
+def render_detail_tab(filtered_ds_df):
+    """数据明细标签页"""
+    st.header("📋 数据明细")
+    if len(filtered_ds_df) == 0:
+        st.warning("筛选条件下没有数据分析师岗位数据")
+        return
+    
+    # 数据下载
+    csv = filtered_ds_df.to_csv(index=False, encoding='utf-8-sig')
+    st.download_button(
+        label="📥 下载筛选后的数据",
+        data=csv,
+        file_name=f'数据分析师岗位数据_{time.strftime("%Y%m%d_%H%M%S")}.csv',
+        mime='text/csv'
+    )
+    
+    # 显示数据表格
+    st.subheader("数据预览")
+    st.dataframe(
+        filtered_ds_df,
+        use_container_width=True,
+        height=400
+    )
+    
+    # 数据统计
+    st.subheader("数据统计")
+    st.write(filtered_ds_df.describe(include='number'))
+
+def get_overview(df):
+    """侧边栏数据概览"""
+    return {'total': len(df), 'ds_total': len(filter_ds_jobs(df))}
+
+def save_warm_start(options, overview, selection, views):
+    """保存默认视图的预计算结果（统计指标、图表JSON和默认榜单）"""
+    leaderboard, display_data = None, None
+    score_analysis = views['score'][0]
+    if views['df_scored'] is not None:
+        display_data, title = build_leaderboard(views['df_scored'], "总排名", 10, "全部")
+        industries = sorted(views['df_scored']['行业'].unique().tolist())
+    elif views.get('query') is not None and score_analysis is not None:
+        display_data, title = query_leaderboard(views['query'], "总排名", 10, "全部")
+        industries = score_analysis['industries']
+    if display_data is not None:
+        leaderboard = {
+            'industries': industries,
+            'title': title,
+            'records': display_data.to_dict('records'),
+            'csv': display_data.to_csv(index=False, encoding='utf-8-sig')
+        }
+    
+    serialized_views = {'summary': views['summary']}
+    for key in ANALYSIS_VIEWS:
+        serialized_views[key] = warm_start.serialize_result(views[key])
+    
+    warm_start.save_artifact({
+        'options': options,
+        'overview': overview,
+        'selection': selection,
+        'views': serialized_views,
+        'leaderboard': leaderboard
+    })
+
+@st.cache_resource(show_spinner=False)
+def get_import_lock():
+    """进程级锁：串行化重量级模块的导入（脚本每次重跑都重新执行，锁需跨重跑共享）"""
+    return threading.Lock()
+
+def build_partitioned_dataset():
+    """构建分区数据集，侧边栏筛选项和概览随分区一同保存"""
+    df = load_view_data()
+    return partitioned_store.build_partitions({'options': get_filter_options(df), 'overview': get_overview(df)})
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def load_partition_metadata(version):
+    """读取分区数据集元数据，当前版本尚未构建时先构建"""
+    metadata = partitioned_store.read_metadata()
+    if metadata is None:
+        build_partitioned_dataset()
+        metadata = partitioned_store.read_metadata()
+    return metadata
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def load_sqlite_metadata(version):
+    """SQLite数据库中的侧边栏筛选项和概览，当前版本的数据库尚未构建时先构建"""
+    backend = query_backend.SQLiteBackend()
+    return {'options': backend.options(), 'overview': backend.overview()}
+
+def _warmup():
+    """后台预热：导入重量级模块并加载数据"""
+    ensure_heavy_modules()
+    if config.DATA_LAYOUT == 'partitioned':
+        return load_partition_metadata(fingerprint.dataset_tag())
+    if config.DATA_LAYOUT == 'sqlite':
+        return load_sqlite_metadata(fingerprint.dataset_tag())
+    return load_view_data()
+
+@st.cache_resource
+def start_background_warmup():
+    """启动后台预热线程（进程内只启动一次；预热失败时由 load_live_data 清除缓存，下次运行重新预热）"""
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ds-warmup')
+    return executor.submit(_warmup)
+
+def load_layout_data():
+    """按数据布局加载数据和侧边栏所需的概览信息，返回 (df, 筛选项, 概览)
+    
+    分区、SQLite布局下不加载全量数据（返回的df为None），侧边栏信息来自分区元数据或SQL查询，数据在筛选时按需读取。
+    """
+    if config.DATA_LAYOUT == 'partitioned':
+        metadata = load_partition_metadata(fingerprint.dataset_tag())
+        return None, metadata['options'], metadata['overview']
+    if config.DATA_LAYOUT == 'sqlite':
+        metadata = load_sqlite_metadata(fingerprint.dataset_tag())
+        return None, metadata['options'], metadata['overview']
+    df = load_view_data()
+    if df is None:
+        return None, None, None
+    return df, get_filter_options(df), get_overview(df)
+
+def load_live_data():
+    """加载数据并计算侧边栏所需的概览信息（见 load_layout_data），等待后台预热完成"""
+    ensure_heavy_modules()
+    with st.spinner("正在加载数据..."):
+        try:
+            start_background_warmup().result()
+        except Exception:
+            # 不缓存失败的预热，否则此后每次运行都直接抛出同一异常
+            start_background_warmup.clear()
+            raise
+        return load_layout_data()
+
+def main():
+    """主函数"""
+    # 页面配置
+    st.set_page_config(
+        page_title="数据分析师岗位综合分析看板",
+        page_icon="📊",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+    st.markdown('<h1 class="main-header">📊 数据分析师岗位综合分析看板</h1>', unsafe_allow_html=True)
+    
+    # 侧边栏配置
+    st.sidebar.header("🔧 数据筛选设置")
+    
+    # 会话首次运行时优先使用预计算的默认视图，数据和重量级模块在后台加载
+    warm = None
+    if not st.session_state.get('warm_start_served'):
+        warm = warm_start.load_artifact()
+    
+    df = None
+    if warm is not None:
+        options, overview = warm['options'], warm['overview']
+    else:
+        df, options, overview = load_live_data()
+        if options is None:
+            st.error("数据加载失败，请检查数据文件")
+            return
+    
+    selection = render_sidebar(options, overview)
+    snapshots = render_compare_sidebar()
+    
+    # 默认视图直接使用预计算结果，其余情况实时计算
+    use_warm = warm is not None and selection == warm['selection']
+    # 近似模式下点击“精确计算”后，当前筛选条件改用完整数据计算
+    approximate = selection['approximate'] and st.session_state.get('exact_view') != fingerprint.selection_fingerprint(selection)
+    futures = {}
+    if use_warm:
+        views = warm['views']
+    else:
+        if warm is not None:
+            df, live_options, _ = load_live_data()
+            if live_options is None:
+                st.error("数据加载失败，请检查数据文件")
+                return
+        if approximate:
+            views, tasks = prepare_approximate_views(lambda: load_filtered_data(df, selection), load_sample_data(),
+                                                     selection, overview['total'])
         else:
-            st.warning("筛选条件下没有数据分析师岗位数据")
+            views, tasks = prepare_exact_views(df, selection, overview['total'])
+        # 各分析视图提交到线程池后台计算，摘要和占位先行渲染
+        futures = submit_views(tasks, dict(selection, approximate=approximate))
+    
+    # 显示筛选结果
+    render_summary(views['summary'])
+    if approximate:
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.info("近似模式：摘要及薪资、岗位分布、员工占比为分层抽样的加权估计（附95%置信区间），企业评分、其他维度、成立年份和数据明细基于完整数据")
+        with col2:
+            st.button("🎯 精确计算", on_click=request_exact, args=(selection,), help="用完整数据重新计算当前筛选条件下的全部指标")
+    
+    # 版本对比（侧边栏启用时显示在各标签页之前）
+    if snapshots is not None:
+        render_snapshot_compare(snapshots, selection)
     
-    with tab6:
-        st.header("📋 数据明细")
+    # 创建标签页
+    tabs = st.tabs(["💰 薪资分析", "👥 岗位分布", "📊 员工占比", "🏆 企业评分", "📈 其他维度", "🏢 成立年份", "📋 数据明细"])
+    
+    placeholders = {}
+    for key, tab in zip(ANALYSIS_VIEWS + ['detail'], tabs):
+        with tab:
+            placeholders[key] = st.empty()
+    
+    if use_warm:
+        for key in ANALYSIS_VIEWS:
+            with placeholders[key].container():
+                render_view(key, views, leaderboard=warm['leaderboard'])
+    else:
+        # 无需计算的视图（数据明细、无数据提示）在等待线程池期间直接渲染
+        for key in ANALYSIS_VIEWS + ['detail']:
+            if key in futures:
+                placeholders[key].info("⏳ 正在计算...")
+            else:
+                with placeholders[key].container():
+                    render_view(key, views)
         
-        if len(filtered_ds_df) > 0:
-            # 数据下载
-            csv = filtered_ds_df.to_csv(index=False, encoding='utf-8-sig')
-            st.download_button(
-                label="📥 下载筛选后的数据",
-                data=csv,
-                file_name=f'数据分析师岗位数据_{pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")}.csv',
-                mime='text/csv'
-            )
-            
-            # 显示数据表格
-            st.subheader("数据预览")
-            st.dataframe(
-                filtered_ds_df,
-                use_container_width=True,
-                height=400
-            )
-            
-            # 数据统计
-            st.subheader("数据统计")
-            st.write(filtered_ds_df.describe())
-        else:
-            st.warning("筛选条件下没有数据分析师岗位数据")
+        # 哪个视图先算完就先渲染哪个；单个视图计算出错时只在该标签页显示错误
+        keys = {future: key for key, future in futures.items()}
+        failed = False
+        for future in as_completed(keys):
+            key = keys[future]
+            try:
+                views.update(future.result())
+            except Exception as e:
+                failed = True
+                placeholders[key].error(f"分析计算失败: {str(e)}")
+                continue
+            with placeholders[key].container():
+                render_view(key, views)
+        
+        # 部署时未生成预计算文件时，以默认视图的实时结果补写
+        if not failed and selection == get_default_selection(options) and warm_start.load_artifact() is None:
+            save_warm_start(options, overview, selection, views)
+    
+    if use_warm:
+        with placeholders['detail'].container():
+            # 首屏渲染完成后在后台导入重量级模块并加载数据，明细数据待加载完成后显示
+            start_background_warmup()
+            df, _, _ = load_live_data()
+            render_detail_tab(fetch_columns(filter_ds_jobs(load_filtered_data(df, selection))))
+    
+    st.session_state['warm_start_served'] = True
 
 if __name__ == "__main__":
     main() 
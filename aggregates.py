@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+共享聚合：同一筛选条件下各标签页的分组统计
+
+每个筛选条件（筛选指纹）只遍历一次筛选结果：把行业、城市、头腰尾各编码为整数（每列哈希一次），
+并取出平均年收入、在职人数、DS占比的数值数组。此后各标签页的分组统计（各行业的均值、总和、记录数，
+企业评分的行业均值，头腰尾、城市的分布等）都由整数编码上的 np.bincount 计算，不再对字符串列重复分组哈希。
+
+异常值处理、评分筛选等只改变参与统计的行（rows），以布尔掩码或行位置传入；近似模式的样本数据按抽样权重估计
+均值和总和，记录数为样本行数。
+
+城市列另按地理维表（见 geography）编码为标准城市、省份、城市等级三级整数编码：整个数据集在加载时解析、编码一次
+（按行号对齐），各筛选结果按行索引取编码，不再逐行解析城市名；各层级的汇总（geo_rollups）同样由 bincount 计算，
+省份到城市的下钻只筛选已算好的城市级汇总。
+"""
+import numpy as np
+import pandas as pd
+
+import geography
+import outlier_engine
+import sampling
+
+DIMENSIONS = ['行业', '城市', '头腰尾']
+MEASURES = ['平均年收入', '在职人数', 'DS占比']
+
+
+def encode_geography(cities):
+    """城市列按地理维表编码：返回 {'codes': {层级: 整数编码}, 'labels': {层级: 取值}}，编码与 cities 逐行对齐，缺失值为 -1
+
+    每个不同的城市取值只解析一次，再把解析结果映射回各行。
+    """
+    raw_codes, uniques = pd.factorize(cities)
+    resolved = [geography.resolve(value) for value in uniques]
+    codes, labels = {}, {}
+    for i, level in enumerate(['标准城市', '省份', '城市等级']):
+        level_codes, level_labels = pd.factorize(np.array([item[i] for item in resolved], dtype=object))
+        # 末尾追加 -1，使缺失值（-1）查表后仍为 -1
+        lookup = np.append(level_codes, -1).astype(np.int32)
+        codes[level] = lookup[raw_codes]
+        labels[level] = np.asarray(level_labels, dtype=object)
+    return {'codes': codes, 'labels': labels}
+
+
+def build(df, geo=None):
+    """遍历一次筛选结果，构建共享聚合：各维度的整数编码和取值、各指标的数值数组、行索引及抽样权重
+
+    geo 为整个数据集的地理编码（encode_geography 的结果，按行号对齐），按行索引取各行的编码；
+    未给出时就地编码筛选结果的城市列。
+    """
+    codes, labels = {}, {}
+    for dim in DIMENSIONS:
+        if dim in df.columns:
+            # 编码按首次出现的顺序，缺失值为 -1
+            codes[dim], labels[dim] = pd.factorize(df[dim])
+            labels[dim] = np.asarray(labels[dim], dtype=object)
+    if geo is None and '城市' in df.columns:
+        geo = encode_geography(df['城市'])
+        rows = None
+    else:
+        # 行索引即行号
+        rows = df.index.to_numpy()
+    if geo is not None:
+        for level in geography.LEVELS:
+            codes[level] = geo['codes'][level] if rows is None else geo['codes'][level][rows]
+            labels[level] = geo['labels'][level]
+    values = {}
+    for column in MEASURES:
+        if column in df.columns or (column == 'DS占比' and {'在职人数', '员工人数'} <= set(df.columns)):
+            values[column] = outlier_engine.column_values(df, column)
+    weights = df[sampling.WEIGHT_COLUMN].to_numpy(dtype=float) if sampling.is_sample(df) else None
+    return {'index': df.index, 'codes': codes, 'labels': labels, 'values': values, 'weights': weights}
+
+
+def positions(agg, index):
+    """行索引（如评分结果的索引）在共享聚合中的行位置"""
+    return agg['index'].get_indexer(index)
+
+
+def _select(agg, dim, rows):
+    codes = agg['codes'][dim]
+    return codes if rows is None else codes[rows]
+
+
+def group_stats(agg, dim, values, rows=None):
+    """按 dim 分组的 mean、sum、count，列为 [dim, 'mean', 'sum', 'count']，按 dim 取值升序，只含有记录的组
+
+    values 为指标名（取共享聚合中的数值）或与 rows 对应的数值数组；rows 为参与统计的行（布尔掩码或行位置，None 表示全部）。
+    缺失值不计入（与 groupby().agg(['mean', 'sum', 'count']) 一致）。
+    """
+    if isinstance(values, str):
+        values = agg['values'][values] if rows is None else agg['values'][values][rows]
+    values = np.asarray(values, dtype=float)
+    codes = _select(agg, dim, rows)
+    weights = agg['weights']
+    if weights is not None and rows is not None:
+        weights = weights[rows]
+
+    present = (codes >= 0) & ~np.isnan(values)
+    codes, values = codes[present], values[present]
+    n_groups = len(agg['labels'][dim])
+    count = np.bincount(codes, minlength=n_groups)
+    if weights is None:
+        total = np.bincount(codes, weights=values, minlength=n_groups)
+        denominator = count
+    else:
+        weights = weights[present]
+        total = np.bincount(codes, weights=weights * values, minlength=n_groups)
+        denominator = np.bincount(codes, weights=weights, minlength=n_groups)
+
+    order = np.argsort(agg['labels'][dim], kind='stable')
+    order = order[count[order] > 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = total[order] / denominator[order]
+    return pd.DataFrame({dim: agg['labels'][dim][order], 'mean': mean, 'sum': total[order], 'count': count[order]})
+
+
+def value_counts(agg, dim, rows=None):
+    """dim 各取值的记录数（同 Series.value_counts：按记录数降序，相同时按首次出现的顺序）"""
+    codes = _select(agg, dim, rows)
+    codes = codes[codes >= 0]
+    count = np.bincount(codes, minlength=len(agg['labels'][dim]))
+    # 各取值在所选行中首次出现的位置
+    first = np.full(len(count), len(codes))
+    np.minimum.at(first, codes, np.arange(len(codes)))
+    order = np.lexsort((first, -count))
+    order = order[count[order] > 0]
+    return pd.Series(count[order], index=pd.Index(agg['labels'][dim][order], name=dim), name='count')
+
+
+# 地理层级汇总的指标：(列名, 指标, 统计量)；只统计大于0的有效值
+GEO_MEASURES = [
+    ('平均年收入', '平均年收入', 'mean'),
+    ('在职人数合计', '在职人数', 'sum'),
+    ('平均DS占比', 'DS占比', 'mean')
+]
+
+
+def geo_rollups(agg, scores=None):
+    """各地理层级的汇总：层级 -> DataFrame（岗位数、平均年收入、在职人数合计、平均DS占比）
+
+    scores 为企业评分在共享聚合中的 (行位置, 综合评分)，给出时另计评分企业数和平均综合评分。
+    城市等级按等级顺序排列，省份、标准城市按岗位数降序；标准城市一级附所属省份和城市等级，
+    省份下钻到城市时直接筛选该表。
+    """
+    rollups = {}
+    for level in geography.LEVELS:
+        if level not in agg['codes']:
+            continue
+        counts = value_counts(agg, level)
+        table = pd.DataFrame({level: counts.index.to_numpy(), '岗位数': counts.to_numpy()})
+        for name, column, stat in GEO_MEASURES:
+            if column not in agg['values']:
+                continue
+            rows = agg['values'][column] > 0
+            stats = group_stats(agg, level, column, rows).set_index(level)[stat]
+            table[name] = table[level].map(stats)
+        if scores is not None:
+            rows, values = scores
+            stats = group_stats(agg, level, values, rows).set_index(level)
+            table['评分企业数'] = table[level].map(stats['count']).fillna(0).astype(int)
+            table['平均综合评分'] = table[level].map(stats['mean'])
+
+        if level == '城市等级':
+            order = {tier: i for i, tier in enumerate(geography.TIER_ORDER)}
+            table = table.sort_values(level, key=lambda tiers: tiers.map(order), kind='stable')
+        elif level == '标准城市':
+            # 各标准城市所属的省份、城市等级（同一标准城市各行的上级编码相同）
+            codes = agg['codes'][level]
+            present = codes >= 0
+            for parent in ['省份', '城市等级']:
+                parent_codes = np.full(len(agg['labels'][level]), -1)
+                parent_codes[codes[present]] = agg['codes'][parent][present]
+                lookup = dict(zip(agg['labels'][level], agg['labels'][parent][parent_codes]))
+                table.insert(1 if parent == '省份' else 2, parent, table[level].map(lookup))
+        rollups[level] = table.reset_index(drop=True)
+    return rollups
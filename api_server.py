@@ -0,0 +1,425 @@
+# -*- coding: utf-8 -*-
+"""
+本地JSON接口：以HTTP提供看板中的分析结果
+
+运行 `python api_server.py [--host 127.0.0.1] [--port 8502]` 启动（默认值见 config.API_*），
+与看板共用同一套计算（共享数据集挂载、异常值掩码缓存、评分和榜单），其他工具无需再从页面抓取数据。
+统计和排行榜由查询后端计算（见 query_backend）：默认为内存中的pandas实现，
+config.DATA_LAYOUT = 'sqlite' 时改为在SQLite数据库中以SQL计算，只把结果取回内存。
+
+接口：
+- GET /api/health                 服务状态及数据集版本
+- GET /api/options                可选的行业、城市、头腰尾及默认筛选条件
+- GET|POST /api/analytics         筛选后的薪资、岗位分布、员工占比统计，各行业汇总及企业排行榜
+- GET /api/metrics                各接口的请求数、缓存命中数及延迟分位数
+
+筛选条件（GET为查询参数，列表用逗号分隔或重复参数；POST为JSON对象）：
+industries、cities、head_tail（或 tiers）、remove_outliers、outlier_method、outlier_multiplier、
+outlier_grouped、top_n。未给出的参数取看板的默认值；列表参数显式给空值表示不按该维度筛选。
+
+响应带ETag（由筛选指纹和 top_n 计算，数据集更新后随之变化），请求带匹配的 If-None-Match 时返回304，
+不做任何计算。相同条件的结果在进程内按LRU缓存，并发的相同请求只计算一次。
+请求由有界线程池并发处理；处理中和排队中的连接超过 config.API_MAX_PENDING 时，新连接直接返回503。
+"""
+import argparse
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import config
+import fingerprint
+import query_backend
+import DS_interactive_dashboard as dashboard
+
+# 响应结构版本，接口返回字段变化时递增，使旧ETag失效
+API_SCHEMA = 2
+
+MAX_TOP_N = 1000
+MAX_BODY_BYTES = 1024 * 1024
+# 每个接口保留最近多少次请求的延迟用于计算分位数
+LATENCY_WINDOW = 1024
+
+LIST_PARAMS = {'industries': 'industries', 'cities': 'cities', 'head_tail': 'head_tail', 'tiers': 'head_tail'}
+BOOL_PARAMS = ['remove_outliers', 'outlier_grouped']
+TRUE_VALUES = {'1', 'true', 'yes', 'on'}
+FALSE_VALUES = {'0', 'false', 'no', 'off'}
+
+_lock = threading.Lock()
+_results = OrderedDict()  # 缓存键 -> 惰性求值的结果
+_metrics = {}
+_backend = None
+
+
+def cached_result(key, compute):
+    """按键缓存计算结果（LRU），返回 (结果, 是否命中缓存)；并发的相同请求共用一次计算，计算出错时不缓存"""
+    with _lock:
+        entry = _results.get(key)
+        hit = entry is not None
+        if hit:
+            _results.move_to_end(key)
+        else:
+            entry = dashboard.lazy(compute)
+            _results[key] = entry
+            while len(_results) > config.API_CACHE_ENTRIES:
+                _results.popitem(last=False)
+    try:
+        return entry(), hit
+    except Exception:
+        with _lock:
+            if _results.get(key) is entry:
+                del _results[key]
+        raise
+
+
+def record_metric(route, status, elapsed_ms, cache_hit):
+    """记录一次请求的状态和延迟"""
+    with _lock:
+        metric = _metrics.setdefault(route, {
+            'count': 0, 'errors': 0, 'not_modified': 0, 'cache_hits': 0,
+            'total_ms': 0.0, 'max_ms': 0.0, 'recent': deque(maxlen=LATENCY_WINDOW)
+        })
+        metric['count'] += 1
+        metric['errors'] += status >= 400
+        metric['not_modified'] += status == 304
+        metric['cache_hits'] += cache_hit
+        metric['total_ms'] += elapsed_ms
+        metric['max_ms'] = max(metric['max_ms'], elapsed_ms)
+        metric['recent'].append(elapsed_ms)
+
+
+def percentile(values, q):
+    """已排序序列的分位数（最近秩）"""
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(math.ceil(q * len(values))) - 1)]
+
+
+def metrics_snapshot():
+    """各接口的请求统计：请求数、错误数、304数、缓存命中数、平均/最大延迟及最近请求的延迟分位数（毫秒）"""
+    with _lock:
+        snapshot = {}
+        for route, metric in _metrics.items():
+            recent = sorted(metric['recent'])
+            snapshot[route] = {
+                'count': metric['count'],
+                'errors': metric['errors'],
+                'not_modified': metric['not_modified'],
+                'cache_hits': metric['cache_hits'],
+                'mean_ms': round(metric['total_ms'] / metric['count'], 3),
+                'p50_ms': round(percentile(recent, 0.5), 3),
+                'p95_ms': round(percentile(recent, 0.95), 3),
+                'p99_ms': round(percentile(recent, 0.99), 3),
+                'max_ms': round(metric['max_ms'], 3)
+            }
+        return snapshot
+
+
+def to_jsonable(value):
+    """转换为可JSON序列化的值：DataFrame转为记录列表，numpy标量转为Python类型，NaN、inf转为null"""
+    if isinstance(value, dashboard.pd.DataFrame):
+        return json.loads(value.to_json(orient='records', force_ascii=False))
+    if isinstance(value, dict):
+        return {str(key): to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(item) for item in value]
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def get_backend():
+    """查询后端（进程内只创建一次）"""
+    global _backend
+    with _lock:
+        if _backend is None:
+            dashboard.ensure_heavy_modules()
+            _backend = query_backend.create_backend(dashboard)
+        return _backend
+
+
+def get_options():
+    """可选筛选项及默认筛选条件（按数据集版本缓存）"""
+    def compute():
+        options = get_backend().options()
+        return {'options': options, 'defaults': dashboard.get_default_selection(options)}
+    return cached_result(f"options:{fingerprint.dataset_version()}", compute)[0]
+
+
+def split_list(values):
+    """列表参数：支持重复参数和逗号分隔，空值表示不筛选"""
+    if isinstance(values, str):
+        values = [values]
+    if not isinstance(values, list):
+        raise ValueError("列表参数应为字符串或字符串数组")
+    return [item.strip() for value in values for item in str(value).split(',') if item.strip()]
+
+
+def parse_bool(name, value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"参数 {name} 应为布尔值: {value}")
+
+
+def parse_spec(spec):
+    """把请求参数解析为看板的筛选条件和 top_n；参数不合法时抛出 ValueError"""
+    selection = dict(get_options()['defaults'])
+    top_n = config.RANKING_OPTIONS['default_top_n']
+    for name, value in spec.items():
+        if name in LIST_PARAMS:
+            selection[LIST_PARAMS[name]] = split_list(value)
+        elif name in BOOL_PARAMS:
+            selection[name] = parse_bool(name, value)
+        elif name == 'outlier_method':
+            if value not in config.OUTLIER_METHODS:
+                raise ValueError(f"异常值检测方法应为 {config.OUTLIER_METHODS} 之一: {value}")
+            selection[name] = value
+        elif name == 'outlier_multiplier':
+            try:
+                multiplier = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"检测倍数应为数字: {value}")
+            # NaN、inf 均不合法（inf 相当于不去除异常值）
+            if not (math.isfinite(multiplier) and multiplier > 0):
+                raise ValueError(f"检测倍数应为大于0的有限数: {value}")
+            selection[name] = multiplier
+        elif name == 'top_n':
+            try:
+                top_n = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"top_n 应为整数: {value}")
+            if not 1 <= top_n <= MAX_TOP_N:
+                raise ValueError(f"top_n 应在 1~{MAX_TOP_N} 之间: {value}")
+        else:
+            raise ValueError(f"未知参数: {name}")
+    # 接口始终返回基于完整数据的精确结果
+    selection['approximate'] = False
+    return selection, top_n
+
+
+def analytics_etag(selection, top_n):
+    """结果的ETag：筛选指纹（含数据集版本和异常值设置）、top_n 和响应结构版本"""
+    text = f"{fingerprint.selection_fingerprint(selection)}:{top_n}:{API_SCHEMA}"
+    return '"' + hashlib.sha1(text.encode('utf-8')).hexdigest()[:20] + '"'
+
+
+def section(data, error, industry_columns):
+    """薪资、岗位分布、员工占比的结果：统计指标及各行业汇总"""
+    if data is None:
+        return {'stats': None, 'industries': [], 'error': error}
+    stats, industry = data
+    return {'stats': stats, 'industries': industry.rename(columns=industry_columns), 'error': None}
+
+
+def compute_analytics(selection, top_n):
+    """按筛选条件计算接口结果，计算过程与看板相同"""
+    query = get_backend().query(selection)
+    result = {
+        'selection': selection,
+        'top_n': top_n,
+        'summary': query.summary()
+    }
+    if result['summary']['filtered_ds'] == 0:
+        empty = {'stats': None, 'industries': [], 'error': dashboard.NO_DS_DATA}
+        result.update(salary=empty, jobs=empty, ratio=empty,
+                      leaderboard={'title': None, 'records': [], 'error': dashboard.NO_DS_DATA})
+        return to_jsonable(result)
+
+    result['salary'] = section(query.measure('salary'), "没有有效的薪资数据", {'mean': '平均年收入', 'count': '记录数'})
+    result['jobs'] = section(query.measure('jobs'), "没有有效的岗位数据",
+                             {'sum': '总岗位人数', 'count': '记录数', 'mean': '平均岗位人数'})
+    result['ratio'] = section(query.measure('ratio'), "没有有效的占比数据", {'mean': '平均占比', 'count': '记录数'})
+
+    top_companies, error = query.top_companies(top_n)
+    if error:
+        result['leaderboard'] = {'title': None, 'records': [], 'error': error}
+    else:
+        records, title = dashboard.build_leaderboard(top_companies, "总排名", top_n, "全部")
+        result['leaderboard'] = {'title': title, 'records': records, 'error': None}
+    return to_jsonable(result)
+
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    return header.strip() == '*' or etag in [tag.strip() for tag in header.split(',')]
+
+
+def handle_health(request, spec):
+    return 200, {'status': 'ok', 'dataset': fingerprint.dataset_version()}, {}
+
+
+def handle_options(request, spec):
+    return 200, to_jsonable(get_options()), {}
+
+
+def handle_analytics(request, spec):
+    selection, top_n = parse_spec(spec)
+    etag = analytics_etag(selection, top_n)
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        return 304, None, headers
+    result, hit = cached_result(f"analytics:{etag}", lambda: compute_analytics(selection, top_n))
+    headers['X-Cache'] = 'HIT' if hit else 'MISS'
+    return 200, result, headers
+
+
+def handle_metrics(request, spec):
+    return 200, metrics_snapshot(), {}
+
+
+ROUTES = {
+    '/api/health': (handle_health, ['GET']),
+    '/api/options': (handle_options, ['GET']),
+    '/api/analytics': (handle_analytics, ['GET', 'POST']),
+    '/api/metrics': (handle_metrics, ['GET'])
+}
+
+
+class APIRequestHandler(BaseHTTPRequestHandler):
+    """把请求分派到 ROUTES 中的处理函数，统一输出JSON并记录延迟"""
+    server_version = 'DSDashboardAPI/1.0'
+    # 空闲连接最长占用处理线程的时间（秒）
+    timeout = 30
+
+    def do_GET(self):
+        self.dispatch('GET')
+
+    def do_POST(self):
+        self.dispatch('POST')
+
+    def read_spec(self, method, url):
+        """请求参数：GET取查询参数（重复参数合并为列表），POST取JSON对象"""
+        if method == 'GET':
+            query = parse_qs(url.query, keep_blank_values=True)
+            return {name: values if name in LIST_PARAMS else values[-1] for name, values in query.items()}
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            raise ValueError("请求体过大")
+        body = self.rfile.read(length) if length else b'{}'
+        try:
+            spec = json.loads(body.decode('utf-8'))
+        except (UnicodeDecodeError, ValueError):
+            raise ValueError("请求体应为JSON对象")
+        if not isinstance(spec, dict):
+            raise ValueError("请求体应为JSON对象")
+        return spec
+
+    def dispatch(self, method):
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        route = url.path.rstrip('/') or '/'
+        headers = {}
+        if route not in ROUTES:
+            status, payload, route = 404, {'error': f"未知接口: {url.path}"}, 'other'
+        elif method not in ROUTES[route][1]:
+            status, payload = 405, {'error': f"接口不支持 {method} 请求"}
+            headers['Allow'] = ', '.join(ROUTES[route][1])
+        else:
+            try:
+                status, payload, headers = ROUTES[route][0](self, self.read_spec(method, url))
+            except ValueError as e:
+                status, payload = 400, {'error': str(e)}
+            except Exception as e:
+                self.log_error("处理请求出错: %r", e)
+                status, payload = 500, {'error': str(e)}
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Server-Timing', f"total;dur={elapsed_ms:.1f}")
+        if status == 304:
+            self.end_headers()
+        else:
+            body = json.dumps(payload, ensure_ascii=False, allow_nan=False).encode('utf-8')
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        record_metric(route, status, elapsed_ms, headers.get('X-Cache') == 'HIT')
+
+
+class PooledHTTPServer(HTTPServer):
+    """用有界线程池并发处理请求的HTTP服务器；max_pending 为处理中和排队中的连接数上限，超出时返回503"""
+
+    def __init__(self, address, handler_class, workers, max_pending=config.API_MAX_PENDING):
+        super().__init__(address, handler_class)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ds-api')
+        self.slots = threading.BoundedSemaphore(max(max_pending, workers))
+
+    def process_request(self, request, client_address):
+        if not self.slots.acquire(blocking=False):
+            self.reject(request)
+            return
+        self.executor.submit(self.process_request_in_pool, request, client_address)
+
+    def process_request_in_pool(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.slots.release()
+
+    def reject(self, request):
+        """排队已满：不读取请求，直接返回503并关闭连接"""
+        body = json.dumps({'error': '服务繁忙，请稍后重试'}, ensure_ascii=False).encode('utf-8')
+        head = ("HTTP/1.0 503 Service Unavailable\r\n"
+                "Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Retry-After: 1\r\n"
+                "Connection: close\r\n\r\n").encode('ascii')
+        try:
+            request.sendall(head + body)
+        except OSError:
+            pass
+        finally:
+            self.shutdown_request(request)
+        record_metric('rejected', 503, 0.0, False)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def create_server(host=config.API_HOST, port=config.API_PORT, workers=config.API_WORKERS,
+                  max_pending=config.API_MAX_PENDING):
+    """创建接口服务（先导入计算依赖并挂载数据集，首个请求无需等待）"""
+    get_backend().options()
+    return PooledHTTPServer((host, port), APIRequestHandler, workers, max_pending)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="数据分析师岗位分析看板的本地JSON接口")
+    parser.add_argument('--host', default=config.API_HOST)
+    parser.add_argument('--port', type=int, default=config.API_PORT)
+    parser.add_argument('--workers', type=int, default=config.API_WORKERS)
+    parser.add_argument('--max-pending', type=int, default=config.API_MAX_PENDING)
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.workers, args.max_pending)
+    print(f"接口服务已启动: http://{args.host}:{server.server_port}/api/analytics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
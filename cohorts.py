@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+成立年份队列：按企业成立年份汇总数据分析师岗位
+
+每个数据集版本预先计算一次 成立年份 × 行业 × 城市 × 头腰尾 的可加汇总表（记录数及各指标的合计和有效记录数），
+并同时确定汇总表各行所属的 成立年份 × 行业、成立年份 × 头腰尾（公司规模等级）、成立年份 分组（整数组号）。
+侧边栏筛选条件正好是汇总表的维度：筛选只对汇总表各行的整数编码取掩码，再按组号用 np.bincount 求和，
+即得各分组的记录数、平均薪资、平均在职天数和平均DS占比，重跑时不再做任何分组。成立日期未知（缺失）的记录单独计数。
+"""
+import numpy as np
+import pandas as pd
+
+COHORT_COLUMN = '成立年份'
+CUBE_KEYS = [COHORT_COLUMN, '行业', '城市', '头腰尾']
+SOURCE_COLUMNS = ['成立日期', '行业', '城市', '头腰尾', '平均年收入', '平均在职天数', '在职人数', '员工人数']
+
+# 指标 -> (合计列, 有效记录数列)
+MEASURES = {
+    '平均年收入': ('薪资合计', '薪资记录数'),
+    '平均在职天数': ('在职天数合计', '在职天数记录数'),
+    'DS占比': ('DS占比合计', 'DS占比记录数')
+}
+
+
+def build_cube(df):
+    """由数据分析师岗位明细构建汇总表；各指标只统计大于0的有效值，DS占比为 在职人数 / 员工人数 × 100"""
+    salary = pd.to_numeric(df['平均年收入'], errors='coerce').to_numpy(dtype=float)
+    tenure = pd.to_numeric(df['平均在职天数'], errors='coerce').to_numpy(dtype=float)
+    team = pd.to_numeric(df['在职人数'], errors='coerce').to_numpy(dtype=float)
+    size = pd.to_numeric(df['员工人数'], errors='coerce').to_numpy(dtype=float)
+
+    valid_salary = salary > 0
+    valid_tenure = tenure > 0
+    valid_ratio = (team > 0) & (size > 0)
+    ratio = np.divide(team, size, out=np.zeros(len(df)), where=valid_ratio) * 100
+
+    frame = pd.DataFrame({
+        COHORT_COLUMN: pd.to_datetime(df['成立日期']).dt.year.astype('Float64'),
+        '行业': df['行业'],
+        '城市': df['城市'],
+        '头腰尾': df['头腰尾'],
+        '记录数': np.ones(len(df), dtype=np.int64),
+        '薪资合计': np.where(valid_salary, salary, 0.0),
+        '薪资记录数': valid_salary.astype(np.int64),
+        '在职天数合计': np.where(valid_tenure, tenure, 0.0),
+        '在职天数记录数': valid_tenure.astype(np.int64),
+        'DS占比合计': ratio,
+        'DS占比记录数': valid_ratio.astype(np.int64)
+    })
+    return frame.groupby(CUBE_KEYS, dropna=False, sort=False).sum().reset_index()
+
+
+# 筛选维度 -> 筛选条件的键
+FILTER_FIELDS = [('行业', 'industries'), ('城市', 'cities'), ('头腰尾', 'head_tail')]
+# 预先分组的结果表 -> 分组键
+TABLES = {
+    '行业': [COHORT_COLUMN, '行业'],
+    '头腰尾': [COHORT_COLUMN, '头腰尾'],
+    '成立年份': [COHORT_COLUMN]
+}
+
+
+def build_tables(cube):
+    """由汇总表预先计算筛选和分组所需的编码（每个数据集版本一次）
+
+    返回 {'codes': {筛选维度: 整数编码}, 'labels': {筛选维度: 取值}, 'groups': {结果表: (组号, 各组的分组键)},
+    'values': {合计列: 数值数组}, 'unknown': 成立年份未知的行}，编码和数组与汇总表逐行对齐；
+    分组键含缺失值的行组号为 -1（与 groupby 的 dropna 一致），各组按分组键升序编号。
+    """
+    codes, labels = {}, {}
+    for dim, _ in FILTER_FIELDS:
+        codes[dim], labels[dim] = pd.factorize(cube[dim])
+        labels[dim] = np.asarray(labels[dim], dtype=object)
+    groups = {}
+    for name, keys in TABLES.items():
+        grouped = cube.groupby(keys, sort=True)
+        ids = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+        groups[name] = (ids, grouped.size().index.to_frame(index=False))
+    columns = ['记录数'] + [column for pair in MEASURES.values() for column in pair]
+    values = {column: cube[column].to_numpy(dtype=float) for column in columns}
+    return {'codes': codes, 'labels': labels, 'groups': groups, 'values': values,
+            'unknown': cube[COHORT_COLUMN].isna().to_numpy()}
+
+
+def select_rows(tables, selection):
+    """筛选条件对应的汇总表行（布尔掩码）"""
+    rows = np.ones(len(tables['unknown']), dtype=bool)
+    for dim, key in FILTER_FIELDS:
+        if selection[key]:
+            wanted = np.flatnonzero(np.isin(tables['labels'][dim], list(selection[key])))
+            rows &= np.isin(tables['codes'][dim], wanted)
+    return rows
+
+
+def summarize(tables, name, rows):
+    """按结果表 name 的分组对所选行求和，并计算各指标的平均值（成立年份未知的行不计入，只含有记录的组）"""
+    group_ids, keys = tables['groups'][name]
+    ids = group_ids[rows]
+    present = ids >= 0
+    ids = ids[present]
+    sums = {column: np.bincount(ids, weights=values[rows][present], minlength=len(keys))
+            for column, values in tables['values'].items()}
+
+    kept = sums['记录数'] > 0
+    result = keys[kept].reset_index(drop=True)
+    result[COHORT_COLUMN] = result[COHORT_COLUMN].astype(int)
+    result['记录数'] = sums['记录数'][kept].astype(np.int64)
+    for measure, (total, count) in MEASURES.items():
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result[measure] = np.where(sums[count][kept] > 0, sums[total][kept] / sums[count][kept], np.nan)
+    return result
+
+
+def cohort_tables(tables, selection):
+    """筛选后的队列结果：(成立年份 × 行业 表, 成立年份 × 头腰尾 表, 成立年份 表, 成立日期未知的记录数)"""
+    rows = select_rows(tables, selection)
+    unknown = int(tables['values']['记录数'][rows & tables['unknown']].sum())
+    return (summarize(tables, '行业', rows), summarize(tables, '头腰尾', rows),
+            summarize(tables, '成立年份', rows), unknown)
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+列式存储：按列读取数据
+
+原始CSV在每个数据集版本下完整解析一次，以标准化列名和确定的类型写入Arrow IPC文件（未压缩），
+日期列在此时按固定格式解析，占位日期（如1970-01-01）记为缺失。
+各进程以只读内存映射方式挂载该文件，数值列和字符串列零拷贝转换为DataFrame，同一台机器上的
+多个Streamlit进程共享同一份数据。看板只读取当前视图所需的列，其余列按行号按需读取。
+"""
+import glob
+import os
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.ipc as ipc
+
+import config
+from fingerprint import dataset_tag, path_tag
+
+# 数值列：构建时统一转换为数值类型
+NUMERIC_COLUMNS = ['员工人数', '在职人数', '平均在职天数', '平均年收入', '平均工作数']
+# 日期列：构建时按固定格式解析为日期时间类型
+DATE_COLUMNS = ['成立日期']
+DATE_FORMAT = '%Y-%m-%d'
+
+# 存储格式版本，列类型或写入方式变化时递增，旧版本的缓存文件随之失效
+STORE_FORMAT = 2
+
+# pandas 3 的默认字符串类型直接引用Arrow内存；更早版本显式映射为Arrow字符串，避免复制成Python对象
+if int(pd.__version__.split('.')[0]) >= 3:
+    _TYPES_MAPPER = None
+else:
+    _TYPES_MAPPER = {pa.string(): pd.StringDtype('pyarrow'), pa.large_string(): pd.StringDtype('pyarrow')}.get
+
+
+def arrow_to_pandas(table):
+    """Arrow表转换为DataFrame，尽量直接引用Arrow内存"""
+    # split_blocks 避免把数值列合并成二维块（合并会复制数据）
+    return table.to_pandas(split_blocks=True, types_mapper=_TYPES_MAPPER)
+
+# 其他进程正在构建同一版本时的最长等待时间（秒）
+BUILD_WAIT_TIMEOUT = 300
+
+
+def standardize_column_name(col):
+    """标准化列名"""
+    col_lower = col.lower()
+    if '行业' in col or 'industry' in col_lower:
+        return '行业'
+    elif '岗位' in col or 'position' in col_lower or 'job' in col_lower:
+        return '岗位'
+    elif '公司' in col and '名称' in col:
+        return '公司名称'
+    elif '公司' in col and '主名' in col:
+        return '公司主名'
+    elif '员工' in col and '人数' in col:
+        return '员工人数'
+    elif '收入' in col and '年' in col:
+        return '平均年收入'
+    elif '在职' in col and '人数' in col:
+        return '在职人数'
+    elif '在职' in col and '天数' in col:
+        return '平均在职天数'
+    elif '头腰尾' in col:
+        return '头腰尾'
+    elif '城市' in col or 'city' in col_lower:
+        return '城市'
+    elif '规模' in col:
+        return '规模'
+    elif '企业' in col and '性质' in col:
+        return '企业性质'
+    elif '成立' in col and '日期' in col:
+        return '成立日期'
+    elif '工作' in col and '数' in col:
+        return '平均工作数'
+    elif '工商' in col and '类型' in col:
+        return '企业工商类型'
+    return col
+
+
+def parse_dates(df):
+    """按固定格式向量化解析日期列，占位日期和无法解析的值记为缺失（NaT）"""
+    for col in DATE_COLUMNS:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            values = df[col].astype('string').str.strip()
+            values = values.mask(values.isin(config.UNKNOWN_DATES))
+            df[col] = pd.to_datetime(values, format=DATE_FORMAT, errors='coerce')
+    return df
+
+
+def read_csv(path=config.DATA_FILE, columns=None):
+    """尝试不同编码读取CSV并标准化列名；columns 为所需的标准列名（None 表示全部列）"""
+    errors = []
+    for encoding in config.DATA_ENCODINGS:
+        try:
+            header = pd.read_csv(path, encoding=encoding, nrows=0).columns
+            mapping = {col: standardize_column_name(col) for col in header}
+            usecols = None
+            if columns is not None:
+                usecols = [col for col in header if mapping[col] in columns]
+            df = pd.read_csv(path, encoding=encoding, usecols=usecols)
+            # 检查是否成功读取到数据
+            if len(df) > 0 and len(df.columns) > 0:
+                return parse_dates(df.rename(columns=mapping))
+        except UnicodeDecodeError:
+            continue
+        except Exception as e:
+            errors.append(f"使用 {encoding} 编码时出错: {str(e)}")
+            continue
+
+    raise ValueError("无法读取数据文件，请检查文件编码" + (f"（{'; '.join(errors)}）" if errors else ""))
+
+
+def storage_tag(path=config.DATA_FILE):
+    """数据文件路径、数据集版本和存储格式版本，用作由列式存储派生的缓存文件名"""
+    return f"{path_tag(path)}-{dataset_tag(path)}-v{STORE_FORMAT}"
+
+
+def source_name(path=config.DATA_FILE):
+    """数据文件名（不含扩展名），区分同时使用的多个数据文件（如历次抓取的快照）"""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def source_pattern(path=config.DATA_FILE):
+    """同一数据文件各版本缓存文件名的glob前缀（文件名加路径哈希），清理旧版本时不会删除其他目录下同名文件的缓存"""
+    return f"{glob.escape(source_name(path))}-{path_tag(path)}-{'[0-9a-f]' * 12}"
+
+
+def store_path(path=config.DATA_FILE):
+    """当前数据集版本对应的列式存储文件"""
+    return os.path.join(config.COLUMN_STORE_DIR, f"{source_name(path)}-{storage_tag(path)}.arrow")
+
+
+def to_arrow_table(df):
+    """DataFrame转换为Arrow表；数值列的缺失值保留为NaN（不生成空值位图），挂载后可零拷贝；日期列的缺失值为空值"""
+    arrays = {}
+    for col in df.columns:
+        if col in NUMERIC_COLUMNS:
+            values = pd.to_numeric(df[col], errors='coerce').to_numpy()
+            arrays[col] = pa.array(values, from_pandas=False)
+        else:
+            arrays[col] = pa.array(df[col], from_pandas=True)
+    return pa.table(arrays)
+
+
+def build_store(path=config.DATA_FILE):
+    """完整解析CSV并写入列式存储，同时清理同一数据文件的旧版本文件"""
+    table = to_arrow_table(read_csv(path).reset_index(drop=True))
+    target = store_path(path)
+    os.makedirs(config.COLUMN_STORE_DIR, exist_ok=True)
+
+    # 先写临时文件再替换，其他进程不会读到半个文件
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    with ipc.new_file(tmp_path, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, target)
+
+    # 旧版本文件可直接删除：已挂载的进程仍持有映射，下次重跑时切换到新版本
+    for old_path in glob.glob(os.path.join(config.COLUMN_STORE_DIR, f"{source_pattern(path)}-v*.arrow")):
+        if old_path != target:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+    return target
+
+
+def build_once(target, build):
+    """返回 target 文件，不存在时调用 build() 构建；多个进程同时启动时只由一个进程构建"""
+    if os.path.exists(target):
+        return target
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    lock_path = f"{target}.lock"
+    try:
+        lock_fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        # 其他进程正在构建，等待其完成；锁文件超时视为残留
+        deadline = time.time() + BUILD_WAIT_TIMEOUT
+        while time.time() < deadline and os.path.exists(lock_path):
+            if os.path.exists(target):
+                return target
+            time.sleep(0.2)
+        if os.path.exists(target):
+            return target
+        try:
+            os.remove(lock_path)
+        except OSError:
+            pass
+        return build()
+
+    try:
+        return build()
+    finally:
+        os.close(lock_fd)
+        os.remove(lock_path)
+
+
+def ensure_store(path=config.DATA_FILE):
+    """返回列式存储文件，不存在时先构建"""
+    return build_once(store_path(path), lambda: build_store(path))
+
+
+def store_columns(path=config.DATA_FILE):
+    """数据集的全部列名（原始顺序）"""
+    try:
+        target = ensure_store(path)
+    except OSError:
+        # 缓存目录不可写时退回解析CSV
+        return read_csv(path).columns.tolist()
+    with pa.memory_map(target) as source:
+        return ipc.open_file(source).schema.names
+
+
+def open_table(path=config.DATA_FILE):
+    """以只读内存映射方式打开列式存储，返回Arrow表"""
+    return ipc.open_file(pa.memory_map(ensure_store(path), 'r')).read_all()
+
+
+def read_columns(columns=None, path=config.DATA_FILE):
+    """以只读内存映射方式读取指定列（None 表示全部列），行索引即行号
+
+    返回的DataFrame直接引用映射内存，调用方不得原地修改。
+    """
+    try:
+        table = open_table(path)
+    except OSError:
+        return read_csv(path, columns)
+
+    if columns is not None:
+        table = table.select([col for col in table.schema.names if col in columns])
+    return arrow_to_pandas(table)
+
+
+def take_columns(row_ids, columns, path=config.DATA_FILE):
+    """按行号读取指定列，用于按需补充未加载的列"""
+    try:
+        target = ensure_store(path)
+    except OSError:
+        return read_csv(path, columns).loc[row_ids, list(columns)]
+
+    table = feather.read_table(target, columns=list(columns), memory_map=True)
+    result = arrow_to_pandas(table.take(pa.array(row_ids, type=pa.int64())))
+    result.index = row_ids
+    return result
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+公司搜索：公司名称/公司主名的字符n-gram倒排索引
+
+索引在数据加载时构建一次：以去重后的公司名称为文档，对“公司名称 + 公司主名”按1~3字切分，
+每个n-gram的倒排表为升序的int32数组。查询时取查询词的n-gram倒排表求交集（从最短的开始），
+查询词超过3个字时再对少量候选做一次子串校验，无需逐行扫描全部数据。
+"""
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+NGRAM_SIZES = (1, 2, 3)
+# 公司名称与公司主名之间的分隔符，跨越两者的n-gram不入索引
+_SEPARATOR = '\n'
+
+
+def _normalize(text):
+    """统一大小写并去除首尾空白"""
+    return str(text).strip().casefold()
+
+
+def _ngrams(text, size):
+    """文本的全部 size 字n-gram"""
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def build_index(names, main_names, row_ids):
+    """构建搜索索引；names、main_names 为逐行的公司名称、公司主名，row_ids 为对应的行号"""
+    names = pd.Series(names).fillna('').astype(str).to_numpy()
+    main_names = pd.Series(main_names).fillna('').astype(str).to_numpy()
+    codes, companies = pd.factorize(names)
+
+    # 公司 -> 行号（按公司编号排序后的行号数组 + 偏移量）
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    row_offsets = np.searchsorted(sorted_codes, np.arange(len(companies) + 1))
+    company_rows = np.asarray(row_ids)[order]
+
+    # 每家公司的搜索文本：公司名称 + 该公司出现过的公司主名
+    texts = [[_normalize(company)] for company in companies]
+    for code, main_name in zip(codes, main_names):
+        main_name = _normalize(main_name)
+        if code >= 0 and main_name and main_name not in texts[code]:
+            texts[code].append(main_name)
+
+    postings = defaultdict(list)
+    for company_id, parts in enumerate(texts):
+        if not companies[company_id]:
+            continue
+        text = _SEPARATOR.join(parts)
+        grams = set()
+        for size in NGRAM_SIZES:
+            grams |= _ngrams(text, size)
+        for gram in grams:
+            if _SEPARATOR not in gram:
+                postings[gram].append(company_id)
+
+    return {
+        'companies': np.asarray(companies, dtype=object),
+        'texts': [_SEPARATOR.join(parts) for parts in texts],
+        'postings': {gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()},
+        'row_offsets': row_offsets,
+        'company_rows': company_rows
+    }
+
+
+def search(index, query, limit=20):
+    """搜索公司，返回 ([(公司名称, 行号数组), ...], 匹配的公司总数)；名称越短越靠前"""
+    query = _normalize(query)
+    if not query:
+        return [], 0
+
+    size = min(len(query), max(NGRAM_SIZES))
+    grams = _ngrams(query, size)
+    lists = []
+    for gram in grams:
+        posting = index['postings'].get(gram)
+        if posting is None:
+            return [], 0
+        lists.append(posting)
+
+    lists.sort(key=len)
+    candidates = lists[0]
+    for posting in lists[1:]:
+        candidates = np.intersect1d(candidates, posting, assume_unique=True)
+        if len(candidates) == 0:
+            return [], 0
+
+    # 查询词超过最大n-gram长度时，n-gram全部命中不代表包含整个查询词，需要校验
+    if len(query) > max(NGRAM_SIZES):
+        texts = index['texts']
+        candidates = np.asarray([cid for cid in candidates if query in texts[cid]], dtype=np.int32)
+
+    companies = index['companies'][candidates]
+    order = np.argsort([len(name) for name in companies], kind='stable')[:limit]
+    offsets = index['row_offsets']
+    results = []
+    for position in order:
+        company_id = candidates[position]
+        rows = index['company_rows'][offsets[company_id]:offsets[company_id + 1]]
+        results.append((companies[position], rows))
+    return results, len(candidates)
@@ -6,15 +6,71 @@
 # 数据文件配置
 DATA_FILE = 'DS_raw.csv'
 DATA_ENCODINGS = ['utf-8', 'gbk', 'gb2312', 'utf-8-sig', 'latin1']
+# 表示日期未知的占位值，解析时记为缺失
+UNKNOWN_DATES = ['1970-01-01']
+# 历次抓取的数据快照目录（CSV，格式同数据文件），版本对比时与当前数据文件一起作为可选版本
+SNAPSHOT_DIR = 'snapshots'
+
+# 缓存目录（部署时生成的预计算文件等）
+CACHE_DIR = '.ds_cache'
+WARM_START_FILE = '.ds_cache/warm_start.json'
+COLUMN_STORE_DIR = '.ds_cache/columns'
+PARTITION_DIR = '.ds_cache/partitions'
+SQLITE_DIR = '.ds_cache/sqlite'
+FIGURE_CACHE_DIR = '.ds_cache/figures'
+SAMPLE_DIR = '.ds_cache/samples'
+
+# 数据存储布局：
+#   'columns'     内存映射列式存储，全量挂载后在内存中筛选（默认）
+#   'partitioned' 按行业分区、分区内按城市排序的Parquet数据集，筛选条件下推，只读取匹配的分区和行组
+#   'sqlite'      本地SQLite数据库（适合超出内存的数据）：筛选摘要、统计、各行业汇总和排行榜以SQL计算，
+#                 图表所需的明细行按筛选条件经索引读取；本地JSON接口同样使用SQL查询后端
+DATA_LAYOUT = 'columns'
+PARTITION_ROW_GROUP_SIZE = 65536
+# SQLite数据库构建时每批导入的CSV行数
+SQLITE_BATCH_ROWS = 100000
+
+# 城市等级（第一财经·新一线城市研究所2023年城市商业魅力排行榜），未列出的内地城市记为“三线及以下”
+CITY_TIERS = {
+    '一线': ['北京', '上海', '广州', '深圳'],
+    '新一线': ['成都', '重庆', '杭州', '西安', '武汉', '苏州', '郑州', '南京', '天津', '长沙', '东莞', '宁波', '佛山', '合肥',
+            '青岛'],
+    '二线': ['昆明', '沈阳', '济南', '无锡', '厦门', '福州', '温州', '金华', '哈尔滨', '大连', '贵阳', '南宁', '泉州', '石家庄',
+           '长春', '南昌', '惠州', '常州', '嘉兴', '徐州', '南通', '太原', '保定', '珠海', '中山', '兰州', '临沂', '潍坊', '烟台',
+           '绍兴']
+}
 
 # 数据分析师岗位关键词
 DS_KEYWORDS = ['数据分析', '数据挖掘', '数据科学', '商业分析', 'BI', '数据运营', '数据工程师']
 
 # 异常值处理配置
-OUTLIER_METHODS = ['iqr', 'zscore']
+OUTLIER_METHODS = ['iqr', 'zscore', 'mad']
 DEFAULT_OUTLIER_METHOD = 'iqr'
+# 侧边栏可选的检测倍数，异常值引擎按筛选条件一次性预先计算全部倍数的掩码
+OUTLIER_MULTIPLIERS = [1.5, 2.0, 2.5, 3.0]
 DEFAULT_OUTLIER_MULTIPLIER = 1.5
 
+# 分析线程池大小：各标签页的分析并行计算，完成一个渲染一个
+ANALYSIS_WORKERS = 4
+
+# 图表缓存：进程内缓存上限、是否持久化到磁盘及磁盘缓存上限（按序列化后的图表JSON大小计算，字节）
+FIGURE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+FIGURE_CACHE_PERSIST = True
+FIGURE_CACHE_DISK_MAX_BYTES = 256 * 1024 * 1024
+
+# 近似模式：分层抽样的目标样本行数、每层最少抽取行数和随机种子（修改后重新抽样）
+APPROX_SAMPLE_SIZE = 200000
+APPROX_MIN_PER_STRATUM = 2
+APPROX_SEED = 42
+
+# 本地JSON接口（python api_server.py）：监听地址、端口、请求处理线程数、结果缓存条数，
+# 以及处理中和排队中的连接数上限（超出时直接返回503）
+API_HOST = '127.0.0.1'
+API_PORT = 8502
+API_WORKERS = 8
+API_CACHE_ENTRIES = 64
+API_MAX_PENDING = 64
+
 # 企业评分配置
 SCORE_WEIGHTS = {
     '薪资评分': 25,
@@ -25,6 +81,11 @@ SCORE_WEIGHTS = {
     '稳定性评分': 15
 }
 
+# 排名稳定性分析：权重样本数、权重扰动幅度（对数正态扰动的标准差）和随机种子
+RANKING_SAMPLES = 5000
+RANKING_WEIGHT_SPREAD = 0.2
+RANKING_SEED = 0
+
 # 头腰尾评分映射
 HEAD_TAIL_SCORES = {'头': 15, '腰': 10, '尾': 5}
 
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+图表缓存：按 (图表ID, 输入数据指纹, 样式参数) 缓存plotly图表
+
+Plotly Express构建和校验图表的开销远大于小数据量下的统计计算。同一图表的输入数据和样式参数不变时，
+直接复用已序列化的图表规格（plotly JSON），跳过plotly构建：
+- 进程内缓存：图表JSON文本，各会话、各次重跑共享，按文本大小做LRU淘汰
+- 磁盘缓存（可选）：同样的图表JSON，进程重启后仍可命中，按总大小淘汰最久未使用的文件
+
+命中时只解析JSON得到规格字典，不重建plotly图表对象（不再逐属性校验）；规格字典直接交给看板渲染。
+"""
+import glob
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly
+import plotly.express as px
+import plotly.graph_objects as go
+
+import config
+
+# 图表代码的样式调整无法从参数中看出时递增，使旧缓存失效
+STYLE_VERSION = 1
+
+# 每写入多少个磁盘缓存文件检查一次总大小
+_PRUNE_INTERVAL = 64
+
+_lock = threading.Lock()
+_memory = OrderedDict()  # 键 -> (图表JSON, 大小)
+_memory_bytes = 0
+_disk_writes = 0
+
+
+def fingerprint(value):
+    """输入数据或参数的指纹；DataFrame、Series、数组按内容（含索引）哈希"""
+    digest = hashlib.sha1()
+    _update_digest(digest, value)
+    return digest.hexdigest()
+
+
+def _update_digest(digest, value):
+    if isinstance(value, pd.DataFrame):
+        digest.update(repr(list(value.columns)).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(value).to_numpy().tobytes())
+    elif isinstance(value, (pd.Series, pd.Index)):
+        digest.update(repr(value.name).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(value).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        _update_digest(digest, pd.Series(value.ravel()))
+    elif isinstance(value, dict):
+        for key in sorted(value, key=str):
+            digest.update(repr(key).encode('utf-8'))
+            _update_digest(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}{len(value)}".encode('utf-8'))
+        for item in value:
+            _update_digest(digest, item)
+    else:
+        digest.update(repr(value).encode('utf-8'))
+    digest.update(b'\x00')
+
+
+def cache_key(chart_id, data, style):
+    """缓存键：图表ID、输入数据指纹、样式参数指纹，以及plotly版本"""
+    text = f"{chart_id}|{fingerprint(data)}|{fingerprint(style)}|{STYLE_VERSION}|{plotly.__version__}"
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def _remember(key, spec):
+    """放入进程内缓存，超出大小上限时淘汰最久未使用的图表"""
+    global _memory_bytes
+    with _lock:
+        if key in _memory:
+            _memory_bytes -= _memory.pop(key)[1]
+        _memory[key] = (spec, len(spec))
+        _memory_bytes += len(spec)
+        while _memory_bytes > config.FIGURE_CACHE_MAX_BYTES and len(_memory) > 1:
+            _memory_bytes -= _memory.popitem(last=False)[1][1]
+
+
+def _disk_path(key):
+    return os.path.join(config.FIGURE_CACHE_DIR, f"{key}.json")
+
+
+def _read_disk(key):
+    """读取磁盘缓存，返回图表JSON；未命中或文件损坏时返回None"""
+    path = _disk_path(key)
+    try:
+        with open(path, encoding='utf-8') as f:
+            spec = f.read()
+        os.utime(path)
+    except OSError:
+        return None
+    try:
+        json.loads(spec)
+    except ValueError:
+        return None
+    return spec
+
+
+def _write_disk(key, spec):
+    """写入磁盘缓存（先写临时文件再替换），缓存目录不可写时忽略"""
+    global _disk_writes
+    path = _disk_path(key)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(config.FIGURE_CACHE_DIR, exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(spec)
+        os.replace(tmp_path, path)
+    except OSError:
+        return
+
+    with _lock:
+        _disk_writes += 1
+        prune = _disk_writes % _PRUNE_INTERVAL == 1
+    if prune:
+        prune_disk()
+
+
+def prune_disk(max_bytes=None):
+    """磁盘缓存超出大小上限时，删除最久未使用的文件"""
+    max_bytes = config.FIGURE_CACHE_DISK_MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    for path in glob.glob(os.path.join(config.FIGURE_CACHE_DIR, '*.json')):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+
+
+def get_figure(chart_id, data, style, build):
+    """返回缓存的图表规格（plotly JSON 解析得到的字典）；未命中时调用 build() 构建plotly图表，序列化后缓存
+
+    data 为图表的输入数据，style 为样式参数，两者共同决定图表内容。每次返回新解析的字典，调用方可以修改。
+    """
+    key = cache_key(chart_id, data, style)
+    with _lock:
+        entry = _memory.get(key)
+        if entry is not None:
+            _memory.move_to_end(key)
+            return json.loads(entry[0])
+
+    spec = _read_disk(key) if config.FIGURE_CACHE_PERSIST else None
+    if spec is None:
+        spec = build().to_json()
+        if config.FIGURE_CACHE_PERSIST:
+            _write_disk(key, spec)
+    _remember(key, spec)
+    return json.loads(spec)
+
+
+def cached_px(chart_id, kind, data=None, vline=None, xaxes=None, layout=None, **kwargs):
+    """经缓存的Plotly Express图表，返回图表规格字典（见 get_figure）
+
+    kind 为px函数名（histogram、bar、box、pie、scatter），kwargs 为其参数；
+    vline、xaxes、layout 分别为构建后 add_vline、update_xaxes、update_layout 的参数。
+    """
+    style = {'kind': kind, 'kwargs': kwargs, 'vline': vline, 'xaxes': xaxes, 'layout': layout}
+
+    def build():
+        fig = getattr(px, kind)(data, **kwargs)
+        if vline:
+            fig.add_vline(**vline)
+        if xaxes:
+            fig.update_xaxes(**xaxes)
+        if layout:
+            fig.update_layout(**layout)
+        return fig
+
+    return get_figure(chart_id, data, style, build)
+
+
+def cached_box(chart_id, box, y, title=None, labels=None):
+    """经缓存的箱线图，由预先计算的箱线统计量（q1、median、q3、lowerfence、upperfence）绘制，不需要明细数据
+
+    y、title、labels 同 px.box 的参数（y 只用作坐标轴标题）。
+    """
+    style = {'kind': 'box', 'y': y, 'title': title, 'labels': labels}
+
+    def build():
+        stats = {key: [box[key]] for key in ('q1', 'median', 'q3', 'lowerfence', 'upperfence')}
+        fig = go.Figure(go.Box(name='', **stats))
+        fig.update_layout(title_text=title, yaxis_title=(labels or {}).get(y, y))
+        return fig
+
+    return get_figure(chart_id, box, style, build)
+
+
+def clear():
+    """清空进程内缓存"""
+    global _memory_bytes
+    with _lock:
+        _memory.clear()
+        _memory_bytes = 0
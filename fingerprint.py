@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+数据集版本与指纹工具
+"""
+import hashlib
+import os
+
+import config
+
+
+def dataset_version(path=config.DATA_FILE):
+    """数据集版本：文件名、大小和修改时间（不读取文件内容）"""
+    stat = os.stat(path)
+    return f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def dataset_tag(path=config.DATA_FILE):
+    """数据集版本的短哈希，用作缓存文件名"""
+    return hashlib.sha1(dataset_version(path).encode('utf-8')).hexdigest()[:12]
+
+
+def path_tag(path=config.DATA_FILE):
+    """数据文件实际路径的短哈希：不同目录下的同名数据文件各自使用独立的缓存文件"""
+    return hashlib.sha1(os.path.realpath(path).encode('utf-8')).hexdigest()[:8]
+
+
+def filter_fingerprint(selection, path=config.DATA_FILE):
+    """筛选指纹：数据集版本和筛选条件（行业、城市、头腰尾）的哈希，与异常值设置无关"""
+    parts = [dataset_version(path)]
+    for key in ['industries', 'cities', 'head_tail']:
+        parts.append('|'.join(sorted(str(value) for value in selection[key])))
+    return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+def selection_fingerprint(selection, path=config.DATA_FILE):
+    """视图指纹：筛选指纹加上异常值处理设置和计算模式，相同指纹的分析结果相同"""
+    settings = [selection[key] for key in ['remove_outliers', 'outlier_method', 'outlier_multiplier',
+                                           'outlier_grouped', 'approximate']]
+    text = filter_fingerprint(selection, path) + repr(settings)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
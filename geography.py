@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+地理维表：城市 → 省份 → 城市等级
+
+原始数据的城市列取值不统一（如 北京市、北京、北京·海淀区、广东·深圳、浙江省杭州市萧山区……），
+本模块把每个取值解析为标准城市（地级行政区简称）、所属省份和城市等级（见 config.CITY_TIERS）。
+解析规则：先去掉开头的省份名（广东省、广东·、广东 等），再按最早出现、最长匹配的原则在剩余文字中查找
+该省份的城市；没有省份前缀时，后接“区”“县”“旗”的城市名视为同名区县，不按城市匹配（如“朝阳区”）；
+只有省份信息时标准城市记为“省份·其他”；港澳台及海外取值单独归类，无法识别的记为“未知”。
+
+只依赖标准库，侧边栏在首屏（未导入pandas时）即可使用；按行编码和各层级的汇总见 aggregates。
+"""
+from functools import lru_cache
+
+import config
+
+UNKNOWN = '未知'
+OVERSEAS = '海外'
+OTHER_TIER = '三线及以下'
+OVERSEAS_TIER = '港澳台及海外'
+
+# 层级由粗到细
+LEVELS = ['城市等级', '省份', '标准城市']
+
+# 省份 -> 所辖地级行政区（简称；海南藏族自治州用全称，避免与海南省混淆）
+PROVINCE_CITIES = {
+    '北京': ['北京'],
+    '天津': ['天津'],
+    '上海': ['上海'],
+    '重庆': ['重庆'],
+    '河北': ['石家庄', '唐山', '秦皇岛', '邯郸', '邢台', '保定', '张家口', '承德', '沧州', '廊坊', '衡水'],
+    '山西': ['太原', '大同', '阳泉', '长治', '晋城', '朔州', '晋中', '运城', '忻州', '临汾', '吕梁'],
+    '内蒙古': ['呼和浩特', '包头', '乌海', '赤峰', '通辽', '鄂尔多斯', '呼伦贝尔', '巴彦淖尔', '乌兰察布', '兴安',
+            '锡林郭勒', '阿拉善'],
+    '辽宁': ['沈阳', '大连', '鞍山', '抚顺', '本溪', '丹东', '锦州', '营口', '阜新', '辽阳', '盘锦', '铁岭', '朝阳', '葫芦岛'],
+    '吉林': ['长春', '吉林', '四平', '辽源', '通化', '白山', '松原', '白城', '延边'],
+    '黑龙江': ['哈尔滨', '齐齐哈尔', '鸡西', '鹤岗', '双鸭山', '大庆', '伊春', '佳木斯', '七台河', '牡丹江', '黑河', '绥化',
+            '大兴安岭'],
+    '江苏': ['南京', '无锡', '徐州', '常州', '苏州', '南通', '连云港', '淮安', '盐城', '扬州', '镇江', '泰州', '宿迁'],
+    '浙江': ['杭州', '宁波', '温州', '嘉兴', '湖州', '绍兴', '金华', '衢州', '舟山', '台州', '丽水'],
+    '安徽': ['合肥', '芜湖', '蚌埠', '淮南', '马鞍山', '淮北', '铜陵', '安庆', '黄山', '滁州', '阜阳', '宿州', '六安', '亳州',
+           '池州', '宣城'],
+    '福建': ['福州', '厦门', '莆田', '三明', '泉州', '漳州', '南平', '龙岩', '宁德'],
+    '江西': ['南昌', '景德镇', '萍乡', '九江', '新余', '鹰潭', '赣州', '吉安', '宜春', '抚州', '上饶'],
+    '山东': ['济南', '青岛', '淄博', '枣庄', '东营', '烟台', '潍坊', '济宁', '泰安', '威海', '日照', '临沂', '德州', '聊城',
+           '滨州', '菏泽'],
+    '河南': ['郑州', '开封', '洛阳', '平顶山', '安阳', '鹤壁', '新乡', '焦作', '濮阳', '许昌', '漯河', '三门峡', '南阳', '商丘',
+           '信阳', '周口', '驻马店', '济源'],
+    '湖北': ['武汉', '黄石', '十堰', '宜昌', '襄阳', '鄂州', '荆门', '孝感', '荆州', '黄冈', '咸宁', '随州', '恩施', '仙桃',
+           '潜江', '天门', '神农架'],
+    '湖南': ['长沙', '株洲', '湘潭', '衡阳', '邵阳', '岳阳', '常德', '张家界', '益阳', '郴州', '永州', '怀化', '娄底', '湘西'],
+    '广东': ['广州', '韶关', '深圳', '珠海', '汕头', '佛山', '江门', '湛江', '茂名', '肇庆', '惠州', '梅州', '汕尾', '河源',
+           '阳江', '清远', '东莞', '中山', '潮州', '揭阳', '云浮'],
+    '广西': ['南宁', '柳州', '桂林', '梧州', '北海', '防城港', '钦州', '贵港', '玉林', '百色', '贺州', '河池', '来宾', '崇左'],
+    '海南': ['海口', '三亚', '三沙', '儋州'],
+    '四川': ['成都', '自贡', '攀枝花', '泸州', '德阳', '绵阳', '广元', '遂宁', '内江', '乐山', '南充', '眉山', '宜宾', '广安',
+           '达州', '雅安', '巴中', '资阳', '阿坝', '甘孜', '凉山'],
+    '贵州': ['贵阳', '六盘水', '遵义', '安顺', '毕节', '铜仁', '黔西南', '黔东南', '黔南'],
+    '云南': ['昆明', '曲靖', '玉溪', '保山', '昭通', '丽江', '普洱', '临沧', '楚雄', '红河', '文山', '西双版纳', '大理', '德宏',
+           '怒江', '迪庆'],
+    '西藏': ['拉萨', '日喀则', '昌都', '林芝', '山南', '那曲', '阿里'],
+    '陕西': ['西安', '铜川', '宝鸡', '咸阳', '渭南', '延安', '汉中', '榆林', '安康', '商洛'],
+    '甘肃': ['兰州', '嘉峪关', '金昌', '白银', '天水', '武威', '张掖', '平凉', '酒泉', '庆阳', '定西', '陇南', '临夏', '甘南'],
+    '青海': ['西宁', '海东', '海北', '黄南', '海南藏族自治州', '果洛', '玉树', '海西'],
+    '宁夏': ['银川', '石嘴山', '吴忠', '固原', '中卫'],
+    '新疆': ['乌鲁木齐', '克拉玛依', '吐鲁番', '哈密', '昌吉', '博尔塔拉', '巴音郭楞', '阿克苏', '克孜勒苏', '喀什', '和田',
+           '伊犁', '塔城', '阿勒泰', '石河子'],
+    '香港': ['香港'],
+    '澳门': ['澳门'],
+    '台湾': ['台湾']
+}
+
+# 省份全称（简称 + 省 之外的写法）
+PROVINCE_FULL_NAMES = {
+    '内蒙古': '内蒙古自治区', '广西': '广西壮族自治区', '西藏': '西藏自治区', '宁夏': '宁夏回族自治区',
+    '新疆': '新疆维吾尔自治区', '香港': '香港特别行政区', '澳门': '澳门特别行政区',
+    '北京': '北京市', '天津': '天津市', '上海': '上海市', '重庆': '重庆市'
+}
+REGIONS_OUTSIDE_MAINLAND = ['香港', '澳门', '台湾']
+OVERSEAS_KEYWORDS = ['海外', '新加坡', '日本', '韩国', '美国', '纽约', '澳大利亚', '悉尼', '英国', '法国', '德国', 'MA，']
+
+# 开头的省份名与省份名后的分隔符
+SEPARATORS = '·-－—/ 　,，'
+LEADING_NOISE = ['中国']
+# 区县名后缀：没有省份前缀时，城市名后紧跟这些字的视为同名区县（如北京的“朝阳区”不是辽宁朝阳市），不按城市匹配
+DISTRICT_SUFFIXES = '区县旗'
+
+CITY_PROVINCE = {city: province for province, cities in PROVINCE_CITIES.items() for city in cities}
+_CITY_LENGTHS = sorted({len(city) for city in CITY_PROVINCE}, reverse=True)
+_PROVINCE_PREFIXES = sorted(
+    [(name, province) for province in PROVINCE_CITIES
+     for name in {province, f"{province}省", PROVINCE_FULL_NAMES.get(province, province)}],
+    key=lambda item: len(item[0]), reverse=True)
+_CITY_TIER = {city: tier for tier, cities in config.CITY_TIERS.items() for city in cities}
+
+# 城市等级的展示顺序
+TIER_ORDER = list(config.CITY_TIERS) + [OTHER_TIER, OVERSEAS_TIER, UNKNOWN]
+
+
+def first_city(text, province=None):
+    """text 中最早出现的城市（同一位置取最长的名称）
+
+    给出 province 时只匹配该省的城市；未给出时跳过后接区县后缀的名称（同名区县无法确定所属城市）。
+    """
+    for start in range(len(text)):
+        for length in _CITY_LENGTHS:
+            name = text[start:start + length]
+            if name not in CITY_PROVINCE:
+                continue
+            if province is not None:
+                if CITY_PROVINCE[name] == province:
+                    return name
+                continue
+            following = text[start + length:start + length + 1]
+            if not (following and following in DISTRICT_SUFFIXES):
+                return name
+    return None
+
+
+def city_tier(city, province):
+    """标准城市的城市等级"""
+    if province in REGIONS_OUTSIDE_MAINLAND or province == OVERSEAS:
+        return OVERSEAS_TIER
+    if city not in CITY_PROVINCE:
+        return UNKNOWN
+    return _CITY_TIER.get(city, OTHER_TIER)
+
+
+@lru_cache(maxsize=None)
+def resolve(raw):
+    """城市列的一个取值 -> (标准城市, 省份, 城市等级)"""
+    text = str(raw).strip()
+    for noise in LEADING_NOISE:
+        if text.startswith(noise):
+            text = text[len(noise):]
+
+    province = None
+    for name, candidate in _PROVINCE_PREFIXES:
+        if text.startswith(name):
+            province = candidate
+            rest = text[len(name):]
+            break
+    # 以更长的城市名开头时按城市解析（如“海南藏族自治州”不是海南省）
+    leading = first_city(text[:_CITY_LENGTHS[0]])
+    if province is not None and leading is not None and text.startswith(leading) and len(leading) > len(name):
+        province = None
+
+    if province is not None:
+        cities = PROVINCE_CITIES[province]
+        city = first_city(rest.lstrip(SEPARATORS), province)
+        if city is None and (len(cities) == 1 or rest.startswith('市')):
+            # 直辖市、特别行政区只有一个城市；“吉林市”这类省名与市名相同
+            city = province if province in cities else cities[0]
+        if city is None:
+            city = f"{province}·其他"
+        return city, province, city_tier(city, province)
+
+    city = first_city(text)
+    if city is not None:
+        province = CITY_PROVINCE[city]
+        return city, province, city_tier(city, province)
+    if any(keyword in text for keyword in OVERSEAS_KEYWORDS):
+        return OVERSEAS, OVERSEAS, OVERSEAS_TIER
+    return UNKNOWN, UNKNOWN, UNKNOWN
+
+
+def city_groups(cities):
+    """侧边栏按省份、城市等级选择城市：层级 -> {取值: 城市列的原始取值列表}（省份按名称排序，城市等级按等级顺序）"""
+    groups = {'省份': {}, '城市等级': {}}
+    for raw in cities:
+        _, province, tier = resolve(raw)
+        groups['省份'].setdefault(province, []).append(raw)
+        groups['城市等级'].setdefault(tier, []).append(raw)
+    groups['省份'] = dict(sorted(groups['省份'].items()))
+    groups['城市等级'] = {tier: groups['城市等级'][tier] for tier in TIER_ORDER if tier in groups['城市等级']}
+    return groups
@@ -22,6 +22,13 @@ if %errorlevel% neq 0 (
     exit /b 1
 )
 
+echo.
+echo 正在生成默认视图预计算文件...
+python warm_start.py
+if %errorlevel% neq 0 (
+    echo 警告：预计算文件生成失败，看板首次打开时将实时计算
+)
+
 echo.
 echo 安装完成！
 echo.
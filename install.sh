@@ -21,6 +21,13 @@ if [ $? -ne 0 ]; then
     exit 1
 fi
 
+echo
+echo "正在生成默认视图预计算文件..."
+python3 warm_start.py
+if [ $? -ne 0 ]; then
+    echo "警告：预计算文件生成失败，看板首次打开时将实时计算"
+fi
+
 echo
 echo "安装完成！"
 echo
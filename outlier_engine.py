@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+异常值检测引擎
+
+对同一筛选条件（筛选指纹）一次性计算平均年收入、在职人数、DS占比在各检测方法（IQR、Z-score、MAD）
+和各倍数下的保留掩码，包括全体检测和按行业分组检测两种模式。侧边栏切换检测方法、倍数或分组模式时只需查表。
+
+各方法只在有效值（>0）上计算统计量：
+- IQR：保留 [Q1 - 倍数×IQR, Q3 + 倍数×IQR] 内的值
+- Z-score：保留 |x - 均值| / 标准差 < 倍数 的值
+- MAD：保留 |x - 中位数| ≤ 倍数 × 1.4826 × MAD 的值（MAD为0时改用平均绝对偏差）
+标准差或离散程度为0、无法计算时（如分组内只有一个有效值）不剔除。
+"""
+import numpy as np
+import pandas as pd
+
+OUTLIER_COLUMNS = ['平均年收入', '在职人数', 'DS占比']
+GROUP_COLUMN = '行业'
+
+# MAD、平均绝对偏差换算为正态分布标准差的系数
+MAD_SCALE = 1.4826
+MEAN_AD_SCALE = 1.2533
+
+
+def mask_key(column, method=None, multiplier=None, grouped=False):
+    """掩码列名；method 为None表示只去除无效值（不做异常值检测）"""
+    if method is None:
+        return f"{column}|有效值"
+    return f"{column}|{method}|{multiplier}|{'行业' if grouped else '全体'}"
+
+
+def column_values(df, column):
+    """检测列的数值；DS占比由在职人数和员工人数计算"""
+    if column == 'DS占比' and column not in df.columns:
+        staff = pd.to_numeric(df['在职人数'], errors='coerce')
+        employees = pd.to_numeric(df['员工人数'], errors='coerce')
+        return (staff / employees.where(employees > 0) * 100).to_numpy(dtype=float)
+    return pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+
+
+def column_statistics(values, groups=None):
+    """有效值的统计量，按行广播；传入 groups 时按组计算
+
+    分组时每组只算一次各统计量（分位数、均值和标准差、离差的中位数和均值各一次分组聚合），
+    再按组编码取回各行；分组取值缺失的行统计量为缺失。
+    """
+    valid = values > 0
+    series = pd.Series(np.where(valid, values, np.nan))
+    if groups is None:
+        clean = series.dropna()
+        median = clean.median()
+        stats = {
+            'q1': clean.quantile(0.25),
+            'q3': clean.quantile(0.75),
+            'mean': clean.mean(),
+            'std': clean.std(),
+            'median': median,
+            'mad': (clean - median).abs().median(),
+            'mean_ad': (clean - median).abs().mean()
+        }
+        return {name: np.full(len(values), value, dtype=float) for name, value in stats.items()}
+
+    codes, uniques = pd.factorize(np.asarray(groups))
+    n_groups = len(uniques)
+
+    def broadcast(table):
+        # 末尾追加缺失值，分组缺失（编码-1）的行取到缺失值
+        return np.append(table.reindex(np.arange(n_groups)).to_numpy(dtype=float), np.nan)[codes]
+
+    grouped = series.groupby(codes)
+    # 没有行时 unstack 得不到分位数列
+    quantiles = grouped.quantile([0.25, 0.5, 0.75]).unstack().reindex(columns=[0.25, 0.5, 0.75])
+    moments = grouped.agg(['mean', 'std'])
+    median = broadcast(quantiles[0.5])
+    deviation = (series - median).abs().groupby(codes).agg(['median', 'mean'])
+    return {
+        'q1': broadcast(quantiles[0.25]),
+        'q3': broadcast(quantiles[0.75]),
+        'mean': broadcast(moments['mean']),
+        'std': broadcast(moments['std']),
+        'median': median,
+        'mad': broadcast(deviation['median']),
+        'mean_ad': broadcast(deviation['mean'])
+    }
+
+
+def keep_mask(values, stats, method, multiplier):
+    """按检测方法和倍数计算保留掩码（含有效值条件）"""
+    valid = values > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if method == 'iqr':
+            iqr = stats['q3'] - stats['q1']
+            keep = (values >= stats['q1'] - multiplier * iqr) & (values <= stats['q3'] + multiplier * iqr)
+        elif method == 'zscore':
+            z_scores = np.abs(values - stats['mean']) / stats['std']
+            keep = (z_scores < multiplier) | ~(stats['std'] > 0)
+        elif method == 'mad':
+            spread = np.where(stats['mad'] > 0, MAD_SCALE * stats['mad'], MEAN_AD_SCALE * stats['mean_ad'])
+            keep = (np.abs(values - stats['median']) <= multiplier * spread) | ~(spread > 0)
+        else:
+            keep = np.ones(len(values), dtype=bool)
+    return valid & keep
+
+
+def compute_mask(df, column, method, multiplier, grouped=False):
+    """单个检测条件的保留掩码"""
+    values = column_values(df, column)
+    if method is None:
+        return values > 0
+    groups = df[GROUP_COLUMN].to_numpy() if grouped else None
+    return keep_mask(values, column_statistics(values, groups), method, multiplier)
+
+
+def compute_masks(df, methods, multipliers):
+    """一次性计算全部检测列、方法、倍数和分组模式的保留掩码，返回以行号为索引的布尔DataFrame"""
+    masks = {}
+    group_modes = [False, True] if GROUP_COLUMN in df.columns else [False]
+    for column in OUTLIER_COLUMNS:
+        if column not in df.columns and not (column == 'DS占比' and '员工人数' in df.columns):
+            continue
+        values = column_values(df, column)
+        masks[mask_key(column)] = values > 0
+        for grouped in group_modes:
+            groups = df[GROUP_COLUMN].to_numpy() if grouped else None
+            stats = column_statistics(values, groups)
+            for method in methods:
+                for multiplier in multipliers:
+                    masks[mask_key(column, method, multiplier, grouped)] = keep_mask(values, stats, method, multiplier)
+    return pd.DataFrame(masks, index=df.index)
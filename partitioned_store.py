@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+分区数据集：按行业分区、分区内按城市排序的Parquet文件
+
+目录结构为 `行业=<行业>/part-0.parquet`（hive风格）。筛选条件（行业、城市、头腰尾）转换为Arrow表达式
+下推到读取阶段：不匹配的行业分区直接跳过，分区内按城市排序后各行组的城市取值范围互不重叠，
+可依据行组统计信息跳过不含所选城市的行组。
+
+部署时运行 `python partitioned_store.py` 生成，也可在 `config.DATA_LAYOUT = 'partitioned'` 时由看板首次使用时生成。
+"""
+import glob
+import json
+import os
+import shutil
+from urllib.parse import quote
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+import column_store
+import config
+
+PARTITION_COLUMN = '行业'
+SORT_COLUMN = '城市'
+ROW_ID_COLUMN = '_row_id'
+METADATA_FILE = '_metadata.json'
+NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+# 筛选条件与列的对应关系
+FILTER_FIELDS = [('行业', 'industries'), ('城市', 'cities'), ('头腰尾', 'head_tail')]
+
+
+def partition_path(path=config.DATA_FILE):
+    """当前数据集版本对应的分区目录"""
+    return os.path.join(config.PARTITION_DIR, f"{column_store.source_name(path)}-{column_store.storage_tag(path)}")
+
+
+def build_partitions(metadata, path=config.DATA_FILE):
+    """从列式存储构建分区数据集；metadata 为侧边栏筛选项、概览等全量统计，随分区一同保存"""
+    table = column_store.open_table(path)
+    table = table.append_column(ROW_ID_COLUMN, pa.array(np.arange(table.num_rows, dtype=np.int64)))
+    table = table.sort_by([(PARTITION_COLUMN, 'ascending'), (SORT_COLUMN, 'ascending')])
+
+    target = partition_path(path)
+    tmp_dir = f"{target}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    for value in pc.unique(table[PARTITION_COLUMN]).to_pylist():
+        if value is None:
+            mask = pc.is_null(table[PARTITION_COLUMN])
+            segment = NULL_PARTITION
+        else:
+            mask = pc.equal(table[PARTITION_COLUMN], value)
+            segment = quote(value, safe='')
+        part = table.filter(mask).drop_columns([PARTITION_COLUMN])
+        part_dir = os.path.join(tmp_dir, f"{PARTITION_COLUMN}={segment}")
+        os.makedirs(part_dir)
+        pq.write_table(part, os.path.join(part_dir, 'part-0.parquet'),
+                       row_group_size=config.PARTITION_ROW_GROUP_SIZE)
+
+    with open(os.path.join(tmp_dir, METADATA_FILE), 'w', encoding='utf-8') as f:
+        json.dump(dict(metadata, columns=column_store.store_columns(path)), f, ensure_ascii=False)
+
+    # 整个目录就绪后再改名，其他进程要么看到完整的分区，要么看不到
+    try:
+        os.rename(tmp_dir, target)
+    except OSError:
+        # 其他进程已完成构建
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    for old_dir in glob.glob(os.path.join(config.PARTITION_DIR, f"{column_store.source_pattern(path)}-v*")):
+        if old_dir != target and not old_dir.endswith('.tmp'):
+            shutil.rmtree(old_dir, ignore_errors=True)
+    return target
+
+
+def read_metadata(path=config.DATA_FILE):
+    """读取分区数据集的元数据，尚未构建时返回None"""
+    try:
+        with open(os.path.join(partition_path(path), METADATA_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def open_dataset(path=config.DATA_FILE):
+    """打开分区数据集"""
+    partitioning = ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.string())]), flavor='hive')
+    return ds.dataset(partition_path(path), format='parquet', partitioning=partitioning)
+
+
+def filter_expression(selection):
+    """侧边栏筛选条件转换为Arrow表达式（未选择的条件不筛选）"""
+    expression = None
+    for column, key in FILTER_FIELDS:
+        values = selection[key]
+        if values:
+            condition = pc.field(column).isin(values)
+            expression = condition if expression is None else expression & condition
+    return expression
+
+
+def read_filtered(selection, columns=None, path=config.DATA_FILE):
+    """按筛选条件读取数据，只扫描匹配的分区和行组；行索引为原始行号，行顺序与原始数据一致"""
+    dataset = open_dataset(path)
+    all_columns = read_metadata(path)['columns']
+    if columns is not None:
+        all_columns = [col for col in all_columns if col in columns]
+
+    table = dataset.to_table(columns=all_columns + [ROW_ID_COLUMN], filter=filter_expression(selection))
+    df = column_store.arrow_to_pandas(table).set_index(ROW_ID_COLUMN).sort_index()
+    df.index.name = None
+    return df
+
+
+def main():
+    """部署时构建分区数据集"""
+    import DS_interactive_dashboard as dashboard
+
+    dashboard.ensure_heavy_modules()
+    target = dashboard.build_partitioned_dataset()
+    print(f"已生成分区数据集: {target}")
+
+
+if __name__ == "__main__":
+    main()
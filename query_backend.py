@@ -0,0 +1,792 @@
+# -*- coding: utf-8 -*-
+"""
+查询后端：筛选摘要、薪资/岗位/占比统计、各行业汇总和企业排行榜的统一接口
+
+两种实现：
+- PandasBackend：内存中的pandas实现，复用看板的计算（共享数据集、异常值掩码、共享聚合、企业评分）
+- SQLiteBackend：在本地SQLite数据库中计算，适合超出内存的历史数据。CSV按批流式导入（不整体载入内存），
+  岗位关键词匹配、DS占比在导入时以SQL计算；筛选条件、异常值检测、分组统计和评分均以SQL执行，
+  只把统计结果、各行业汇总、直方图分箱和前N名企业取回内存。筛选列建有索引。
+
+分位数、标准差、异常值检测规则和评分公式与看板一致（线性插值分位数、样本标准差，见 outlier_engine），
+两种实现的结果相同（浮点求和顺序不同，末位可能有差异）。
+
+由 config.DATA_LAYOUT 选择：'sqlite' 时使用SQLite后端，否则使用pandas后端。
+部署时可运行 `python query_backend.py` 预先生成数据库。
+"""
+import glob
+import hashlib
+import math
+import os
+import re
+import sqlite3
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+import cohorts
+import column_store
+import config
+import fingerprint
+import outlier_engine
+import sampling
+
+TABLE = 'jobs'
+ROW_ID_COLUMN = '_row_id'
+DS_FLAG_COLUMN = '是否DS'
+RATIO_COLUMN = 'DS占比'
+
+# 数据库格式版本，表结构或导入方式变化时递增，旧版本的数据库随之失效
+DB_FORMAT = 2
+
+# 按行号读取时每条查询的行号个数（低于SQLite的参数个数上限）
+TAKE_BATCH_ROWS = 10000
+# 近似模式的层内排序：行号乘法哈希、与种子异或、再乘法哈希（均取模 2^31，乘积不超出64位整数），
+# 种子不同则层内顺序不同（而不只是行号平移）
+SAMPLE_HASH_MULTIPLIERS = (2654435761, 2246822519)
+SAMPLE_HASH_MODULUS = 2 ** 31
+# 种子映射到 [0, 2^31) 时的乘数（64位黄金分割常数）
+SAMPLE_SEED_MULTIPLIER = 0x9E3779B97F4A7C15
+
+# 直方图的分箱数（同看板的 nbins）、散点图最多取回的点数
+HISTOGRAM_BINS = 30
+SCATTER_MAX_POINTS = 5000
+
+# 筛选条件与列的对应关系
+FILTER_FIELDS = [('行业', 'industries'), ('城市', 'cities'), ('头腰尾', 'head_tail')]
+
+INDEXES = {
+    'idx_filter': ['行业', '城市', '头腰尾'],
+    'idx_ds_filter': [DS_FLAG_COLUMN, '行业', '城市', '头腰尾'],
+    'idx_city': ['城市'],
+    'idx_head_tail': ['头腰尾']
+}
+
+# 视图 -> (统计列, 指标名 -> 统计量, 各行业汇总的列, 各行业汇总的排序列)，与看板的 salary_data 等一致
+VIEW_MEASURES = {
+    'salary': ('平均年收入', {
+        'count': 'count', 'mean': 'mean', 'median': 'median', 'std': 'std', 'min': 'min', 'max': 'max'
+    }, ['mean', 'count'], 'mean'),
+    'jobs': ('在职人数', {
+        'count': 'count', 'total_jobs': 'total', 'mean': 'mean', 'median': 'median', 'std': 'std'
+    }, ['sum', 'count', 'mean'], 'sum'),
+    'ratio': (RATIO_COLUMN, {
+        'count': 'count', 'mean_ratio': 'mean', 'median_ratio': 'median', 'max_ratio': 'max', 'min_ratio': 'min'
+    }, ['mean', 'count'], 'mean')
+}
+
+HEAD_TAIL_SCORES = {'头部': 15, '腰部': 10, '尾部': 5}
+SCORE_COLUMNS = ['薪资评分', '规模评分', '头腰尾评分', 'DS团队评分', '占比评分', '稳定性评分']
+SCORE_SOURCE_COLUMNS = ['公司名称', '行业', '头腰尾', '平均年收入', '员工人数', '在职人数', '平均在职天数']
+
+
+def quote(name):
+    """SQL标识符"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def placeholders(values):
+    return ', '.join('?' * len(values))
+
+
+def literal(value):
+    """数值写入SQL的字面量（按浮点数，与pandas的计算结果同为浮点类型）"""
+    return repr(float(value))
+
+
+def ds_pattern():
+    """岗位关键词的正则（同看板 filter_ds_jobs：不区分大小写的子串匹配，按Unicode规则比较大小写）"""
+    return re.compile('|'.join(re.escape(keyword) for keyword in config.DS_KEYWORDS), re.IGNORECASE)
+
+
+def sample_order(seed):
+    """按行号和种子打乱顺序的SQL表达式及参数（近似模式的层内排序、散点图取点）
+
+    行号先取模 2^31，每一步都是 [0, 2^31) 上的双射；SQLite没有异或运算符，a XOR b 写作 (a | b) - (a & b)。
+    """
+    first, second = SAMPLE_HASH_MULTIPLIERS
+    mixed = f"(({quote(ROW_ID_COLUMN)} % {SAMPLE_HASH_MODULUS}) * {first} % {SAMPLE_HASH_MODULUS})"
+    key = int(seed) * SAMPLE_SEED_MULTIPLIER % SAMPLE_HASH_MODULUS
+    return f"((({mixed} | ?) - ({mixed} & ?)) * {second} % {SAMPLE_HASH_MODULUS})", [key, key]
+
+
+# ---------------------------------------------------------------- pandas
+
+class PandasBackend:
+    """内存中的pandas实现；dashboard 为看板模块（由调用方传入，避免循环导入）"""
+
+    name = 'pandas'
+
+    def __init__(self, dashboard):
+        self.dashboard = dashboard
+
+    def load(self):
+        df = self.dashboard.load_view_data()
+        if df is None:
+            raise RuntimeError("数据加载失败")
+        return df
+
+    def options(self):
+        return self.dashboard.get_filter_options(self.load())
+
+    def overview(self):
+        return self.dashboard.get_overview(self.load())
+
+    def query(self, selection):
+        return PandasQuery(self.dashboard, self.load(), selection)
+
+
+class PandasQuery:
+    """一个筛选条件下的查询"""
+
+    def __init__(self, dashboard, df, selection):
+        self.dashboard = dashboard
+        self.total = len(df)
+        self.selection = selection
+        filtered_df = dashboard.load_filtered_data(df, selection)
+        self.filtered_total = len(filtered_df)
+        self.ds = dashboard.filter_ds_jobs(filtered_df)
+        self._outlier_options = None
+        self._agg = None
+        self._scored = None
+
+    def summary(self):
+        return {'total': self.total, 'filtered_total': self.filtered_total, 'filtered_ds': len(self.ds)}
+
+    def data(self, view):
+        """视图（salary、jobs、ratio）的 (参与统计的行, 统计指标, 各行业汇总)；没有有效数据时返回None"""
+        if self._outlier_options is None:
+            filter_key = fingerprint.filter_fingerprint(self.selection)
+            self._outlier_options = {
+                'method': self.selection['outlier_method'],
+                'multiplier': self.selection['outlier_multiplier'],
+                'grouped': self.selection['outlier_grouped'],
+                'masks': self.dashboard.get_outlier_masks(filter_key, self.ds)
+            }
+            self._agg = self.dashboard.get_aggregates(filter_key, self.ds)
+        compute = {
+            'salary': self.dashboard.salary_data,
+            'jobs': self.dashboard.job_distribution_data,
+            'ratio': self.dashboard.employee_ratio_data
+        }[view]
+        return compute(self.ds, self.selection['remove_outliers'], self._outlier_options, self._agg)
+
+    def measure(self, view):
+        """视图（salary、jobs、ratio）的 (统计指标, 各行业汇总)；没有有效数据时返回None"""
+        data = self.data(view)
+        return None if data is None else data[1:]
+
+    def scored(self):
+        """看板的评分结果，返回 (DataFrame, 错误信息)；每个查询只评分一次"""
+        if self._scored is None:
+            self._scored = self.dashboard.calculate_company_scores(self.ds)
+        return self._scored
+
+    def top_companies(self, top_n, industry=None, industry_top=None):
+        """评分前 top_n 名企业（列同看板的评分结果），返回 (DataFrame, 错误信息)；参数同 SQLiteQuery.top_companies"""
+        df_scored, error = self.scored()
+        if error:
+            return None, error
+        if industry is not None:
+            df_scored = df_scored[df_scored['行业'] == industry]
+        if industry_top is not None:
+            df_scored = df_scored[df_scored['行业排名'] <= industry_top]
+        return df_scored.head(top_n), None
+
+    def score_summary(self):
+        """可评分的企业数及各行业的平均综合评分（列 [行业, mean, count]，按行业升序），返回 (摘要, 错误信息)"""
+        df_scored, error = self.scored()
+        if error:
+            return None, error
+        industries = (df_scored.groupby('行业')['综合评分'].agg(['mean', 'count'])
+                      .reset_index().sort_values('行业', ignore_index=True))
+        return {'count': len(df_scored), 'industries': industries}, None
+
+    def scores(self):
+        """全部可评分行的综合评分（列 ['综合评分']，行索引为原始行号）；没有可评分的数据时返回None"""
+        df_scored, error = self.scored()
+        return None if error else df_scored[['综合评分']].sort_index()
+
+
+# ---------------------------------------------------------------- SQLite
+
+def keywords_tag():
+    """岗位关键词的短哈希：关键词变化时重新生成数据库"""
+    return hashlib.sha1('|'.join(config.DS_KEYWORDS).encode('utf-8')).hexdigest()[:8]
+
+
+def database_path(path=config.DATA_FILE):
+    """当前数据集版本对应的SQLite数据库文件"""
+    name = (f"{column_store.source_name(path)}-{fingerprint.path_tag(path)}-{fingerprint.dataset_tag(path)}"
+            f"-{keywords_tag()}-v{DB_FORMAT}.db")
+    return os.path.join(config.SQLITE_DIR, name)
+
+
+def read_csv_batches(path, encoding):
+    """按批读取CSV，标准化列名、转换数值列并解析日期（与列式存储一致）"""
+    header = pd.read_csv(path, encoding=encoding, nrows=0).columns
+    mapping = {col: column_store.standardize_column_name(col) for col in header}
+    for batch in pd.read_csv(path, encoding=encoding, chunksize=config.SQLITE_BATCH_ROWS):
+        batch = column_store.parse_dates(batch.rename(columns=mapping))
+        for col in column_store.NUMERIC_COLUMNS:
+            if col in batch.columns:
+                batch[col] = pd.to_numeric(batch[col], errors='coerce')
+        for col in column_store.DATE_COLUMNS:
+            if col in batch.columns:
+                batch[col] = batch[col].dt.strftime(column_store.DATE_FORMAT)
+        yield batch
+
+
+def import_csv(conn, path, encoding):
+    """流式导入CSV，返回导入的行数"""
+    offset = 0
+    columns = None
+    for batch in read_csv_batches(path, encoding):
+        if columns is None:
+            columns = list(batch.columns)
+            definitions = [f"{quote(ROW_ID_COLUMN)} INTEGER PRIMARY KEY"]
+            definitions += [f"{quote(col)} {'REAL' if col in column_store.NUMERIC_COLUMNS else 'TEXT'}"
+                            for col in columns]
+            definitions += [f"{quote(DS_FLAG_COLUMN)} INTEGER", f"{quote(RATIO_COLUMN)} REAL"]
+            conn.execute(f"CREATE TABLE {TABLE} ({', '.join(definitions)})")
+        # 缺失值（NaN、NaT）写为NULL
+        batch = batch.astype(object).where(batch.notna(), None)
+        batch.insert(0, ROW_ID_COLUMN, range(offset, offset + len(batch)))
+        target = ', '.join(quote(col) for col in [ROW_ID_COLUMN] + columns)
+        conn.executemany(f"INSERT INTO {TABLE} ({target}) VALUES ({placeholders(columns) + ', ?'})",
+                         batch.itertuples(index=False, name=None))
+        offset += len(batch)
+    return offset
+
+
+def build_database(path=config.DATA_FILE):
+    """流式导入CSV并构建SQLite数据库：岗位关键词标记、DS占比、筛选列索引；同时清理同一数据文件的旧版本数据库"""
+    target = database_path(path)
+    os.makedirs(config.SQLITE_DIR, exist_ok=True)
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+
+    errors = []
+    for encoding in config.DATA_ENCODINGS:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        with closing(sqlite3.connect(tmp_path)) as conn:
+            conn.execute("PRAGMA journal_mode = OFF")
+            conn.execute("PRAGMA synchronous = OFF")
+            try:
+                rows = import_csv(conn, path, encoding)
+            except UnicodeDecodeError:
+                continue
+            except Exception as e:
+                errors.append(f"使用 {encoding} 编码时出错: {str(e)}")
+                continue
+            if rows == 0:
+                continue
+
+            # 岗位关键词匹配和 DS占比 在库内计算；SQLite的 lower() 只转换ASCII字母，
+            # 关键词匹配改用注册的Python函数，与看板的正则匹配规则相同（只在导入时逐行调用）
+            pattern = ds_pattern()
+            conn.create_function('ds_match', 1, lambda text: int(text is not None and pattern.search(text) is not None),
+                                 deterministic=True)
+            conn.execute(f"""
+                UPDATE {TABLE} SET
+                    {quote(DS_FLAG_COLUMN)} = ds_match({quote('岗位')}),
+                    {quote(RATIO_COLUMN)} = CASE WHEN "员工人数" > 0 THEN "在职人数" / "员工人数" * 100 END
+            """)
+            for name, columns in INDEXES.items():
+                conn.execute(f"CREATE INDEX {name} ON {TABLE} ({', '.join(map(quote, columns))})")
+            conn.execute("ANALYZE")
+            conn.commit()
+        break
+    else:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise ValueError("无法读取数据文件，请检查文件编码" + (f"（{'; '.join(errors)}）" if errors else ""))
+
+    # 先写临时文件再替换，其他进程不会读到半个数据库
+    os.replace(tmp_path, target)
+    for old_path in glob.glob(os.path.join(config.SQLITE_DIR, f"{column_store.source_pattern(path)}-*.db")):
+        if old_path != target:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+    return target
+
+
+def ensure_database(path=config.DATA_FILE):
+    """返回SQLite数据库文件，不存在时先构建"""
+    return column_store.build_once(database_path(path), lambda: build_database(path))
+
+
+def filter_clause(selection, ds_only=True):
+    """侧边栏筛选条件转换为WHERE子句和参数（未选择的条件不筛选）"""
+    clauses, params = [], []
+    if ds_only:
+        clauses.append(f"{quote(DS_FLAG_COLUMN)} = 1")
+    for column, key in FILTER_FIELDS:
+        values = selection[key]
+        if values:
+            clauses.append(f"{quote(column)} IN ({placeholders(values)})")
+            params.extend(values)
+    return ' AND '.join(clauses) or '1', params
+
+
+def numpy_lerp(a, b, t):
+    """与 numpy 线性插值相同的计算（t ≥ 0.5 时从 b 反向插值）"""
+    diff = b - a
+    return b - diff * (1 - t) if t >= 0.5 else a + diff * t
+
+
+class SQLiteBackend:
+    """SQLite实现；每次查询以只读方式打开数据库（各线程各自连接）"""
+
+    name = 'sqlite'
+
+    def __init__(self, path=config.DATA_FILE):
+        self.path = path
+
+    def connect(self):
+        target = ensure_database(self.path)
+        return closing(sqlite3.connect(f"file:{target}?mode=ro", uri=True, check_same_thread=False))
+
+    def options(self):
+        options = {}
+        with self.connect() as conn:
+            for key, column in [('industries', '行业'), ('cities', '城市'), ('head_tail', '头腰尾')]:
+                rows = conn.execute(f"SELECT DISTINCT {quote(column)} FROM {TABLE} "
+                                    f"WHERE {quote(column)} IS NOT NULL ORDER BY 1").fetchall()
+                options[key] = [row[0] for row in rows]
+        return options
+
+    def overview(self):
+        with self.connect() as conn:
+            total, ds_total = conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM({quote(DS_FLAG_COLUMN)}), 0) FROM {TABLE}").fetchone()
+        return {'total': total, 'ds_total': ds_total}
+
+    def query(self, selection):
+        return SQLiteQuery(self, selection)
+
+    def store_columns(self):
+        """数据集的全部列名（原始顺序，不含导入时附加的列）"""
+        with self.connect() as conn:
+            names = [row[1] for row in conn.execute(f"PRAGMA table_info({TABLE})")]
+        return [col for col in names if col not in (ROW_ID_COLUMN, DS_FLAG_COLUMN, RATIO_COLUMN)]
+
+    @staticmethod
+    def read_rows(conn, columns, where, params):
+        """读取满足条件的行，行索引为原始行号，日期列解析为日期时间类型（与列式存储一致）"""
+        select = ', '.join(quote(col) for col in [ROW_ID_COLUMN] + list(columns))
+        df = pd.read_sql_query(f"SELECT {select} FROM {TABLE} WHERE {where} ORDER BY {quote(ROW_ID_COLUMN)}",
+                               conn, params=params, index_col=ROW_ID_COLUMN)
+        df.index.name = None
+        return column_store.parse_dates(df)
+
+    def read_filtered(self, selection, columns=None, ds_only=False):
+        """按筛选条件读取明细行（条件经索引下推）；行索引为原始行号，行顺序与原始数据一致
+
+        ds_only 为True时只读取数据分析师岗位的行（岗位关键词标记在库内判断）。
+        """
+        columns = self.store_columns() if columns is None else columns
+        where, params = filter_clause(selection, ds_only=ds_only)
+        with self.connect() as conn:
+            return self.read_rows(conn, columns, where, params)
+
+    def read_columns(self, columns):
+        """读取全部行的指定列（如公司搜索索引所需的名称列）"""
+        with self.connect() as conn:
+            return self.read_rows(conn, columns, '1', [])
+
+    def take_columns(self, row_ids, columns):
+        """按行号读取指定列（经主键分批查询），行顺序同 row_ids，用于按需补充未加载的列"""
+        row_ids = [int(row_id) for row_id in row_ids]
+        frames = []
+        with self.connect() as conn:
+            for start in range(0, max(len(row_ids), 1), TAKE_BATCH_ROWS):
+                batch = row_ids[start:start + TAKE_BATCH_ROWS]
+                frames.append(self.read_rows(
+                    conn, columns, f"{quote(ROW_ID_COLUMN)} IN ({placeholders(batch)})", batch))
+        return pd.concat(frames).reindex(row_ids)
+
+    def cohort_cube(self):
+        """成立年份队列汇总表（同 cohorts.build_cube），在库内对数据分析师岗位分组求和"""
+        keys = ', '.join(map(quote, cohorts.CUBE_KEYS[1:]))
+        ratio_valid = '"在职人数" > 0 AND "员工人数" > 0'
+        sql = f"""
+            SELECT CAST(substr("成立日期", 1, 4) AS INTEGER) AS {quote(cohorts.COHORT_COLUMN)}, {keys},
+                COUNT(*) AS "记录数",
+                TOTAL(CASE WHEN "平均年收入" > 0 THEN "平均年收入" END) AS "薪资合计",
+                COUNT(CASE WHEN "平均年收入" > 0 THEN 1 END) AS "薪资记录数",
+                TOTAL(CASE WHEN "平均在职天数" > 0 THEN "平均在职天数" END) AS "在职天数合计",
+                COUNT(CASE WHEN "平均在职天数" > 0 THEN 1 END) AS "在职天数记录数",
+                TOTAL(CASE WHEN {ratio_valid} THEN {quote(RATIO_COLUMN)} END) AS "DS占比合计",
+                COUNT(CASE WHEN {ratio_valid} THEN 1 END) AS "DS占比记录数"
+            FROM {TABLE} WHERE {quote(DS_FLAG_COLUMN)} = 1
+            GROUP BY 1, {keys}
+        """
+        with self.connect() as conn:
+            cube = pd.read_sql_query(sql, conn)
+        cube[cohorts.COHORT_COLUMN] = cube[cohorts.COHORT_COLUMN].astype('Float64')
+        return cube
+
+    def draw_sample(self, columns, sample_size, min_per_stratum=2, seed=0):
+        """在库内分层抽样（同 sampling.draw_sample 的分层和每层样本数），只把样本行取回内存
+
+        层内按行号和种子的哈希（见 sample_order）排序后取前 n_h 行（SQLite的随机数不能指定种子）。
+        """
+        strata = ', '.join(map(quote, sampling.STRATA_COLUMNS))
+        select = ', '.join(quote(col) for col in [ROW_ID_COLUMN] + list(columns))
+        order, order_params = sample_order(seed)
+        sql = f"""
+            WITH ranked AS (
+                SELECT {select},
+                    DENSE_RANK() OVER (ORDER BY {strata}) - 1 AS stratum,
+                    COUNT(*) OVER (PARTITION BY {strata}) AS stratum_rows,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY {strata}
+                        ORDER BY {order}, {quote(ROW_ID_COLUMN)}
+                    ) AS stratum_rank
+                FROM {TABLE}
+            ), sized AS (
+                SELECT *, CAST(MIN(stratum_rows, MAX(?, ROUND(stratum_rows * ?))) AS INTEGER) AS stratum_take
+                FROM ranked
+            )
+            SELECT * FROM sized WHERE stratum_rank <= stratum_take ORDER BY {quote(ROW_ID_COLUMN)}
+        """
+        with self.connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0]
+            rate = min(1.0, sample_size / max(total, 1))
+            sample = pd.read_sql_query(sql, conn, params=order_params + [min_per_stratum, rate],
+                                       index_col=ROW_ID_COLUMN)
+        sample.index.name = None
+        sample = column_store.parse_dates(sample)
+        sample[sampling.WEIGHT_COLUMN] = sample['stratum_rows'] / sample['stratum_take']
+        sample[sampling.STRATUM_COLUMN] = sample['stratum']
+        sample[sampling.STRATUM_SAMPLE_COLUMN] = sample['stratum_take']
+        sample[sampling.STRATUM_SIZE_COLUMN] = sample['stratum_rows']
+        return sample.drop(columns=['stratum', 'stratum_rows', 'stratum_rank', 'stratum_take'])
+
+
+class SQLiteQuery:
+    """一个筛选条件下的SQL查询"""
+
+    def __init__(self, backend, selection):
+        self.backend = backend
+        self.selection = selection
+        self.where, self.params = filter_clause(selection)
+        self._kept = {}
+        self._scoring = None
+
+    def summary(self):
+        with self.backend.connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0]
+            where, params = filter_clause(self.selection, ds_only=False)
+            filtered_total = conn.execute(f"SELECT COUNT(*) FROM {TABLE} WHERE {where}", params).fetchone()[0]
+            filtered_ds = conn.execute(f"SELECT COUNT(*) FROM {TABLE} WHERE {self.where}",
+                                       self.params).fetchone()[0]
+        return {'total': total, 'filtered_total': filtered_total, 'filtered_ds': filtered_ds}
+
+    # -- 统计量
+
+    @staticmethod
+    def ordered(conn, expr, where, params, offset, limit=2):
+        """expr 升序排列后从 offset 起的 limit 个值"""
+        rows = conn.execute(f"SELECT {expr} AS v FROM {TABLE} WHERE {where} ORDER BY v LIMIT ? OFFSET ?",
+                            params + [limit, offset]).fetchall()
+        return [row[0] for row in rows]
+
+    def quantile(self, conn, expr, where, params, count, q, grouped=False):
+        """线性插值分位数：全体同 Series.quantile（numpy），分组同 groupby().quantile"""
+        if count == 0:
+            return np.nan
+        if grouped:
+            position = q * (count - 1)
+        else:
+            position = count * q + (1 - q) - 1
+        lower = math.floor(position)
+        fraction = position - lower
+        values = self.ordered(conn, expr, where, params, lower)
+        a, b = values[0], values[-1]
+        if grouped:
+            return a + (b - a) * fraction
+        return numpy_lerp(a, b, fraction)
+
+    def median(self, conn, expr, where, params, count):
+        """中位数：偶数个值时取中间两个值的平均"""
+        if count == 0:
+            return np.nan
+        values = self.ordered(conn, expr, where, params, (count - 1) // 2)
+        return values[0] if count % 2 else (values[0] + values[1]) / 2
+
+    def moments(self, conn, expr, where, params):
+        """记录数、合计、均值、样本标准差、最小值、最大值"""
+        count, total, mean, low, high = conn.execute(
+            f"SELECT COUNT({expr}), SUM({expr}), AVG({expr}), MIN({expr}), MAX({expr}) FROM {TABLE} WHERE {where}",
+            params).fetchone()
+        std = np.nan
+        if count > 1:
+            squares = conn.execute(f"SELECT SUM(({expr} - ?) * ({expr} - ?)) FROM {TABLE} WHERE {where}",
+                                   [mean, mean] + params).fetchone()[0]
+            std = math.sqrt(squares / (count - 1))
+        nan = np.nan
+        return {'count': count, 'total': total if count else 0, 'mean': nan if mean is None else mean, 'std': std,
+                'min': nan if low is None else low, 'max': nan if high is None else high}
+
+    def keep_condition(self, conn, column, where, params, method, multiplier, grouped=False):
+        """异常值检测的保留条件（SQL表达式及参数），规则同 outlier_engine.keep_mask；where 为有效值条件"""
+        value = quote(column)
+        count, mean = conn.execute(f"SELECT COUNT({value}), AVG({value}) FROM {TABLE} WHERE {where}",
+                                   params).fetchone()
+        if method == 'iqr':
+            if count == 0:
+                return '0', []
+            q1 = self.quantile(conn, value, where, params, count, 0.25, grouped)
+            q3 = self.quantile(conn, value, where, params, count, 0.75, grouped)
+            iqr = q3 - q1
+            return f"({value} >= ? AND {value} <= ?)", [q1 - multiplier * iqr, q3 + multiplier * iqr]
+        if method == 'zscore':
+            std = self.moments(conn, value, where, params)['std'] if count > 1 else np.nan
+            if not std > 0:
+                return '1', []
+            return f"(abs({value} - ?) / ? < ?)", [mean, std, multiplier]
+        if method == 'mad':
+            if count == 0:
+                return '1', []
+            median = self.median(conn, value, where, params, count)
+            deviation = f"abs({value} - {literal(median)})"
+            mad = self.median(conn, deviation, where, params, count)
+            mean_ad = conn.execute(f"SELECT AVG({deviation}) FROM {TABLE} WHERE {where}", params).fetchone()[0]
+            spread = outlier_engine.MAD_SCALE * mad if mad > 0 else outlier_engine.MEAN_AD_SCALE * mean_ad
+            if not spread > 0:
+                return '1', []
+            return f"(abs({value} - ?) <= ?)", [median, multiplier * spread]
+        return '1', []
+
+    def outlier_condition(self, conn, column, valid, params):
+        """按筛选条件的异常值设置生成保留条件；按行业分组检测时每个行业一组条件"""
+        if not self.selection['remove_outliers']:
+            return '1', []
+        method = self.selection['outlier_method']
+        multiplier = self.selection['outlier_multiplier']
+        if not self.selection['outlier_grouped']:
+            return self.keep_condition(conn, column, valid, params, method, multiplier)
+
+        industries = [row[0] for row in conn.execute(
+            f"SELECT DISTINCT \"行业\" FROM {TABLE} WHERE {valid} AND \"行业\" IS NOT NULL", params)]
+        clauses, clause_params = [], []
+        for industry in industries:
+            condition, condition_params = self.keep_condition(
+                conn, column, f"{valid} AND \"行业\" = ?", params + [industry], method, multiplier, grouped=True)
+            clauses.append(f"(\"行业\" = ? AND {condition})")
+            clause_params += [industry] + condition_params
+        # 行业缺失的行不参与分组统计（统计量为缺失）：IQR剔除，Z-score、MAD保留
+        if method != 'iqr':
+            clauses.append("\"行业\" IS NULL")
+        return f"({' OR '.join(clauses) or '0'})", clause_params
+
+    def kept(self, conn, view):
+        """视图参与统计的行（有效值且未被异常值检测剔除）的条件和参数；每个视图只生成一次"""
+        if view not in self._kept:
+            column = VIEW_MEASURES[view][0]
+            valid = f"{self.where} AND {quote(column)} > 0"
+            condition, condition_params = self.outlier_condition(conn, column, valid, self.params)
+            self._kept[view] = (f"{valid} AND {condition}", self.params + condition_params)
+        return self._kept[view]
+
+    def measure(self, view):
+        """视图（salary、jobs、ratio）的 (统计指标, 各行业汇总)；没有有效数据时返回None"""
+        column, names, aggs, sort_by = VIEW_MEASURES[view]
+        value = quote(column)
+        with self.backend.connect() as conn:
+            where, params = self.kept(conn, view)
+            stats = self.moments(conn, value, where, params)
+            if stats['count'] == 0:
+                return None
+            stats['median'] = self.median(conn, value, where, params, stats['count'])
+
+            industry = pd.read_sql_query(
+                f"SELECT \"行业\", AVG({value}) AS mean, SUM({value}) AS sum, COUNT({value}) AS count "
+                f"FROM {TABLE} WHERE {where} AND \"行业\" IS NOT NULL GROUP BY \"行业\" ORDER BY \"行业\"",
+                conn, params=params)
+        industry = industry[['行业'] + aggs]
+        industry = industry[industry['count'] >= 3].sort_values(sort_by, ascending=False)
+        return {name: stats[stat] for name, stat in names.items()}, industry
+
+    # -- 分布图的数据（只取回分箱、箱线统计量和有限个点）
+
+    def histogram(self, view, bins=HISTOGRAM_BINS):
+        """视图统计列的等宽直方图：列为 [统计列（箱中点）, 'count']，含空箱；没有有效数据时返回None"""
+        column = VIEW_MEASURES[view][0]
+        value = quote(column)
+        with self.backend.connect() as conn:
+            where, params = self.kept(conn, view)
+            count, low, high = conn.execute(
+                f"SELECT COUNT({value}), MIN({value}), MAX({value}) FROM {TABLE} WHERE {where}", params).fetchone()
+            if count == 0:
+                return None
+            if not high > low:
+                return pd.DataFrame({column: [low], 'count': [count]})
+            # 箱的边界同 numpy.histogram（左闭右开，最后一箱右闭）：一次扫描统计小于各内部边界的行数
+            edges = np.linspace(low, high, bins + 1)
+            below = ', '.join(f"COUNT(CASE WHEN {value} < ? THEN 1 END)" for _ in edges[1:-1])
+            cumulative = conn.execute(f"SELECT {below} FROM {TABLE} WHERE {where}",
+                                      edges[1:-1].tolist() + params).fetchone()
+        counts = np.diff([0, *cumulative, count])
+        return pd.DataFrame({column: (edges[:-1] + edges[1:]) / 2, 'count': counts})
+
+    def box(self, view):
+        """视图统计列的箱线统计量：四分位数、中位数及上下须端点（1.5倍四分位距内的最值）；没有有效数据时返回None"""
+        value = quote(VIEW_MEASURES[view][0])
+        with self.backend.connect() as conn:
+            where, params = self.kept(conn, view)
+            count = conn.execute(f"SELECT COUNT({value}) FROM {TABLE} WHERE {where}", params).fetchone()[0]
+            if count == 0:
+                return None
+            q1, median, q3 = (self.quantile(conn, value, where, params, count, q) for q in (0.25, 0.5, 0.75))
+            iqr = q3 - q1
+            lower, upper = conn.execute(
+                f"SELECT MIN(CASE WHEN {value} >= ? THEN {value} END), MAX(CASE WHEN {value} <= ? THEN {value} END) "
+                f"FROM {TABLE} WHERE {where}", [q1 - 1.5 * iqr, q3 + 1.5 * iqr] + params).fetchone()
+        return {'q1': q1, 'median': median, 'q3': q3, 'lowerfence': lower, 'upperfence': upper}
+
+    def points(self, view, columns, limit=SCATTER_MAX_POINTS):
+        """视图参与统计的行中至多 limit 行的指定列（按行号哈希打散后取前 limit 行，散点图用），行索引为原始行号"""
+        order, order_params = sample_order(0)
+        select = ', '.join(quote(col) for col in [ROW_ID_COLUMN] + list(columns))
+        with self.backend.connect() as conn:
+            where, params = self.kept(conn, view)
+            df = pd.read_sql_query(f"SELECT {select} FROM {TABLE} WHERE {where} ORDER BY {order} LIMIT ?",
+                                   conn, params=params + order_params + [limit], index_col=ROW_ID_COLUMN)
+        df.index.name = None
+        return df.sort_index()
+
+    # -- 企业评分
+
+    def scoring(self, conn):
+        """评分的公用表表达式（board：各行的评分、综合评分、总排名和行业排名）及参数，评分公式同看板
+
+        返回 (CTE, 参数, 可评分的行数, 错误信息)；分位数等阈值只计算一次。
+        """
+        if self._scoring is not None:
+            return self._scoring
+        valid = (f"{self.where} AND \"平均年收入\" > 0 AND \"在职人数\" > 0 AND \"员工人数\" > 0 "
+                 f"AND \"平均在职天数\" > 0 AND {quote(RATIO_COLUMN)} <= 50")
+        params = self.params
+        if conn.execute(f"SELECT COUNT(*) FROM {TABLE} WHERE {self.where}", params).fetchone()[0] == 0:
+            self._scoring = (None, None, 0, "没有有效数据")
+            return self._scoring
+        count, salary_min, team_min, days_min, size_max, ratio_max = conn.execute(
+            f"SELECT COUNT(*), MIN(\"平均年收入\"), MIN(\"在职人数\"), MIN(\"平均在职天数\"), MAX(\"员工人数\"), "
+            f"MAX({quote(RATIO_COLUMN)}) FROM {TABLE} WHERE {valid}", params).fetchone()
+        if count == 0:
+            self._scoring = (None, None, 0, "没有有效的评分数据")
+            return self._scoring
+
+        def quartiles(column):
+            return [self.quantile(conn, quote(column), valid, params, count, q) for q in (0.75, 0.25)]
+
+        salary_75, salary_25 = quartiles('平均年收入')
+        team_75, team_25 = quartiles('在职人数')
+        days_75, days_25 = quartiles('平均在职天数')
+
+        def tiered(column, high, low, minimum, top, middle, middle_span, bottom, bottom_span):
+            # 高于75分位得满分，25~75分位线性插值，低于25分位按与最小值的距离插值
+            high, low, minimum = literal(high), literal(low), literal(minimum)
+            return (f"CASE WHEN {column} >= {high} THEN {literal(top)} "
+                    f"WHEN {column} >= {low} THEN {middle} + ({column} - {low}) / ({high} - {low}) * {middle_span} "
+                    f"ELSE {bottom} + ({column} - {minimum}) / ({low} - {minimum}) * {bottom_span} END")
+
+        size = '"员工人数"'
+        ratio = quote(RATIO_COLUMN)
+        head_tail = ' '.join(f"WHEN '{label}' THEN {score}" for label, score in HEAD_TAIL_SCORES.items())
+        scores = {
+            '薪资评分': tiered('"平均年收入"', salary_75, salary_25, salary_min, 25, 15, 10, 5, 10),
+            '规模评分': (f"MIN(MAX(CASE WHEN {size} >= 1000 AND {size} <= 10000 THEN 20.0 "
+                     f"WHEN {size} > 10000 THEN 15 + 5 * (1 - ({size} - 10000) / ({literal(size_max)} - 10000)) "
+                     f"ELSE 10 + 10 * ({size} / 1000) END, 0.0), 20.0)"),
+            '头腰尾评分': f"CASE \"头腰尾\" {head_tail} ELSE 7.5 END",
+            'DS团队评分': tiered('"在职人数"', team_75, team_25, team_min, 15, 8, 7, 3, 5),
+            '占比评分': (f"MIN(MAX(CASE WHEN {ratio} >= 2 AND {ratio} <= 8 THEN 10.0 "
+                     f"WHEN {ratio} > 8 THEN 8 + 2 * (1 - ({ratio} - 8) / ({literal(ratio_max)} - 8)) "
+                     f"ELSE 5 + 5 * ({ratio} / 2) END, 0.0), 10.0)"),
+            '稳定性评分': tiered('"平均在职天数"', days_75, days_25, days_min, 15, 8, 7, 3, 5)
+        }
+        source = ', '.join(map(quote, [ROW_ID_COLUMN] + SCORE_SOURCE_COLUMNS + [RATIO_COLUMN]))
+        score_list = ', '.join(f"{expr} AS {quote(name)}" for name, expr in scores.items())
+        total = ' + '.join(map(quote, SCORE_COLUMNS))
+        ctes = f"""
+            scored AS (
+                SELECT {source}, {score_list} FROM {TABLE} WHERE {valid}
+            ), ranked AS (
+                SELECT *, {total} AS "综合评分" FROM scored
+            ), board AS (
+                SELECT *,
+                    ROW_NUMBER() OVER (ORDER BY "综合评分" DESC, {quote(ROW_ID_COLUMN)}) AS "总排名",
+                    DENSE_RANK() OVER (PARTITION BY "行业" ORDER BY "综合评分" DESC) AS "行业排名"
+                FROM ranked
+            )
+        """
+        self._scoring = (ctes, params, count, None)
+        return self._scoring
+
+    def top_companies(self, top_n, industry=None, industry_top=None):
+        """评分前 top_n 名企业（列同看板的评分结果），返回 (DataFrame, 错误信息)
+
+        industry 只取该行业的企业，industry_top 只取行业排名不超过该名次的企业；总排名、行业排名均为全部企业中的名次。
+        """
+        with self.backend.connect() as conn:
+            ctes, params, _, error = self.scoring(conn)
+            if error:
+                return None, error
+            conditions, condition_params = ['1'], []
+            if industry is not None:
+                conditions.append('"行业" = ?')
+                condition_params.append(industry)
+            if industry_top is not None:
+                conditions.append('"行业排名" <= ?')
+                condition_params.append(industry_top)
+            df = pd.read_sql_query(
+                f"WITH {ctes} SELECT * FROM board WHERE {' AND '.join(conditions)} ORDER BY \"总排名\" LIMIT ?",
+                conn, params=params + condition_params + [top_n], index_col=ROW_ID_COLUMN)
+        df.index.name = None
+        return df, None
+
+    def score_summary(self):
+        """可评分的企业数及各行业的平均综合评分（列 [行业, mean, count]，按行业升序），返回 (摘要, 错误信息)"""
+        with self.backend.connect() as conn:
+            ctes, params, count, error = self.scoring(conn)
+            if error:
+                return None, error
+            industries = pd.read_sql_query(
+                f"WITH {ctes} SELECT \"行业\", AVG(\"综合评分\") AS mean, COUNT(*) AS count FROM board "
+                f"WHERE \"行业\" IS NOT NULL GROUP BY \"行业\" ORDER BY \"行业\"", conn, params=params)
+        return {'count': count, 'industries': industries}, None
+
+    def scores(self):
+        """全部可评分行的综合评分（列 ['综合评分']，行索引为原始行号）；没有可评分的数据时返回None"""
+        with self.backend.connect() as conn:
+            ctes, params, _, error = self.scoring(conn)
+            if error:
+                return None
+            df = pd.read_sql_query(
+                f"WITH {ctes} SELECT {quote(ROW_ID_COLUMN)}, \"综合评分\" FROM board ORDER BY {quote(ROW_ID_COLUMN)}",
+                conn, params=params, index_col=ROW_ID_COLUMN)
+        df.index.name = None
+        return df
+
+
+def create_backend(dashboard):
+    """按 config.DATA_LAYOUT 选择查询后端"""
+    if config.DATA_LAYOUT == 'sqlite':
+        return SQLiteBackend()
+    return PandasBackend(dashboard)
+
+
+def main():
+    """部署时构建SQLite数据库"""
+    print(f"已生成SQLite数据库: {ensure_database()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+排名稳定性分析：评分权重扰动下的蒙特卡洛排名分布
+
+综合评分是六个维度评分之和，各维度满分即 config.SCORE_WEIGHTS 中的权重。把各维度评分除以满分得到
+0~1 的评分分量后，综合评分 = 分量矩阵 × 权重向量。在基准权重附近抽取大量权重向量
+（各权重乘以对数正态扰动后归一化为总分100），一次矩阵乘法（分量 × 权重样本）即可得到全部样本下的评分。
+
+只有可能进入前 depth 名的企业才需要排序：在样本权重的取值范围内（各维度最小、最大值，总和固定）
+基准前 depth 名都一定比它得分高的企业，在任何样本下都排不进前 depth 名，直接跳过；余下的企业再按各样本下
+基准前 depth 名的最低分精筛。候选池内的排名在 depth 名以内是精确的，depth 名以外记为 depth + 1。
+权重样本分批计算，控制评分矩阵的内存占用。
+"""
+import numpy as np
+import pandas as pd
+
+import config
+
+SCORE_COLUMNS = list(config.SCORE_WEIGHTS)
+
+# 每批评分矩阵的元素数上限
+CHUNK_ELEMENTS = 8_000_000
+
+
+def base_weights():
+    """基准权重（各维度满分）"""
+    return np.array([config.SCORE_WEIGHTS[col] for col in SCORE_COLUMNS], dtype=float)
+
+
+def sample_weights(n_samples, spread=0.2, seed=0):
+    """在基准权重附近抽取权重样本（维度数 × 样本数），每个样本的权重和与基准相同"""
+    base = base_weights()
+    rng = np.random.default_rng(seed)
+    weights = base[:, None] * np.exp(rng.normal(0.0, spread, (len(base), n_samples)))
+    return weights / weights.sum(axis=0) * base.sum()
+
+
+def component_matrix(df_scored):
+    """各企业的评分分量（企业数 × 维度数），分量 × 基准权重 = 综合评分"""
+    return np.nan_to_num(df_scored[SCORE_COLUMNS].to_numpy(dtype=float)) / base_weights()
+
+
+def max_gain(diff, w_min, w_max, total):
+    """权重满足 w_min ≤ w ≤ w_max、Σw = total 时 diff·w 的最大值（每行一个）
+
+    先取各维度下限，余量按 diff 从大到小依次分配到各维度上限。
+    """
+    order = np.argsort(-diff, axis=1)
+    room = (w_max - w_min)[order]
+    spare = total - w_min.sum()
+    extra = np.clip(spare - (np.cumsum(room, axis=1) - room), 0, room)
+    return diff @ w_min + (np.take_along_axis(diff, order, axis=1) * extra).sum(axis=1)
+
+
+def candidate_pool(components, weights, depth):
+    """可能在某个权重样本下进入前 depth 名的企业（行号数组，升序）
+
+    粗筛：在全部样本权重的取值范围内，基准前 depth 名都一定比它得分高的企业排除；
+    精筛：逐个样本，基准前 depth 名在该样本下的最低分不高于该样本的真实第 depth 名，得分低于它的企业排除。
+    """
+    if len(components) <= depth:
+        return np.arange(len(components))
+    w_min = weights.min(axis=1)
+    w_max = weights.max(axis=1)
+    total = weights[:, 0].sum()
+    beaten = np.ones(len(components), dtype=bool)
+    for leader in components[:depth]:
+        rows = np.flatnonzero(beaten)
+        if len(rows) == 0:
+            break
+        beaten[rows[max_gain(components[rows] - leader, w_min, w_max, total) >= 0]] = False
+    pool = np.flatnonzero(~beaten)
+
+    thresholds = (components[:depth] @ weights).min(axis=0)
+    candidates = components[pool]
+    keep = np.zeros(len(pool), dtype=bool)
+    chunk = max(1, CHUNK_ELEMENTS // len(pool))
+    for start in range(0, weights.shape[1], chunk):
+        scores = candidates @ weights[:, start:start + chunk]
+        keep |= (scores >= thresholds[start:start + chunk]).any(axis=1)
+    return pool[keep]
+
+
+def sample_ranks(components, weights, depth):
+    """各企业在每个权重样本下的排名（企业数 × 样本数），超过 depth 名的记为 depth + 1
+
+    行顺序即基准排名顺序，评分相同时按行顺序排名。
+    """
+    n_rows, n_samples = len(components), weights.shape[1]
+    ranks = np.empty((n_rows, n_samples), dtype=np.int32)
+    chunk = max(1, CHUNK_ELEMENTS // max(n_rows, 1))
+    positions = np.arange(1, n_rows + 1, dtype=np.int32)[:, None]
+    for start in range(0, n_samples, chunk):
+        scores = components @ weights[:, start:start + chunk]
+        order = np.argsort(-scores, axis=0, kind='stable')
+        chunk_ranks = np.empty(order.shape, dtype=np.int32)
+        np.put_along_axis(chunk_ranks, order, np.broadcast_to(positions, order.shape), axis=0)
+        ranks[:, start:start + chunk] = np.minimum(chunk_ranks, depth + 1)
+    return ranks
+
+
+def kendall_tau(components, weights):
+    """各权重样本下的排序与基准排序（行顺序）之间的Kendall tau（长度为样本数的数组）"""
+    n_rows, n_samples = len(components), weights.shape[1]
+    if n_rows < 2:
+        return np.ones(n_samples)
+    first, second = np.triu_indices(n_rows, 1)
+    taus = np.empty(n_samples)
+    chunk = max(1, CHUNK_ELEMENTS // len(first))
+    for start in range(0, n_samples, chunk):
+        scores = components @ weights[:, start:start + chunk]
+        taus[start:start + chunk] = np.sign(scores[first] - scores[second]).sum(axis=0) / len(first)
+    return taus
+
+
+def analyze(df_scored, top_n=20, n_samples=5000, spread=0.2, seed=0, depth=None):
+    """排名稳定性分析
+
+    df_scored 为按综合评分降序排列的评分结果。返回：
+    - companies：可能进入前 depth 名的企业的基准排名、进入前 top_n 名的概率及排名分布（中位数、5%/95%分位、最好/最差）
+    - industries：各行业榜单（行业内前 top_n 名）的Kendall tau均值、5%分位及榜首保持概率
+    - overall_tau：总榜前 top_n 名的Kendall tau均值和5%分位
+    """
+    depth = depth or 3 * top_n
+    components = component_matrix(df_scored)
+    weights = sample_weights(n_samples, spread, seed)
+
+    pool = candidate_pool(components, weights, depth)
+    ranks = sample_ranks(components[pool], weights, depth)
+    pool_df = df_scored.iloc[pool]
+    companies = pd.DataFrame({
+        '公司名称': pool_df['公司名称'].to_numpy(),
+        '行业': pool_df['行业'].to_numpy(),
+        '基准排名': pool_df['总排名'].to_numpy(),
+        f'前{top_n}名概率': (ranks <= top_n).mean(axis=1),
+        '排名中位数': np.median(ranks, axis=1),
+        '排名5%分位': np.percentile(ranks, 5, axis=1),
+        '排名95%分位': np.percentile(ranks, 95, axis=1),
+        '最好排名': ranks.min(axis=1),
+        '最差排名': ranks.max(axis=1)
+    }, index=pool_df.index)
+    companies = companies.sort_values([f'前{top_n}名概率', '基准排名'], ascending=[False, True])
+
+    industry_rows = []
+    industries = df_scored['行业'].to_numpy()
+    for industry in pd.unique(industries):
+        rows = np.flatnonzero(industries == industry)
+        taus = kendall_tau(components[rows[:top_n]], weights)
+        # 行业榜首：只有可能排到行业第1的企业参与比较
+        leaders = candidate_pool(components[rows], weights, 1)
+        leader_kept = (leaders[sample_ranks(components[rows[leaders]], weights, 1).argmin(axis=0)] == 0)
+        industry_rows.append({
+            '行业': industry,
+            '榜单企业数': min(len(rows), top_n),
+            'Kendall tau均值': taus.mean(),
+            'Kendall tau 5%分位': np.percentile(taus, 5),
+            '榜首保持概率': leader_kept.mean()
+        })
+    industry_df = pd.DataFrame(industry_rows).sort_values('Kendall tau均值', ascending=False)
+
+    overall = kendall_tau(components[:top_n], weights)
+    return {
+        'companies': companies,
+        'industries': industry_df,
+        'overall_tau': (overall.mean(), np.percentile(overall, 5)),
+        'depth': depth,
+        'pool_size': len(pool)
+    }
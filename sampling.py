@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+近似模式：分层抽样及带置信区间的加权估计
+
+按 行业 × 城市 × 头腰尾 分层，每层按比例抽取（每层至少 APPROX_MIN_PER_STRATUM 行），抽样结果连同抽样权重
+（层总行数 / 层样本数）写入Arrow IPC文件，随数据集版本失效。侧边栏的筛选条件正好是分层变量的取值，
+筛选后各层权重仍然有效；岗位关键词、异常值等层内筛选按域估计处理。
+
+统计量均为加权估计，95%置信区间按分层抽样的泰勒线性化方差计算（含有限总体校正），
+中位数的置信区间用Woodruff方法由比例的置信区间反推。样本大小固定，交互延迟不随数据量增长。
+"""
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+import column_store
+import config
+
+STRATA_COLUMNS = ['行业', '城市', '头腰尾']
+ROW_ID_COLUMN = '_row_id'
+WEIGHT_COLUMN = '_weight'
+STRATUM_COLUMN = '_stratum'
+STRATUM_SAMPLE_COLUMN = '_stratum_n'
+STRATUM_SIZE_COLUMN = '_stratum_N'
+
+Z_95 = 1.959964
+
+
+def sample_source(draw=None):
+    """样本来源标记：在数据源内抽样（draw）与从列式存储抽样的随机序列不同，样本分开存放"""
+    return 'store' if draw is None else 'db'
+
+
+def sample_path(path=config.DATA_FILE, draw=None):
+    """当前数据集版本、样本来源和抽样参数对应的样本文件"""
+    params = f"{config.APPROX_SAMPLE_SIZE}-{config.APPROX_MIN_PER_STRATUM}-{config.APPROX_SEED}"
+    name = f"{column_store.source_name(path)}-{column_store.storage_tag(path)}-{sample_source(draw)}-{params}.arrow"
+    return os.path.join(config.SAMPLE_DIR, name)
+
+
+def draw_sample(df, sample_size, min_per_stratum=2, seed=0):
+    """分层抽样，返回样本行（行索引保持不变）及权重、层编号、层样本数、层总行数"""
+    strata = df.groupby(STRATA_COLUMNS, dropna=False, sort=False).ngroup().to_numpy()
+    sizes = np.bincount(strata)
+    rate = min(1.0, sample_size / max(len(df), 1))
+    takes = np.minimum(sizes, np.maximum(min_per_stratum, np.round(sizes * rate))).astype(np.int64)
+
+    # 层内随机排序后取前 n_h 行
+    rng = np.random.default_rng(seed)
+    order = np.lexsort((rng.random(len(df)), strata))
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    rank = np.arange(len(df)) - starts[strata[order]]
+    chosen = np.sort(order[rank < takes[strata[order]]])
+
+    sample = df.iloc[chosen].copy()
+    codes = strata[chosen]
+    sample[WEIGHT_COLUMN] = sizes[codes] / takes[codes]
+    sample[STRATUM_COLUMN] = codes
+    sample[STRATUM_SAMPLE_COLUMN] = takes[codes]
+    sample[STRATUM_SIZE_COLUMN] = sizes[codes]
+    return sample
+
+
+def sample_rows(columns, path=config.DATA_FILE, draw=None):
+    """按配置的抽样参数抽样；draw 为在数据源内抽样的函数（如SQLite后端），None 时从列式存储读取后抽样"""
+    if draw is not None:
+        return draw(columns, config.APPROX_SAMPLE_SIZE, config.APPROX_MIN_PER_STRATUM, config.APPROX_SEED)
+    df = column_store.read_columns(columns, path)
+    return draw_sample(df, config.APPROX_SAMPLE_SIZE, config.APPROX_MIN_PER_STRATUM, config.APPROX_SEED)
+
+
+def build_sample(columns, path=config.DATA_FILE, draw=None):
+    """抽样并写入样本文件，同时清理同一来源的旧版本文件"""
+    sample = sample_rows(columns, path, draw)
+    sample.insert(0, ROW_ID_COLUMN, sample.index.to_numpy(dtype=np.int64))
+    table = column_store.to_arrow_table(sample.reset_index(drop=True))
+
+    target = sample_path(path, draw)
+    os.makedirs(config.SAMPLE_DIR, exist_ok=True)
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    with ipc.new_file(tmp_path, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, target)
+
+    # 只清理同一数据文件、同一来源的旧样本，另一种数据布局的样本保留
+    pattern = f"{column_store.source_pattern(path)}-v*-{sample_source(draw)}-*.arrow"
+    for old_path in glob.glob(os.path.join(config.SAMPLE_DIR, pattern)):
+        if old_path != target:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+    return target
+
+
+def load_sample(columns, path=config.DATA_FILE, draw=None):
+    """读取样本（不存在或缺少所需列时先构建，draw 见 sample_rows），行索引为原始行号"""
+    target = sample_path(path, draw)
+    table = None
+    if os.path.exists(target):
+        table = ipc.open_file(pa.memory_map(target, 'r')).read_all()
+        if any(col not in table.schema.names for col in columns):
+            table = None
+    if table is None:
+        try:
+            target = build_sample(columns, path, draw)
+        except OSError:
+            # 缓存目录不可写时在内存中抽样
+            return sample_rows(columns, path, draw)
+        table = ipc.open_file(pa.memory_map(target, 'r')).read_all()
+
+    df = column_store.arrow_to_pandas(table).set_index(ROW_ID_COLUMN)
+    df.index.name = None
+    return df
+
+
+def is_sample(df):
+    """是否为带抽样权重的样本数据"""
+    return WEIGHT_COLUMN in df.columns
+
+
+def total_variance(df, x):
+    """分层抽样下 Σx 的方差估计；x 为域内各行的加权线性化值，同层中不在域内的样本行视为0"""
+    strata = df[STRATUM_COLUMN].to_numpy()
+    x = np.nan_to_num(np.asarray(x, dtype=float))
+    sum_x = np.bincount(strata, weights=x)
+    sum_x2 = np.bincount(strata, weights=x * x)
+    present = np.unique(strata)
+
+    n = np.zeros(len(sum_x))
+    big_n = np.zeros(len(sum_x))
+    n[strata] = df[STRATUM_SAMPLE_COLUMN].to_numpy()
+    big_n[strata] = df[STRATUM_SIZE_COLUMN].to_numpy()
+
+    n, big_n, sum_x, sum_x2 = n[present], big_n[present], sum_x[present], sum_x2[present]
+    usable = n > 1
+    # 浮点误差可能使离差平方和略小于0
+    squares = np.maximum(sum_x2[usable] - sum_x[usable] ** 2 / n[usable], 0)
+    fpc = 1 - n[usable] / big_n[usable]
+    return float(np.sum(fpc * n[usable] / (n[usable] - 1) * squares))
+
+
+def weighted_quantile(values, weights, q):
+    """加权分位数"""
+    order = np.argsort(values, kind='stable')
+    values, weights = values[order], weights[order]
+    cumulative = np.cumsum(weights)
+    if len(cumulative) == 0 or cumulative[-1] <= 0:
+        return float('nan')
+    position = np.searchsorted(cumulative, q * cumulative[-1])
+    return float(values[min(position, len(values) - 1)])
+
+
+def estimate_stats(df, column):
+    """加权估计：记录数、总和、均值、中位数、标准差，及记录数、总和、均值、中位数的95%置信区间
+
+    最小值、最大值取样本中的值（无法从样本估计，不给置信区间）。
+    """
+    values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+    weights = df[WEIGHT_COLUMN].to_numpy(dtype=float)
+    count = weights.sum()
+    if count <= 0:
+        return None
+
+    total = float(np.sum(weights * values))
+    mean = total / count
+    median = weighted_quantile(values, weights, 0.5)
+
+    count_se = np.sqrt(total_variance(df, weights))
+    total_se = np.sqrt(total_variance(df, weights * values))
+    mean_se = np.sqrt(total_variance(df, weights * (values - mean) / count))
+    # Woodruff：中位数处比例的标准误换算为分位数区间
+    proportion_se = np.sqrt(total_variance(df, weights * ((values <= median) - 0.5) / count))
+
+    return {
+        'count': int(round(count)),
+        'total': total,
+        'mean': mean,
+        'median': median,
+        # 总体方差的无偏估计（权重为总体行数的估计，同精确计算的样本标准差 ddof=1）
+        'std': float(np.sqrt(np.sum(weights * (values - mean) ** 2) / (count - 1))) if count > 1 else float('nan'),
+        'min': float(values.min()),
+        'max': float(values.max()),
+        'ci': {
+            'count': (int(round(count - Z_95 * count_se)), int(round(count + Z_95 * count_se))),
+            'total': (float(total - Z_95 * total_se), float(total + Z_95 * total_se)),
+            'mean': (float(mean - Z_95 * mean_se), float(mean + Z_95 * mean_se)),
+            'median': (weighted_quantile(values, weights, max(0.0, 0.5 - Z_95 * proportion_se)),
+                       weighted_quantile(values, weights, min(1.0, 0.5 + Z_95 * proportion_se)))
+        }
+    }
+
+
+def estimate_count(df):
+    """域内记录数的加权估计及95%置信区间"""
+    weights = df[WEIGHT_COLUMN].to_numpy(dtype=float)
+    count = weights.sum()
+    se = np.sqrt(total_variance(df, weights)) if len(df) else 0.0
+    return int(round(count)), (int(round(count - Z_95 * se)), int(round(count + Z_95 * se)))
+
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+相似企业：在评分特征空间中检索最近邻企业
+
+特征为企业评分所用的薪资、员工人数、在职人数、DS占比、平均在职天数和头腰尾。前五项右偏明显，取对数后标准化，
+头腰尾取其评分后标准化，各特征权重相同。每个筛选条件构建一次KD树（全部企业一棵，各行业各一棵），
+之后每次查询只访问树上的少量节点，不做全量两两距离计算。
+
+评分结果按岗位记录计行，同一公司可能有多行：检索结果排除所选公司自身，同一公司只保留距离最近的一行。
+公司名称缺失的行无法判断归属，各自算作一家公司。
+"""
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+LOG_FEATURES = ['平均年收入', '员工人数', '在职人数', 'DS占比', '平均在职天数']
+TIER_FEATURE = '头腰尾评分'
+FEATURE_COLUMNS = LOG_FEATURES + [TIER_FEATURE]
+
+
+def feature_matrix(df_scored):
+    """标准化后的特征矩阵（行数 × 特征数）；取值相同的特征列标准化为0"""
+    features = np.column_stack(
+        [np.log1p(df_scored[col].to_numpy(dtype=float)) for col in LOG_FEATURES]
+        + [df_scored[TIER_FEATURE].to_numpy(dtype=float)]
+    )
+    features = np.nan_to_num(features)
+    std = features.std(axis=0)
+    return (features - features.mean(axis=0)) / np.where(std > 0, std, 1.0)
+
+
+def build_index(df_scored):
+    """构建相似企业索引：全部企业的KD树、各行业的KD树（行业编码 -> (树, 行号数组)）及行索引到行号的映射"""
+    features = feature_matrix(df_scored)
+    # 行业缺失的行归为同一组
+    industries, _ = pd.factorize(df_scored['行业'], use_na_sentinel=False)
+    industry_trees = {}
+    for code in range(industries.max() + 1 if len(industries) else 0):
+        rows = np.flatnonzero(industries == code)
+        industry_trees[code] = (cKDTree(features[rows]), rows)
+    row_ids = df_scored.index.to_numpy()
+    return {
+        'features': features,
+        'tree': cKDTree(features),
+        'industry_trees': industry_trees,
+        'row_ids': row_ids,
+        'positions': pd.Series(np.arange(len(row_ids)), index=row_ids),
+        'names': df_scored['公司名称'].to_numpy(),
+        'industries': industries
+    }
+
+
+def query(index, row_id, k=10, same_industry=False):
+    """与 row_id（评分结果的行索引）最相似的 k 家企业，返回 (行索引数组, 距离数组)，按距离升序
+
+    所选公司自身的各行不计入，同一公司只保留最近的一行；候选不足时逐步扩大检索范围。
+    row_id 不在索引中时抛出 KeyError。
+    """
+    if row_id not in index['positions'].index:
+        raise KeyError(f"评分结果中没有行 {row_id!r}")
+    position = int(index['positions'][row_id])
+    name = index['names'][position]
+    if same_industry:
+        tree, rows = index['industry_trees'][index['industries'][position]]
+    else:
+        tree, rows = index['tree'], np.arange(len(index['row_ids']))
+
+    point = index['features'][position]
+    n_query = min(len(rows), k * 2 + 1)
+    while True:
+        distances, found = tree.query(point, k=n_query)
+        distances, found = np.atleast_1d(distances), rows[np.atleast_1d(found)]
+        names = pd.Series(index['names'][found])
+        # 按距离升序，每家公司的第一行即其最近的一行；名称缺失的行不去重
+        first = np.flatnonzero((~names.duplicated() | names.isna()).to_numpy())
+        other = (found[first] != position) & (names != name).to_numpy()[first]
+        first = first[other][:k]
+        if len(first) >= k or n_query >= len(rows):
+            return index['row_ids'][found[first]], distances[first]
+        n_query = min(len(rows), n_query * 2)
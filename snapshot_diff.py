@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+版本对比：比较两次抓取的数据快照
+
+每个快照加载时为每行计算一次 公司名称+岗位 的64位键哈希。对比时先按键哈希汇总各快照（同一键的多行合并），
+再以键哈希为索引做哈希连接：对当前版本的每个键在基准版本的哈希表中查找一次，整体与两个快照的行数成线性关系，
+不逐行循环。两个版本分别用看板的企业评分计算排名，按键对齐后向量化计算薪资、DS团队规模、评分和排名的变化。
+"""
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+import config
+
+KEY_COLUMNS = ['公司名称', '岗位']
+HASH_COLUMN = '键哈希'
+SOURCE_COLUMNS = ['行业', '城市', '头腰尾', '公司名称', '岗位', '平均年收入', '在职人数', '员工人数', '平均在职天数']
+
+STATUS_KEPT = '持续'
+STATUS_NEW = '新进入'
+STATUS_EXITED = '退出'
+
+# 可按其查看变动最大企业的指标
+MOVER_METRICS = ['排名变化', '年收入变化', '在职人数变化', '评分变化']
+
+
+def snapshot_files():
+    """可对比的数据快照：快照目录下的CSV文件及当前数据文件，按文件名排序"""
+    files = sorted(glob.glob(os.path.join(config.SNAPSHOT_DIR, '*.csv')))
+    if os.path.exists(config.DATA_FILE) and os.path.abspath(config.DATA_FILE) not in map(os.path.abspath, files):
+        files.append(config.DATA_FILE)
+    return files
+
+
+def key_hashes(df):
+    """每行 公司名称+岗位 的64位哈希"""
+    return pd.util.hash_pandas_object(df[KEY_COLUMNS], index=False).to_numpy()
+
+
+def snapshot_table(df, df_scored):
+    """按键汇总一个快照：平均年收入取有效值的均值，在职人数求和，评分取最高分、排名取最好名次；索引为键哈希
+
+    df 为筛选后的数据分析师岗位（含键哈希列），df_scored 为其评分结果（可为 None）。
+    """
+    salary = pd.to_numeric(df['平均年收入'], errors='coerce')
+    frame = pd.DataFrame({
+        HASH_COLUMN: df[HASH_COLUMN],
+        '公司名称': df['公司名称'],
+        '岗位': df['岗位'],
+        '行业': df['行业'],
+        '平均年收入': salary.where(salary > 0),
+        '在职人数': pd.to_numeric(df['在职人数'], errors='coerce')
+    })
+    table = frame.groupby(HASH_COLUMN, sort=False).agg(
+        公司名称=('公司名称', 'first'),
+        岗位=('岗位', 'first'),
+        行业=('行业', 'first'),
+        平均年收入=('平均年收入', 'mean'),
+        在职人数=('在职人数', 'sum')
+    )
+    if df_scored is None:
+        table['综合评分'] = np.nan
+        table['总排名'] = np.nan
+        return table
+    scores = df_scored.groupby(HASH_COLUMN, sort=False).agg(综合评分=('综合评分', 'max'), 总排名=('总排名', 'min'))
+    return table.join(scores)
+
+
+def diff_snapshots(base, current):
+    """按键哈希连接两个快照汇总表，返回逐键的变化表：当前版本的全部键在前，已退出的键在后
+
+    排名变化 = 基准排名 - 当前排名（正数为名次上升），任一版本未参与评分时为缺失。
+    """
+    # 哈希连接：当前版本每个键在基准版本中的位置，-1 表示新进入
+    position = base.index.get_indexer(current.index)
+    matched = position >= 0
+    exited = np.ones(len(base), dtype=bool)
+    exited[position[matched]] = False
+    n_current, n_exited = len(current), int(exited.sum())
+
+    def before(column):
+        values = base[column].to_numpy(dtype=float)
+        aligned = np.full(n_current, np.nan)
+        aligned[matched] = values[position[matched]]
+        return np.concatenate([aligned, values[exited]])
+
+    def after(column):
+        return np.concatenate([current[column].to_numpy(dtype=float), np.full(n_exited, np.nan)])
+
+    def labels(column):
+        return np.concatenate([current[column].to_numpy(dtype=object), base[column].to_numpy(dtype=object)[exited]])
+
+    status = np.concatenate([np.where(matched, STATUS_KEPT, STATUS_NEW), np.full(n_exited, STATUS_EXITED)])
+    result = pd.DataFrame({
+        '公司名称': labels('公司名称'),
+        '岗位': labels('岗位'),
+        '行业': labels('行业'),
+        '状态': status,
+        '基准年收入': before('平均年收入'),
+        '当前年收入': after('平均年收入'),
+        '基准在职人数': before('在职人数'),
+        '当前在职人数': after('在职人数'),
+        '基准评分': before('综合评分'),
+        '当前评分': after('综合评分'),
+        '基准排名': before('总排名'),
+        '当前排名': after('总排名')
+    }, index=np.concatenate([current.index.to_numpy(), base.index.to_numpy()[exited]]))
+    result.index.name = HASH_COLUMN
+
+    result['年收入变化'] = result['当前年收入'] - result['基准年收入']
+    result['年收入变化率'] = result['年收入变化'] / result['基准年收入'] * 100
+    result['在职人数变化'] = result['当前在职人数'] - result['基准在职人数']
+    result['评分变化'] = result['当前评分'] - result['基准评分']
+    result['排名变化'] = result['基准排名'] - result['当前排名']
+    return result
+
+
+def summarize(diff):
+    """对比摘要：持续、新进入、退出的键数，持续键的年收入变化均值和中位数，在职人数合计的变化"""
+    counts = diff['状态'].value_counts()
+    kept = diff[diff['状态'] == STATUS_KEPT]
+    return {
+        'kept': int(counts.get(STATUS_KEPT, 0)),
+        'new': int(counts.get(STATUS_NEW, 0)),
+        'exited': int(counts.get(STATUS_EXITED, 0)),
+        'salary_change_mean': kept['年收入变化'].mean(),
+        'salary_change_median': kept['年收入变化'].median(),
+        'team_change': diff['当前在职人数'].sum() - diff['基准在职人数'].sum()
+    }
+
+
+def industry_summary(diff):
+    """各行业的新进入、退出键数，持续键的年收入变化均值及在职人数合计的变化"""
+    status = pd.crosstab(diff['行业'], diff['状态']).reindex(columns=[STATUS_KEPT, STATUS_NEW, STATUS_EXITED],
+                                                           fill_value=0).rename_axis(columns=None)
+    grouped = diff.groupby('行业')
+    status['年收入变化均值'] = grouped['年收入变化'].mean()
+    status['在职人数变化'] = grouped['当前在职人数'].sum() - grouped['基准在职人数'].sum()
+    return status.reset_index()
+
+
+def top_movers(diff, metric, n=5):
+    """各行业按 metric 绝对值最大的 n 个持续键，按行业分组、组内按变动幅度降序"""
+    moved = diff[(diff['状态'] == STATUS_KEPT) & diff[metric].notna() & (diff[metric] != 0)]
+    order = moved[metric].abs().sort_values(ascending=False, kind='stable').index
+    movers = moved.loc[order].groupby('行业', sort=False).head(n)
+    return movers.sort_values('行业', kind='stable')
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""
+测试公共设置：项目模块位于仓库根目录（平铺），数据文件和缓存目录为相对仓库根目录的路径；
+依赖数据文件的测试共用 dashboard 夹具
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope='session')
+def dashboard(tmp_path_factory):
+    """在仓库自带的数据文件上使用看板模块；列式存储、SQLite数据库和样本写入临时目录"""
+    pytest.importorskip('streamlit')
+    import config
+    cache = tmp_path_factory.mktemp('ds_cache')
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(ROOT)
+        for name in ['COLUMN_STORE_DIR', 'SQLITE_DIR', 'SAMPLE_DIR', 'PARTITION_DIR', 'FIGURE_CACHE_DIR']:
+            patch.setattr(config, name, str(cache / name.lower()))
+        patch.setattr(config, 'WARM_START_FILE', str(cache / 'warm_start.json'))
+        if not os.path.exists(config.DATA_FILE):
+            pytest.skip("数据文件不存在")
+
+        import DS_interactive_dashboard
+        DS_interactive_dashboard.ensure_heavy_modules()
+        yield DS_interactive_dashboard
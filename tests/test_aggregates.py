@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+共享聚合：bincount 计算的分组统计、取值计数和地理层级汇总与 pandas groupby 的结果一致
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import aggregates
+import geography
+import sampling
+
+
+@pytest.fixture(scope='module')
+def df():
+    rng = np.random.default_rng(11)
+    n = 500
+    df = pd.DataFrame({
+        '行业': rng.choice(['互联网', '金融', '制造', '教育', None], n, p=[0.35, 0.25, 0.2, 0.1, 0.1]),
+        '城市': rng.choice(['北京', '北京·海淀区', '深圳', '广东·广州', '杭州', '吉林市', '新加坡', '火星', None], n),
+        '头腰尾': rng.choice(['头', '腰', '尾'], n),
+        '平均年收入': np.where(rng.random(n) < 0.1, np.nan, rng.lognormal(12, 0.5, n)),
+        '在职人数': rng.integers(0, 50, n).astype(float),
+        '员工人数': rng.choice([0, 10, 100, 1000, 20000], n).astype(float)
+    })
+    # “教育”行业的指标全部缺失：分组统计中没有记录
+    df.loc[df['行业'] == '教育', '平均年收入'] = np.nan
+    df.index = np.arange(n) * 2
+    return df
+
+
+def weighted(df):
+    rng = np.random.default_rng(5)
+    return df.assign(**{sampling.WEIGHT_COLUMN: rng.uniform(1, 20, len(df))})
+
+
+def expected_stats(df, dim, values, weights=None):
+    frame = pd.DataFrame({dim: df[dim].to_numpy(), 'value': values})
+    if weights is not None:
+        frame['weight'] = weights
+    frame = frame.dropna(subset=[dim, 'value'])
+    if weights is None:
+        result = frame.groupby(dim)['value'].agg(['mean', 'sum', 'count'])
+    else:
+        frame['weighted'] = frame['value'] * frame['weight']
+        grouped = frame.groupby(dim)
+        result = pd.DataFrame({'sum': grouped['weighted'].sum(), 'count': grouped['value'].count()})
+        result.insert(0, 'mean', result['sum'] / grouped['weight'].sum())
+    return result[result['count'] > 0].reset_index()
+
+
+@pytest.mark.parametrize('is_weighted', [False, True])
+@pytest.mark.parametrize('dim', ['行业', '城市', '头腰尾'])
+def test_group_stats_matches_groupby(df, dim, is_weighted):
+    data = weighted(df) if is_weighted else df
+    agg = aggregates.build(data)
+    weights = data[sampling.WEIGHT_COLUMN].to_numpy() if is_weighted else None
+    values = df['平均年收入'].to_numpy()
+
+    # 全部行、布尔掩码、行位置
+    mask = df['在职人数'].to_numpy() > 10
+    positions = np.flatnonzero(df['头腰尾'].to_numpy() != '腰')[::-1]
+    for rows, selected in [(None, slice(None)), (mask, mask), (positions, positions)]:
+        want = expected_stats(df.iloc[selected], dim, values[selected],
+                              None if weights is None else weights[selected])
+        got = aggregates.group_stats(agg, dim, '平均年收入', rows)
+        pd.testing.assert_frame_equal(got, want, check_dtype=False)
+
+    # 直接传入与行对应的数值数组
+    scores = np.arange(len(positions), dtype=float)
+    want = expected_stats(df.iloc[positions], dim, scores, None if weights is None else weights[positions])
+    pd.testing.assert_frame_equal(aggregates.group_stats(agg, dim, scores, positions), want, check_dtype=False)
+
+
+def test_group_stats_empty_groups(df):
+    agg = aggregates.build(df)
+    got = aggregates.group_stats(agg, '行业', '平均年收入')
+    # 指标全部缺失的组和行业缺失的行不出现
+    assert '教育' not in set(got['行业']) and got['行业'].notna().all()
+
+    empty = aggregates.group_stats(agg, '行业', '平均年收入', np.zeros(len(df), dtype=bool))
+    assert empty.empty and list(empty.columns) == ['行业', 'mean', 'sum', 'count']
+    empty = aggregates.group_stats(weighted(df).pipe(aggregates.build), '行业', '平均年收入', np.array([], dtype=int))
+    assert empty.empty
+
+
+@pytest.mark.parametrize('dim', ['行业', '城市', '头腰尾'])
+def test_value_counts_matches_pandas(df, dim):
+    agg = aggregates.build(df)
+    pd.testing.assert_series_equal(aggregates.value_counts(agg, dim), df[dim].value_counts(), check_dtype=False,
+                                   check_index_type=False)
+    positions = np.arange(len(df))[::-3]
+    pd.testing.assert_series_equal(aggregates.value_counts(agg, dim, positions),
+                                   df[dim].iloc[positions].value_counts(), check_dtype=False,
+                                   check_index_type=False)
+    assert aggregates.value_counts(agg, dim, np.array([], dtype=int)).empty
+
+
+def test_geo_rollups_match_groupby(df):
+    agg = aggregates.build(df)
+    rng = np.random.default_rng(2)
+    score_rows = rng.choice(len(df), 80, replace=False)
+    scores = rng.uniform(0, 100, len(score_rows))
+    rollups = aggregates.geo_rollups(agg, (score_rows, scores))
+
+    resolved = pd.DataFrame([geography.resolve(city) if pd.notna(city) else (None, None, None)
+                             for city in df['城市']], columns=['标准城市', '省份', '城市等级'], index=df.index)
+    salary = df['平均年收入'].where(df['平均年收入'] > 0)
+    staff = df['在职人数'].where(df['在职人数'] > 0)
+    ratio = staff / df['员工人数'].where(df['员工人数'] > 0) * 100
+    ratio = ratio.where(ratio > 0)
+    for level in geography.LEVELS:
+        keys = resolved[level]
+        want = pd.DataFrame({
+            '岗位数': keys.value_counts(),
+            '平均年收入': salary.groupby(keys).mean(),
+            '在职人数合计': staff.groupby(keys).sum(min_count=1),
+            '平均DS占比': ratio.groupby(keys).mean(),
+            '评分企业数': pd.Series(scores).groupby(keys.iloc[score_rows].to_numpy()).size(),
+            '平均综合评分': pd.Series(scores).groupby(keys.iloc[score_rows].to_numpy()).mean()
+        })
+        want['评分企业数'] = want['评分企业数'].fillna(0).astype(int)
+        got = rollups[level].set_index(level)
+        assert set(got.index) == set(want.index)
+        pd.testing.assert_frame_equal(got[want.columns], want.loc[got.index], check_dtype=False, check_names=False)
+
+        if level == '城市等级':
+            assert list(got.index) == [tier for tier in geography.TIER_ORDER if tier in got.index]
+        else:
+            assert got['岗位数'].is_monotonic_decreasing
+        if level == '标准城市':
+            parents = resolved.dropna().drop_duplicates('标准城市').set_index('标准城市')
+            pd.testing.assert_frame_equal(got[['省份', '城市等级']], parents.loc[got.index, ['省份', '城市等级']],
+                                          check_names=False)
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+本地JSON接口：参数校验、ETag/304、排队已满时的503及请求统计
+"""
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+
+@pytest.fixture(scope='module')
+def api(dashboard):
+    import api_server
+    return api_server
+
+
+@pytest.fixture(scope='module')
+def server(api):
+    srv = api.create_server(port=0)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_port}"
+    srv.shutdown()
+    srv.server_close()
+
+
+def request(url, data=None, headers=None):
+    """发送请求，返回 (状态码, 响应头, 解析后的JSON或None)"""
+    req = urllib.request.Request(url, data=data, headers=headers or {})
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            status, head, body = response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        status, head, body = e.code, e.headers, e.read()
+    return status, head, json.loads(body) if body else None
+
+
+def wait_until(condition, timeout=10):
+    """等待条件成立（服务线程异步处理连接）"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.mark.parametrize('query', [
+    'outlier_multiplier=inf', 'outlier_multiplier=nan', 'outlier_multiplier=-1', 'outlier_multiplier=abc',
+    'outlier_method=median', 'top_n=0', 'top_n=1.5', 'remove_outliers=maybe', 'unknown=1'
+])
+def test_invalid_parameters_return_400(server, query):
+    status, _, body = request(f"{server}/api/analytics?{query}")
+    assert status == 400
+    assert body['error']
+
+
+@pytest.mark.parametrize('payload', [b'not json', b'[1, 2]', json.dumps({'industries': 1}).encode('utf-8')])
+def test_invalid_post_body_returns_400(server, payload):
+    status, _, body = request(f"{server}/api/analytics", data=payload,
+                              headers={'Content-Type': 'application/json'})
+    assert status == 400 and body['error']
+
+
+def test_unknown_route_and_method(server):
+    assert request(f"{server}/api/nothing")[0] == 404
+    status, head, _ = request(f"{server}/api/options", data=b'{}')
+    assert status == 405 and head['Allow'] == 'GET'
+
+
+def test_etag_and_not_modified(server):
+    url = f"{server}/api/analytics?industries=&cities=&top_n=5"
+    status, head, body = request(url)
+    assert status == 200
+    etag = head['ETag']
+    assert body['top_n'] == 5 and len(body['leaderboard']['records']) <= 5
+
+    status, head, body = request(url, headers={'If-None-Match': etag})
+    assert status == 304 and body is None and head['ETag'] == etag
+
+    # 相同条件再次请求命中结果缓存；GET与等价的POST结果相同
+    status, head, cached = request(url)
+    assert status == 200 and head['X-Cache'] == 'HIT' and head['ETag'] == etag
+    status, head, posted = request(f"{server}/api/analytics", headers={'Content-Type': 'application/json'},
+                                   data=json.dumps({'industries': [], 'cities': [], 'top_n': 5}).encode('utf-8'))
+    assert head['ETag'] == etag and posted == cached
+
+    # 条件不同则ETag不同
+    status, head, _ = request(f"{server}/api/analytics?industries=&cities=&top_n=6", headers={'If-None-Match': etag})
+    assert status == 200 and head['ETag'] != etag
+
+
+def test_metrics_count_requests(server):
+    before = request(f"{server}/api/metrics")[2]
+    for _ in range(3):
+        request(f"{server}/api/health")
+    request(f"{server}/api/analytics?top_n=0")
+    after = request(f"{server}/api/metrics")[2]
+
+    def count(snapshot, route, key):
+        return snapshot.get(route, {}).get(key, 0)
+
+    assert count(after, '/api/health', 'count') - count(before, '/api/health', 'count') == 3
+    assert count(after, '/api/analytics', 'errors') - count(before, '/api/analytics', 'errors') == 1
+    health = after['/api/health']
+    assert 0 <= health['p50_ms'] <= health['p95_ms'] <= health['p99_ms'] <= health['max_ms']
+
+
+def test_full_queue_returns_503(api, monkeypatch):
+    release = threading.Event()
+    entered = threading.Semaphore(0)
+
+    def blocking(request, spec):
+        entered.release()
+        release.wait(10)
+        return 200, {'status': 'ok'}, {}
+
+    monkeypatch.setitem(api.ROUTES, '/api/block', (blocking, ['GET']))
+    srv = api.create_server(port=0, workers=1, max_pending=2)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{srv.server_port}"
+    rejected_before = api.metrics_snapshot().get('rejected', {}).get('count', 0)
+    try:
+        # 一个连接在处理中、一个在排队，占满两个名额
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(request(f"{base}/api/block")[0]))
+                   for _ in range(2)]
+        threads[0].start()
+        assert entered.acquire(timeout=10)
+        threads[1].start()
+        assert wait_until(lambda: srv.slots._value == 0)
+
+        status, head, body = request(f"{base}/api/health")
+        assert status == 503 and head['Retry-After'] == '1' and body['error']
+        # 拒绝在响应发出后才计入统计
+        assert wait_until(lambda: api.metrics_snapshot().get('rejected', {}).get('count', 0) == rejected_before + 1)
+
+        # 名额释放后恢复正常
+        release.set()
+        for thread in threads:
+            thread.join(10)
+        assert results == [200, 200]
+        assert request(f"{base}/api/health")[0] == 200
+    finally:
+        release.set()
+        srv.shutdown()
+        srv.server_close()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+成立年份队列：预先分组的汇总表在任意筛选条件下与直接对明细分组的结果一致
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import cohorts
+
+
+def make_detail(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    years = rng.integers(1995, 2022, n).astype(str)
+    dates = np.where(rng.random(n) < 0.2, None, np.char.add(years, '-06-01'))
+    return pd.DataFrame({
+        '成立日期': pd.to_datetime(pd.Series(dates, dtype=object)),
+        '行业': rng.choice(['人工智能', '纯互联网', '企业数字化服务', None], n, p=[0.4, 0.3, 0.25, 0.05]),
+        '城市': rng.choice(['北京', '上海', '深圳', '杭州', '成都'], n),
+        '头腰尾': rng.choice(['头部', '腰部', '尾部'], n),
+        '平均年收入': np.where(rng.random(n) < 0.1, 0, rng.normal(300000, 80000, n)),
+        '平均在职天数': np.where(rng.random(n) < 0.1, np.nan, rng.uniform(100, 1500, n)),
+        '在职人数': rng.integers(0, 30, n).astype(float),
+        '员工人数': np.where(rng.random(n) < 0.05, 0, rng.integers(50, 5000, n)).astype(float)
+    })
+
+
+def brute_force(detail, selection):
+    """直接筛选明细，按成立年份分组计算（只统计大于0的有效值）"""
+    df = detail
+    for column, key in cohorts.FILTER_FIELDS:
+        if selection[key]:
+            df = df[df[column].isin(selection[key])]
+    year = df['成立日期'].dt.year
+    unknown = int(year.isna().sum())
+    df = df.assign(**{cohorts.COHORT_COLUMN: year}).dropna(subset=[cohorts.COHORT_COLUMN])
+    df = df.assign(
+        平均年收入=df['平均年收入'].where(df['平均年收入'] > 0),
+        平均在职天数=df['平均在职天数'].where(df['平均在职天数'] > 0),
+        DS占比=(df['在职人数'] / df['员工人数'] * 100).where((df['在职人数'] > 0) & (df['员工人数'] > 0))
+    )
+
+    def table(keys):
+        grouped = df.dropna(subset=keys).groupby(keys, sort=True)
+        result = grouped.agg(记录数=('平均年收入', 'size'), 平均年收入=('平均年收入', 'mean'),
+                             平均在职天数=('平均在职天数', 'mean'), DS占比=('DS占比', 'mean')).reset_index()
+        result[cohorts.COHORT_COLUMN] = result[cohorts.COHORT_COLUMN].astype(int)
+        return result
+
+    return (table([cohorts.COHORT_COLUMN, '行业']), table([cohorts.COHORT_COLUMN, '头腰尾']),
+            table([cohorts.COHORT_COLUMN]), unknown)
+
+
+SELECTIONS = [
+    {'industries': [], 'cities': [], 'head_tail': []},
+    {'industries': ['人工智能', '纯互联网'], 'cities': ['北京', '杭州'], 'head_tail': []},
+    {'industries': [], 'cities': ['上海'], 'head_tail': ['头部', '尾部']},
+    {'industries': ['不存在的行业'], 'cities': [], 'head_tail': []}
+]
+
+
+@pytest.fixture(scope='module')
+def detail():
+    return make_detail()
+
+
+@pytest.fixture(scope='module')
+def tables(detail):
+    return cohorts.build_tables(cohorts.build_cube(detail))
+
+
+@pytest.mark.parametrize('selection', SELECTIONS)
+def test_cohort_tables_match_groupby_on_detail(detail, tables, selection):
+    expected = brute_force(detail, selection)
+    actual = cohorts.cohort_tables(tables, selection)
+    for got, want in zip(actual[:3], expected[:3]):
+        pd.testing.assert_frame_equal(got, want[got.columns], check_dtype=False)
+    assert actual[3] == expected[3]
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+列式存储：成立日期的固定格式解析（占位日期和无法解析的值记为缺失），及按数据文件路径区分的存储文件
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+import column_store
+import config
+
+
+def test_parse_dates_maps_sentinels_and_garbage_to_missing():
+    df = pd.DataFrame({'成立日期': ['2015-03-02', config.UNKNOWN_DATES[0], f" {config.UNKNOWN_DATES[0]} ",
+                                    ' 2001-12-31', '2015/03/02', '未知', '', None, np.nan]})
+    parsed = column_store.parse_dates(df)['成立日期']
+
+    assert pd.api.types.is_datetime64_any_dtype(parsed)
+    assert parsed.iloc[0] == pd.Timestamp('2015-03-02')
+    assert parsed.iloc[3] == pd.Timestamp('2001-12-31')
+    # 占位日期（含首尾空白）、其他格式、非日期文字和空值都记为缺失
+    assert parsed.iloc[[1, 2, 4, 5, 6, 7, 8]].isna().all()
+
+
+def test_parse_dates_keeps_parsed_columns_and_ignores_missing_columns():
+    dates = pd.to_datetime(pd.Series(['1970-01-01', '2020-05-06']))
+    df = column_store.parse_dates(pd.DataFrame({'成立日期': dates, '行业': ['a', 'b']}))
+    # 已是日期类型的列不再处理（占位日期的识别只针对原始文字）
+    pd.testing.assert_series_equal(df['成立日期'], dates, check_names=False)
+
+    other = pd.DataFrame({'行业': ['a']})
+    assert column_store.parse_dates(other.copy()).equals(other)
+
+
+def test_read_csv_parses_dates_once_at_load(tmp_path):
+    path = tmp_path / 'data.csv'
+    pd.DataFrame({
+        '公司名称': ['甲', '乙', '丙'],
+        '成立日期': ['2010-01-01', '1970-01-01', ''],
+        '平均年收入': [1.0, 2.0, 3.0]
+    }).to_csv(path, index=False, encoding='utf-8')
+
+    df = column_store.read_csv(str(path))
+    assert df['成立日期'].iloc[0] == pd.Timestamp('2010-01-01')
+    assert df['成立日期'].iloc[1:].isna().all()
+
+    # 写入列式存储后缺失日期为空值，读回仍为缺失
+    table = column_store.to_arrow_table(df)
+    assert table['成立日期'].null_count == 2
+    assert column_store.arrow_to_pandas(table)['成立日期'].iloc[1:].isna().all()
+
+
+def test_same_named_files_keep_separate_stores(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'COLUMN_STORE_DIR', str(tmp_path / 'columns'))
+    paths = []
+    for folder, salary in [('snapshots', 1.0), ('current', 2.0)]:
+        (tmp_path / folder).mkdir()
+        path = str(tmp_path / folder / 'DS_raw.csv')
+        pd.DataFrame({'公司名称': ['甲'], '平均年收入': [salary]}).to_csv(path, index=False)
+        paths.append(path)
+
+    targets = [column_store.build_store(path) for path in paths]
+    # 文件名相同、目录不同：各自的列式存储都保留，重建其中一个不会删除另一个
+    assert targets[0] != targets[1]
+    assert all(os.path.exists(target) for target in targets)
+    assert column_store.read_columns(['平均年收入'], paths[0])['平均年收入'].tolist() == [1.0]
+    assert column_store.read_columns(['平均年收入'], paths[1])['平均年收入'].tolist() == [2.0]
+
+    # 同一文件的新版本替换旧版本
+    pd.DataFrame({'公司名称': ['甲', '乙'], '平均年收入': [1.0, 3.0]}).to_csv(paths[0], index=False)
+    os.utime(paths[0], ns=(0, 10 ** 18))
+    rebuilt = column_store.build_store(paths[0])
+    assert sorted(os.listdir(config.COLUMN_STORE_DIR)) == sorted(os.path.basename(p) for p in [rebuilt, targets[1]])
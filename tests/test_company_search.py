@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+公司搜索：n-gram倒排索引的结果与逐行子串匹配（str.contains）的暴力搜索一致
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import company_search
+
+
+@pytest.fixture(scope='module')
+def companies():
+    df = pd.DataFrame({
+        '公司名称': ['北京字节跳动科技有限公司', '字节跳动', '北京百度网讯科技有限公司', 'Alibaba Cloud',
+                     '阿里云计算有限公司', '北京字节跳动科技有限公司', None, '上海数据科技', 'ALIBABA GROUP',
+                     '数据 智能', '', '深圳腾讯计算机系统有限公司'],
+        '公司主名': ['字节跳动', '字节跳动', '百度', 'alibaba', '阿里云', 'TikTok', '无名', '数据科技', None,
+                     '数据智能', '空白', '腾讯']
+    })
+    df.index = np.arange(len(df)) * 10 + 3
+    return df
+
+
+def brute_force(df, query):
+    """逐行匹配公司名称或公司主名（不区分大小写），返回匹配的公司名称，名称越短越靠前"""
+    query = query.strip().casefold()
+    names = df['公司名称'].fillna('').astype(str)
+    matched = (names.str.strip().str.casefold().str.contains(query, regex=False)
+               | df['公司主名'].fillna('').astype(str).str.strip().str.casefold().str.contains(query, regex=False))
+    companies = pd.unique(names[names != ''])
+    hits = set(names[matched & (names != '')])
+    return sorted([c for c in companies if c in hits], key=len)
+
+
+@pytest.mark.parametrize('query', [
+    # 1个字、2个字、3个及以上的字
+    '字', '数', 'a', '科技', '跳动', 'AL', '字节跳', '有限公司', '北京字节跳动科技', 'alibaba', ' TikTok ',
+    # 跨越公司名称与公司主名的文字、无匹配
+    '司字节', '火星', 'xyz', '数据智能科技'
+])
+def test_search_matches_brute_force(companies, query):
+    index = company_search.build_index(companies['公司名称'], companies['公司主名'], companies.index.to_numpy())
+    want = brute_force(companies, query)
+    results, total = company_search.search(index, query, limit=100)
+    assert total == len(want)
+    assert [name for name, _ in results] == want
+    # 每家公司的全部行号
+    names = companies['公司名称'].fillna('')
+    for name, rows in results:
+        assert list(rows) == list(companies.index[names == name])
+
+
+def test_empty_query_and_limit(companies):
+    index = company_search.build_index(companies['公司名称'], companies['公司主名'], companies.index.to_numpy())
+    assert company_search.search(index, '   ') == ([], 0)
+    results, total = company_search.search(index, '司', limit=2)
+    assert len(results) == 2 and total == len(brute_force(companies, '司'))
+
+
+def test_search_on_data_file(dashboard):
+    df = dashboard.column_store.read_columns(['公司名称', '公司主名'])
+    index = company_search.build_index(df['公司名称'], df['公司主名'], df.index.to_numpy())
+    names = df['公司名称'].dropna().astype(str)
+    rng = np.random.default_rng(3)
+    queries = ['科', '数据', '不存在的公司名称']
+    for name in rng.choice(names.to_numpy(), 5):
+        start = rng.integers(0, max(len(name) - 4, 1))
+        queries += [name[start:start + 1], name[start:start + 2], name[start:start + 4]]
+    for query in queries:
+        want = brute_force(df, query)
+        results, total = company_search.search(index, query, limit=len(want) + 1)
+        assert total == len(want), query
+        # 名称长度相同的公司按首次出现的顺序排列
+        assert [name for name, _ in results] == want, query
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+图表缓存：进程内和磁盘缓存都保存图表JSON，命中时返回规格字典而不重建plotly图表
+"""
+import os
+
+import pandas as pd
+import pytest
+
+import config
+import figure_cache
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'FIGURE_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(config, 'FIGURE_CACHE_PERSIST', True)
+    figure_cache.clear()
+    yield tmp_path
+    figure_cache.clear()
+
+
+def chart(data, builds):
+    def build():
+        builds.append(1)
+        import plotly.express as px
+        return px.bar(data, x='行业', y='数量')
+    return figure_cache.get_figure('bar', data, {'kind': 'bar'}, build)
+
+
+def test_hits_return_specs_without_rebuilding(cache_dir):
+    data = pd.DataFrame({'行业': ['互联网', '金融'], '数量': [3, 5]})
+    builds = []
+    spec = chart(data, builds)
+    assert isinstance(spec, dict) and spec['data'][0]['type'] == 'bar' and builds == [1]
+
+    # 进程内命中：缓存的是JSON文本，每次返回新字典
+    assert all(isinstance(entry[0], str) for entry in figure_cache._memory.values())
+    hit = chart(data, builds)
+    assert hit == spec and hit is not spec and builds == [1]
+    hit['layout']['title'] = '修改'
+    assert chart(data, builds) == spec
+
+    # 磁盘命中（进程重启后）
+    figure_cache.clear()
+    assert chart(data, builds) == spec and builds == [1]
+
+    # 输入数据不同则重新构建
+    chart(data.assign(数量=[4, 5]), builds)
+    assert builds == [1, 1]
+
+
+def test_corrupt_disk_entry_is_rebuilt(cache_dir):
+    data = pd.DataFrame({'行业': ['制造'], '数量': [1]})
+    builds = []
+    spec = chart(data, builds)
+    figure_cache.clear()
+    for name in os.listdir(cache_dir):
+        (cache_dir / name).write_text('{"data": [', encoding='utf-8')
+    assert chart(data, builds) == spec and builds == [1, 1]
+
+
+def test_memory_limit_evicts_least_recently_used(cache_dir, monkeypatch):
+    monkeypatch.setattr(config, 'FIGURE_CACHE_PERSIST', False)
+    builds = []
+    frames = [pd.DataFrame({'行业': [f"行业{i}"], '数量': [i]}) for i in range(3)]
+    chart(frames[0], builds)
+    monkeypatch.setattr(config, 'FIGURE_CACHE_MAX_BYTES', figure_cache._memory_bytes * 2.5)
+    chart(frames[1], builds)
+    chart(frames[0], builds)
+    chart(frames[2], builds)
+    assert len(figure_cache._memory) == 2 and builds == [1, 1, 1]
+    # frames[1] 最久未使用，已被淘汰
+    chart(frames[0], builds)
+    assert builds == [1, 1, 1]
+    chart(frames[1], builds)
+    assert builds == [1, 1, 1, 1]
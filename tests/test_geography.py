@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+地理维表：城市列各种写法解析为 (标准城市, 省份, 城市等级)
+"""
+import pytest
+
+import config
+import geography
+
+
+@pytest.mark.parametrize('raw, expected', [
+    # 直辖市及其区县
+    ('北京市', ('北京', '北京', '一线')),
+    ('北京·海淀区', ('北京', '北京', '一线')),
+    ('北京朝阳区', ('北京', '北京', '一线')),
+    (' 上海 浦东新区 ', ('上海', '上海', '一线')),
+    ('中国上海', ('上海', '上海', '一线')),
+    # 省份前缀（简称、全称、分隔符）
+    ('广东·深圳', ('深圳', '广东', '一线')),
+    ('浙江省杭州市萧山区', ('杭州', '浙江', '新一线')),
+    ('内蒙古自治区呼和浩特市', ('呼和浩特', '内蒙古', geography.OTHER_TIER)),
+    ('吉林省长春市', ('长春', '吉林', '二线')),
+    # 省名与市名相同
+    ('吉林市', ('吉林', '吉林', geography.OTHER_TIER)),
+    # 没有省份前缀：城市名后接区县后缀时是同名区县，不按城市匹配
+    ('朝阳区望京', (geography.UNKNOWN, geography.UNKNOWN, geography.UNKNOWN)),
+    ('鼓楼区', (geography.UNKNOWN, geography.UNKNOWN, geography.UNKNOWN)),
+    ('深圳南山区', ('深圳', '广东', '一线')),
+    # 有省份前缀时只在该省内匹配，区县后缀不影响
+    ('辽宁朝阳', ('朝阳', '辽宁', geography.OTHER_TIER)),
+    ('辽宁·朝阳市', ('朝阳', '辽宁', geography.OTHER_TIER)),
+    ('安徽·黄山区', ('黄山', '安徽', geography.OTHER_TIER)),
+    # 以更长的城市名开头时不是省份前缀
+    ('海南藏族自治州', ('海南藏族自治州', '青海', geography.OTHER_TIER)),
+    ('海南·海口', ('海口', '海南', geography.OTHER_TIER)),
+    # 只有省份信息
+    ('广东', ('广东·其他', '广东', geography.UNKNOWN)),
+    # 港澳台、海外和无法识别的取值
+    ('香港', ('香港', '香港', geography.OVERSEAS_TIER)),
+    ('新加坡', (geography.OVERSEAS, geography.OVERSEAS, geography.OVERSEAS_TIER)),
+    ('火星', (geography.UNKNOWN, geography.UNKNOWN, geography.UNKNOWN)),
+])
+def test_resolve(raw, expected):
+    assert geography.resolve(raw) == expected
+
+
+def test_every_city_resolves_to_itself():
+    for city, province in geography.CITY_PROVINCE.items():
+        # 单独的“吉林”按省份解析（吉林市写作“吉林市”）
+        if city not in geography.PROVINCE_CITIES or geography.PROVINCE_CITIES[city] == [city]:
+            assert geography.resolve(city)[:2] == (city, province), city
+        # 带省份前缀时同样解析为该城市
+        assert geography.resolve(f"{province}·{city}")[:2] == (city, province), city
+
+
+def test_tier_cities_are_in_the_dimension_table():
+    for tier, cities in config.CITY_TIERS.items():
+        for city in cities:
+            assert geography.resolve(city)[2] == tier, city
+
+
+def test_city_groups():
+    groups = geography.city_groups(['深圳', '北京', '辽宁朝阳', '北京·海淀区', '火星'])
+    assert list(groups['省份']) == sorted(groups['省份'])
+    assert groups['省份']['北京'] == ['北京', '北京·海淀区']
+    assert groups['省份']['辽宁'] == ['辽宁朝阳']
+    # 城市等级按等级顺序排列
+    assert list(groups['城市等级']) == ['一线', geography.OTHER_TIER, geography.UNKNOWN]
+    assert groups['城市等级']['一线'] == ['深圳', '北京', '北京·海淀区']
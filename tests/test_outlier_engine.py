@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+异常值检测引擎：IQR、Z-score、MAD 的保留掩码（全体检测和按行业分组检测）与逐组暴力计算一致
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import outlier_engine
+
+METHODS = ['iqr', 'zscore', 'mad']
+MULTIPLIERS = [1.5, 3.0]
+
+
+@pytest.fixture(scope='module')
+def df():
+    rng = np.random.default_rng(21)
+    n = 600
+    df = pd.DataFrame({
+        '行业': rng.choice(['互联网', '金融', '制造', None], n, p=[0.45, 0.3, 0.2, 0.05]),
+        '平均年收入': rng.lognormal(12, 0.6, n),
+        '在职人数': rng.integers(0, 30, n).astype(float),
+        '员工人数': rng.choice([0, 50, 500, 5000], n).astype(float)
+    })
+    # 无效值、缺失值、极端值
+    df.loc[rng.choice(n, 30, replace=False), '平均年收入'] = np.nan
+    df.loc[rng.choice(n, 20, replace=False), '平均年收入'] = 0
+    df.loc[rng.choice(n, 5, replace=False), '平均年收入'] = 1e8
+    # 只有一个有效值的行业、离散程度为0（MAD为0）的行业
+    df.loc[0, '行业'] = '单值'
+    df.loc[1:40, '行业'] = '同值'
+    df.loc[1:30, '平均年收入'] = 250000.0
+    df.index = np.arange(n) + 100
+    return df
+
+
+def brute_force_keep(values, method, multiplier):
+    """一组数值的保留掩码：逐个值按该组有效值（>0）的统计量判断"""
+    clean = np.array([v for v in values if v > 0])
+    keep = []
+    for v in values:
+        if not v > 0:
+            keep.append(False)
+            continue
+        if method == 'iqr':
+            q1, q3 = np.percentile(clean, 25), np.percentile(clean, 75)
+            keep.append(q1 - multiplier * (q3 - q1) <= v <= q3 + multiplier * (q3 - q1))
+        elif method == 'zscore':
+            std = np.std(clean, ddof=1) if len(clean) > 1 else np.nan
+            keep.append(not std > 0 or abs(v - clean.mean()) / std < multiplier)
+        else:
+            median = np.median(clean)
+            mad = np.median(np.abs(clean - median))
+            spread = outlier_engine.MAD_SCALE * mad if mad > 0 else \
+                outlier_engine.MEAN_AD_SCALE * np.mean(np.abs(clean - median))
+            keep.append(not spread > 0 or abs(v - median) <= multiplier * spread)
+    return np.array(keep, dtype=bool)
+
+
+def brute_force(df, column, method, multiplier, grouped):
+    values = outlier_engine.column_values(df, column)
+    if not grouped:
+        return brute_force_keep(values, method, multiplier)
+    keep = np.zeros(len(df), dtype=bool)
+    industries = df['行业']
+    for industry in industries.dropna().unique():
+        rows = np.flatnonzero(industries.to_numpy() == industry)
+        keep[rows] = brute_force_keep(values[rows], method, multiplier)
+    # 行业缺失的行没有分组统计量：IQR不保留，Z-score、MAD无法计算离散程度时不剔除
+    missing = np.flatnonzero(industries.isna().to_numpy())
+    keep[missing] = (values[missing] > 0) & (method != 'iqr')
+    return keep
+
+
+def test_compute_masks_matches_brute_force(df):
+    masks = outlier_engine.compute_masks(df, METHODS, MULTIPLIERS)
+    assert masks.index.equals(df.index)
+    for column in outlier_engine.OUTLIER_COLUMNS:
+        values = outlier_engine.column_values(df, column)
+        np.testing.assert_array_equal(masks[outlier_engine.mask_key(column)].to_numpy(), values > 0)
+        for method in METHODS:
+            for multiplier in MULTIPLIERS:
+                for grouped in [False, True]:
+                    want = brute_force(df, column, method, multiplier, grouped)
+                    got = masks[outlier_engine.mask_key(column, method, multiplier, grouped)].to_numpy()
+                    np.testing.assert_array_equal(got, want, err_msg=f"{column} {method} {multiplier} {grouped}")
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_grouped_and_global_modes(df, method):
+    values = outlier_engine.column_values(df, '平均年收入')
+    global_stats = outlier_engine.column_statistics(values)
+    grouped_stats = outlier_engine.column_statistics(values, df['行业'].to_numpy())
+
+    # 只有一个行业时分组检测等同于全体检测
+    single = outlier_engine.column_statistics(values, np.full(len(values), '全部', dtype=object))
+    for name in global_stats:
+        np.testing.assert_allclose(single[name], global_stats[name])
+    np.testing.assert_array_equal(outlier_engine.keep_mask(values, single, method, 1.5),
+                                  outlier_engine.keep_mask(values, global_stats, method, 1.5))
+
+    # 单值行业离散程度为0，不剔除；离散程度为0的同值行业中，IQR、MAD剔除其他取值
+    single_value = (df['行业'] == '单值').to_numpy()
+    assert outlier_engine.keep_mask(values, grouped_stats, method, 1.5)[single_value].all()
+    same = (df['行业'] == '同值').to_numpy()
+    kept = outlier_engine.keep_mask(values, grouped_stats, method, 1.5)[same]
+    assert kept[:30].all()
+    if method == 'iqr':
+        assert not kept[30:].any()
+
+
+def test_compute_mask_matches_compute_masks(df):
+    masks = outlier_engine.compute_masks(df, METHODS, [2.0])
+    for method in METHODS + [None]:
+        for grouped in [False, True]:
+            got = outlier_engine.compute_mask(df, 'DS占比', method, 2.0, grouped)
+            np.testing.assert_array_equal(got, masks[outlier_engine.mask_key('DS占比', method, 2.0, grouped)])
+
+
+def test_empty_data(df):
+    masks = outlier_engine.compute_masks(df.iloc[:0], METHODS, MULTIPLIERS)
+    assert masks.empty and len(masks.columns) == 3 * (1 + 2 * len(METHODS) * len(MULTIPLIERS))
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+查询后端：SQLite实现与pandas实现（看板的计算）在同一数据文件上的结果一致
+
+使用仓库自带的数据文件，列式存储、SQLite数据库和样本写入临时目录。
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import cohorts
+import config
+import query_backend
+import sampling
+
+
+@pytest.fixture(scope='module')
+def backends(dashboard):
+    return dashboard, query_backend.PandasBackend(dashboard), query_backend.SQLiteBackend()
+
+
+def selections(options, dashboard):
+    base = dashboard.get_default_selection(options)
+    everything = dict(base, industries=[], cities=[], head_tail=[])
+    result = [base, dict(base, remove_outliers=False), everything,
+              dict(base, industries=options['industries'][:1], cities=[]),
+              dict(base, industries=['不存在的行业'])]
+    for method in config.OUTLIER_METHODS:
+        result.append(dict(everything, outlier_method=method, outlier_grouped=True, outlier_multiplier=3.0))
+    return result
+
+
+def assert_close(actual, expected):
+    if isinstance(expected, float) and np.isnan(expected):
+        assert np.isnan(actual)
+    else:
+        assert float(actual) == pytest.approx(float(expected), rel=1e-9)
+
+
+def test_options_and_overview_match(backends):
+    _, pandas_backend, sqlite_backend = backends
+    assert sqlite_backend.options() == pandas_backend.options()
+    assert sqlite_backend.overview() == pandas_backend.overview()
+
+
+def test_queries_match(backends):
+    dashboard, pandas_backend, sqlite_backend = backends
+    for selection in selections(pandas_backend.options(), dashboard):
+        expected, actual = pandas_backend.query(selection), sqlite_backend.query(selection)
+        assert actual.summary() == expected.summary(), selection
+
+        for view in ['salary', 'jobs', 'ratio']:
+            want, got = expected.measure(view), actual.measure(view)
+            if want is None:
+                assert got is None, (view, selection)
+                continue
+            for key, value in want[0].items():
+                assert_close(got[0][key], value)
+            want_industries, got_industries = want[1].reset_index(drop=True), got[1].reset_index(drop=True)
+            assert list(got_industries['行业']) == list(want_industries['行业'])
+            np.testing.assert_allclose(got_industries.iloc[:, 1:].to_numpy(dtype=float),
+                                       want_industries.iloc[:, 1:].to_numpy(dtype=float), rtol=1e-9)
+
+        want_top, want_error = expected.top_companies(50)
+        got_top, got_error = actual.top_companies(50)
+        assert got_error == want_error
+        if want_top is not None:
+            np.testing.assert_allclose(got_top['综合评分'].to_numpy(), want_top['综合评分'].to_numpy(), rtol=1e-9)
+            assert list(got_top['公司名称']) == list(want_top['公司名称'])
+
+
+def test_distributions_match(backends):
+    dashboard, pandas_backend, sqlite_backend = backends
+    for selection in selections(pandas_backend.options(), dashboard):
+        expected, actual = pandas_backend.query(selection), sqlite_backend.query(selection)
+        for view in ['salary', 'jobs', 'ratio']:
+            data = expected.data(view)
+            if data is None:
+                assert actual.histogram(view) is None and actual.box(view) is None, (view, selection)
+                continue
+            column = query_backend.VIEW_MEASURES[view][0]
+            values = data[0][column].to_numpy(dtype=float)
+
+            # 库内分箱与 numpy.histogram 相同
+            bins = actual.histogram(view)
+            if values.min() < values.max():
+                counts, edges = np.histogram(values, bins=len(bins))
+                np.testing.assert_array_equal(bins['count'].to_numpy(), counts)
+                np.testing.assert_allclose(bins[column].to_numpy(), (edges[:-1] + edges[1:]) / 2)
+            else:
+                assert bins['count'].tolist() == [len(values)]
+
+            box = actual.box(view)
+            q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+            for key, value in {'q1': q1, 'median': median, 'q3': q3,
+                               'lowerfence': values[values >= q1 - 1.5 * (q3 - q1)].min(),
+                               'upperfence': values[values <= q3 + 1.5 * (q3 - q1)].max()}.items():
+                assert_close(box[key], value)
+
+            # 散点图的取点是参与统计的行的子集
+            points = actual.points(view, ['公司名称'], limit=100)
+            assert len(points) == min(100, len(values))
+            assert points.index.isin(data[0].index).all() and points.index.is_monotonic_increasing
+
+
+def test_leaderboard_queries_match(backends):
+    dashboard, pandas_backend, sqlite_backend = backends
+    for selection in selections(pandas_backend.options(), dashboard)[:4]:
+        expected, actual = pandas_backend.query(selection), sqlite_backend.query(selection)
+        industry = expected.top_companies(1)[0]['行业'].iloc[0]
+        for kwargs in [{'industry': industry}, {'industry_top': 2}, {'industry': industry, 'industry_top': 1}]:
+            want, got = expected.top_companies(30, **kwargs)[0], actual.top_companies(30, **kwargs)[0]
+            assert list(got['公司名称']) == list(want['公司名称']), kwargs
+            assert list(got['总排名']) == list(want['总排名']) and list(got['行业排名']) == list(want['行业排名'])
+
+        want, got = expected.score_summary()[0], actual.score_summary()[0]
+        assert got['count'] == want['count']
+        pd.testing.assert_frame_equal(got['industries'], want['industries'], check_dtype=False)
+        pd.testing.assert_frame_equal(actual.scores(), expected.scores(), check_dtype=False)
+
+    empty = dict(selections(pandas_backend.options(), dashboard)[0], industries=['不存在的行业'])
+    assert sqlite_backend.query(empty).score_summary() == (None, "没有有效数据")
+    assert sqlite_backend.query(empty).scores() is None
+
+
+def test_rows_and_cohorts_match(backends):
+    dashboard, pandas_backend, sqlite_backend = backends
+    columns = ['公司名称', '行业', '成立日期', '平均年收入']
+    assert sqlite_backend.store_columns() == dashboard.column_store.store_columns()
+
+    # 按行号取列：行号与列式存储一致，日期同样解析
+    row_ids = np.array([5, 0, 17, 3, 9999])
+    pd.testing.assert_frame_equal(sqlite_backend.take_columns(row_ids, columns),
+                                  dashboard.column_store.take_columns(row_ids, columns), check_dtype=False)
+
+    selection = dashboard.get_default_selection(pandas_backend.options())
+    want = dashboard.apply_filters(dashboard.column_store.read_columns(columns + ['城市', '头腰尾']), selection)
+    got = sqlite_backend.read_filtered(selection, columns + ['城市', '头腰尾'])
+    pd.testing.assert_frame_equal(got.sort_index()[want.columns], want, check_dtype=False)
+
+    pandas_cube = cohorts.build_cube(dashboard.filter_ds_jobs(
+        dashboard.column_store.read_columns(cohorts.SOURCE_COLUMNS + ['岗位'])))
+    sqlite_cube = sqlite_backend.cohort_cube()
+    for tables in [{'industries': [], 'cities': [], 'head_tail': []}, selection]:
+        want_tables = cohorts.cohort_tables(cohorts.build_tables(pandas_cube), tables)
+        got_tables = cohorts.cohort_tables(cohorts.build_tables(sqlite_cube), tables)
+        for got_table, want_table in zip(got_tables[:3], want_tables[:3]):
+            pd.testing.assert_frame_equal(got_table, want_table, check_dtype=False)
+        assert got_tables[3] == want_tables[3]
+
+
+def test_database_sample_matches_sampling_design(backends):
+    dashboard, _, sqlite_backend = backends
+    columns = sampling.STRATA_COLUMNS + ['平均年收入']
+    want = sampling.draw_sample(dashboard.column_store.read_columns(columns), 3000, 2, 42)
+    got = sqlite_backend.draw_sample(columns, 3000, 2, 42)
+
+    # 随机序列不同，但各层样本数、层总行数和权重相同
+    def design(sample):
+        return (sample.groupby(sampling.STRATA_COLUMNS, dropna=False)
+                .agg(n=(sampling.WEIGHT_COLUMN, 'size'), N=(sampling.STRATUM_SIZE_COLUMN, 'first'),
+                     weight=(sampling.WEIGHT_COLUMN, 'first')))
+
+    pd.testing.assert_frame_equal(design(got), design(want), check_dtype=False)
+    assert got.index.is_unique and got.index.is_monotonic_increasing
+
+
+def test_database_sample_depends_on_seed(backends):
+    _, _, sqlite_backend = backends
+    columns = sampling.STRATA_COLUMNS
+    samples = [sqlite_backend.draw_sample(columns, 3000, 2, seed).index for seed in (1, 2, 1)]
+    assert samples[0].equals(samples[2])
+    # 种子不同时各层抽到的行不同（不只是同一序列的平移）
+    assert len(samples[0].intersection(samples[1])) < 0.5 * len(samples[0])
+
+
+def test_ds_flag_matches_keyword_filter(backends):
+    dashboard, _, sqlite_backend = backends
+    everything = {'industries': [], 'cities': [], 'head_tail': []}
+    want = dashboard.filter_ds_jobs(dashboard.column_store.read_columns(['岗位']))
+    got = sqlite_backend.read_filtered(everything, ['岗位'], ds_only=True)
+    assert got.index.equals(want.index)
+
+    # 关键词匹配按Unicode规则不区分大小写（SQLite的 lower() 只转换ASCII字母）
+    pattern = query_backend.ds_pattern()
+    for keyword in config.DS_KEYWORDS:
+        assert pattern.search(f"高级{keyword.upper()}岗") and pattern.search(f"高级{keyword.lower()}岗")
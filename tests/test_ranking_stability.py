@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+排名稳定性：候选池剪枝、池内排名和行业榜首概率与全量排序的暴力计算一致
+"""
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ranking_stability
+
+
+def make_scored(n=400, seed=0):
+    """模拟评分结果：各维度评分为满分的一部分，按综合评分降序排列（同看板的评分结果）"""
+    rng = np.random.default_rng(seed)
+    base = ranking_stability.base_weights()
+    # 少数企业各维度都较高，其余企业分布较散，使剪枝有实际效果
+    strength = rng.beta(2, 5, n)[:, None]
+    parts = np.clip(strength + rng.normal(0, 0.15, (n, len(base))), 0, 1)
+    # 榜首企业有一家分量完全相同的企业（平分），检验平分时按行顺序排名
+    top = np.argmax(parts @ base)
+    parts[(top + 1) % n] = parts[top]
+    df = pd.DataFrame(parts * base, columns=ranking_stability.SCORE_COLUMNS)
+    df['综合评分'] = df[ranking_stability.SCORE_COLUMNS].sum(axis=1)
+    df['公司名称'] = [f"公司{i}" for i in range(n)]
+    df['行业'] = rng.choice(['人工智能', '纯互联网', '游戏'], n)
+    df = df.sort_values('综合评分', ascending=False, kind='stable').reset_index(drop=True)
+    df['总排名'] = np.arange(1, n + 1)
+    return df
+
+
+def brute_force_ranks(components, weights):
+    """全部企业在每个权重样本下的排名（评分相同时按行顺序）"""
+    scores = components @ weights
+    order = np.argsort(-scores, axis=0, kind='stable')
+    ranks = np.empty(order.shape, dtype=np.int64)
+    np.put_along_axis(ranks, order, np.arange(1, len(components) + 1)[:, None], axis=0)
+    return ranks
+
+
+def brute_force_max_gain(diff, w_min, w_max, total):
+    """线性规划的最优解在顶点上：除一个维度外都取上下限，该维度由总和确定"""
+    best = -np.inf
+    dims = len(diff)
+    for free in range(dims):
+        others = [d for d in range(dims) if d != free]
+        for bounds in itertools.product([0, 1], repeat=dims - 1):
+            w = np.empty(dims)
+            for d, upper in zip(others, bounds):
+                w[d] = w_max[d] if upper else w_min[d]
+            w[free] = total - w[others].sum()
+            if w_min[free] - 1e-9 <= w[free] <= w_max[free] + 1e-9:
+                best = max(best, diff @ w)
+    return best
+
+
+@pytest.fixture(scope='module')
+def scored():
+    return make_scored()
+
+
+@pytest.fixture(scope='module')
+def weights():
+    return ranking_stability.sample_weights(400, spread=0.3, seed=1)
+
+
+def test_sample_weights_keep_total(weights):
+    base = ranking_stability.base_weights()
+    assert weights.shape == (len(base), 400)
+    np.testing.assert_allclose(weights.sum(axis=0), base.sum())
+    assert (weights > 0).all()
+
+
+def test_max_gain_matches_vertex_enumeration(weights):
+    rng = np.random.default_rng(2)
+    w_min, w_max = weights.min(axis=1), weights.max(axis=1)
+    total = weights[:, 0].sum()
+    diff = rng.normal(0, 1, (50, len(w_min)))
+    expected = [brute_force_max_gain(row, w_min, w_max, total) for row in diff]
+    np.testing.assert_allclose(ranking_stability.max_gain(diff, w_min, w_max, total), expected)
+
+
+@pytest.mark.parametrize('depth', [1, 10, 60])
+def test_candidate_pool_contains_every_possible_top_entry(scored, weights, depth):
+    components = ranking_stability.component_matrix(scored)
+    full = brute_force_ranks(components, weights)
+    reachable = np.flatnonzero((full <= depth).any(axis=1))
+
+    pool = ranking_stability.candidate_pool(components, weights, depth)
+    assert np.all(np.diff(pool) > 0)
+    assert set(reachable) <= set(pool)
+    # 剪枝确实生效
+    assert len(pool) < len(components)
+
+    # 池内排名在 depth 名以内精确，之外记为 depth + 1
+    ranks = ranking_stability.sample_ranks(components[pool], weights, depth)
+    np.testing.assert_array_equal(ranks, np.minimum(full[pool], depth + 1))
+
+
+def test_analyze_matches_brute_force(scored):
+    top_n, n_samples = 10, 300
+    result = ranking_stability.analyze(scored, top_n=top_n, n_samples=n_samples, spread=0.3, seed=3)
+    components = ranking_stability.component_matrix(scored)
+    weights = ranking_stability.sample_weights(n_samples, 0.3, 3)
+    full = brute_force_ranks(components, weights)
+
+    companies = result['companies']
+    probability = (full[companies.index.to_numpy()] <= top_n).mean(axis=1)
+    np.testing.assert_allclose(companies[f'前{top_n}名概率'].to_numpy(), probability)
+    # 候选池以外的企业在任何样本下都进不了前 top_n 名
+    outside = np.setdiff1d(np.arange(len(scored)), companies.index.to_numpy())
+    assert not (full[outside] <= top_n).any()
+
+    for row in result['industries'].to_dict('records'):
+        rows = np.flatnonzero(scored['行业'].to_numpy() == row['行业'])
+        leader = np.argmax(components[rows] @ weights, axis=0)
+        assert row['榜首保持概率'] == pytest.approx((leader == 0).mean())
+
+        # Kendall tau：行业榜单内逐对比较样本下与基准的先后
+        listed = components[rows[:top_n]] @ weights
+        pairs = list(itertools.combinations(range(len(listed)), 2))
+        taus = np.array([np.sign(listed[i] - listed[j]) for i, j in pairs]).sum(axis=0) / len(pairs)
+        assert row['Kendall tau均值'] == pytest.approx(taus.mean())
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+近似模式：分层样本的权重、方差估计与置信区间，和逐层的教科书公式及全量计算对照
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import sampling
+
+
+def make_population(n=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    industry = rng.choice(['人工智能', '纯互联网', '游戏', '企业数字化服务'], n, p=[0.4, 0.3, 0.2, 0.1])
+    city = rng.choice(['北京', '上海', '深圳', '成都', '西安'], n)
+    tier = rng.choice(['头部', '腰部', '尾部'], n, p=[0.1, 0.3, 0.6])
+    # 各层均值不同，使分层有意义
+    level = pd.Series(industry).map({'人工智能': 400000, '纯互联网': 350000, '游戏': 300000,
+                                     '企业数字化服务': 250000}).to_numpy()
+    return pd.DataFrame({
+        '行业': industry,
+        '城市': city,
+        '头腰尾': tier,
+        # 层内的域（类似岗位关键词筛选）：域内记录数也需要估计
+        '数据岗': rng.random(n) < 0.3,
+        '平均年收入': level + rng.normal(0, 60000, n) + (tier == '头部') * 80000
+    })
+
+
+@pytest.fixture(scope='module')
+def population():
+    return make_population()
+
+
+def brute_force_total_variance(sample, domain, values):
+    """逐层计算 Σ N_h² (1 - n_h/N_h) s_h² / n_h；s_h² 取该层全部样本行，不在域内的行取0"""
+    y = np.where(domain, values, 0.0)
+    variance = 0.0
+    for _, rows in sample.groupby(sampling.STRATUM_COLUMN).indices.items():
+        n = len(rows)
+        big_n = sample[sampling.STRATUM_SIZE_COLUMN].iloc[rows[0]]
+        if n < 2:
+            continue
+        variance += big_n ** 2 * (1 - n / big_n) * np.var(y[rows], ddof=1) / n
+    return variance
+
+
+def test_draw_sample_weights_and_strata(population):
+    sample = sampling.draw_sample(population, 2000, min_per_stratum=3, seed=1)
+    sizes = population.groupby(sampling.STRATA_COLUMNS).size()
+
+    # 行索引保持原始行号，各层至少抽取 min_per_stratum 行，权重之和等于总体行数
+    assert sample.index.isin(population.index).all() and sample.index.is_unique
+    per_stratum = sample.groupby(sampling.STRATA_COLUMNS).size()
+    assert (per_stratum >= np.minimum(3, sizes.loc[per_stratum.index])).all()
+    assert len(per_stratum) == len(sizes)
+    assert sample[sampling.WEIGHT_COLUMN].sum() == pytest.approx(len(population))
+    counted = sample.groupby(sampling.STRATA_COLUMNS).agg(n=(sampling.STRATUM_SAMPLE_COLUMN, 'first'),
+                                                          N=(sampling.STRATUM_SIZE_COLUMN, 'first'))
+    assert (counted['n'] == per_stratum).all()
+    assert (counted['N'] == sizes.loc[counted.index]).all()
+
+
+def test_total_variance_matches_per_stratum_formula(population):
+    sample = sampling.draw_sample(population, 1500, seed=2)
+    salary = sample['平均年收入'].to_numpy()
+    weights = sample[sampling.WEIGHT_COLUMN].to_numpy()
+    domain = (sample['城市'].isin(['北京', '上海']) & sample['数据岗']).to_numpy()
+
+    # 域内的行传入线性化值（权重 × 值），域外样本行只通过层样本数计入
+    got = sampling.total_variance(sample[domain], (weights * salary)[domain])
+    assert got == pytest.approx(brute_force_total_variance(sample, domain, salary), rel=1e-9)
+
+    got = sampling.total_variance(sample[domain], weights[domain])
+    assert got == pytest.approx(brute_force_total_variance(sample, domain, np.ones(len(sample))), rel=1e-9)
+
+
+def test_census_estimates_are_exact(population):
+    # 样本量不小于总体时每行权重为1，有限总体校正使置信区间退化为点估计
+    census = sampling.draw_sample(population, len(population), seed=3)
+    domain = census[census['行业'] == '游戏']
+    stats = sampling.estimate_stats(domain, '平均年收入')
+    truth = population.loc[population['行业'] == '游戏', '平均年收入']
+
+    assert stats['count'] == len(truth)
+    assert stats['total'] == pytest.approx(truth.sum())
+    assert stats['mean'] == pytest.approx(truth.mean())
+    # 标准差与精确计算一致（ddof=1）
+    assert stats['std'] == pytest.approx(truth.std())
+    assert (stats['min'], stats['max']) == (truth.min(), truth.max())
+    for key in ['count', 'total', 'mean']:
+        low, high = stats['ci'][key]
+        assert low == pytest.approx(high)
+    assert sampling.estimate_count(domain) == (len(truth), (len(truth), len(truth)))
+
+
+def test_confidence_intervals_cover_population_values(population):
+    domain_mask = population['城市'].isin(['北京', '深圳']) & population['数据岗']
+    truth = population.loc[domain_mask, '平均年收入']
+    true_values = {'count': len(truth), 'total': truth.sum(), 'mean': truth.mean(), 'median': truth.median()}
+
+    repeats = 300
+    covered = {key: 0 for key in true_values}
+    for seed in range(repeats):
+        sample = sampling.draw_sample(population, 1000, seed=seed)
+        stats = sampling.estimate_stats(sample[sample['城市'].isin(['北京', '深圳']) & sample['数据岗']], '平均年收入')
+        for key, value in true_values.items():
+            low, high = stats['ci'][key]
+            covered[key] += low <= value <= high
+
+    # 名义覆盖率95%：300次重复抽样的覆盖率应落在抽样误差范围内
+    for key, hits in covered.items():
+        assert 0.90 <= hits / repeats <= 0.99, (key, hits / repeats)
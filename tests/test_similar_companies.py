@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+相似企业：KD树检索结果与全量距离计算的暴力检索一致
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import similar_companies
+
+
+@pytest.fixture(scope='module')
+def df_scored():
+    rng = np.random.default_rng(7)
+    n = 400
+    names = rng.choice([f"公司{i}" for i in range(150)], n).astype(object)
+    names[rng.choice(n, 12, replace=False)] = np.nan
+    industries = rng.choice(['互联网', '金融', '制造', None], n, p=[0.4, 0.3, 0.25, 0.05])
+    df = pd.DataFrame({
+        '公司名称': names,
+        '行业': industries,
+        '平均年收入': rng.lognormal(12, 0.5, n),
+        '员工人数': rng.integers(10, 20000, n),
+        '在职人数': rng.integers(1, 200, n),
+        'DS占比': rng.uniform(0, 0.2, n),
+        '平均在职天数': rng.uniform(30, 2000, n),
+        '头腰尾评分': rng.choice([5, 10, 15], n)
+    })
+    # 行索引与行号不同（评分结果为筛选后的子集）
+    df.index = rng.permutation(n * 3)[:n]
+    return df
+
+
+def brute_force(df, row_id, k, same_industry):
+    features = pd.DataFrame(similar_companies.feature_matrix(df), index=df.index)
+    distances = np.linalg.norm(features - features.loc[row_id], axis=1)
+    candidates = df.assign(距离=distances)
+    if same_industry:
+        industry = df.at[row_id, '行业']
+        candidates = candidates[candidates['行业'].isna() if pd.isna(industry) else candidates['行业'] == industry]
+    name = df.at[row_id, '公司名称']
+    candidates = candidates.drop(index=row_id)
+    if not pd.isna(name):
+        candidates = candidates[candidates['公司名称'] != name]
+    candidates = candidates.sort_values('距离', kind='stable')
+    # 每家公司保留最近的一行，名称缺失的行各自保留
+    candidates = candidates[~candidates['公司名称'].duplicated() | candidates['公司名称'].isna()]
+    return candidates.index.to_numpy()[:k], candidates['距离'].to_numpy()[:k]
+
+
+@pytest.mark.parametrize('k', [1, 5, 40])
+@pytest.mark.parametrize('same_industry', [False, True])
+def test_query_matches_brute_force(df_scored, k, same_industry):
+    index = similar_companies.build_index(df_scored)
+    for row_id in df_scored.index[::17]:
+        want_ids, want_distances = brute_force(df_scored, row_id, k, same_industry)
+        got_ids, got_distances = similar_companies.query(index, row_id, k, same_industry)
+        np.testing.assert_allclose(got_distances, want_distances)
+        assert list(got_ids) == list(want_ids), row_id
+
+
+def test_missing_names_and_unknown_rows(df_scored):
+    index = similar_companies.build_index(df_scored)
+    row_id = df_scored.index[df_scored['公司名称'].isna()][0]
+    got_ids, _ = similar_companies.query(index, row_id, 10)
+    assert row_id not in got_ids and len(got_ids) == 10
+
+    with pytest.raises(KeyError):
+        similar_companies.query(index, -1)
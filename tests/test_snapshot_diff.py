@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+版本对比：键哈希连接的变化表与按键外连接（pandas merge）的结果一致
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import snapshot_diff
+
+
+def make_snapshot(rows):
+    df = pd.DataFrame(rows, columns=['公司名称', '岗位', '行业', '平均年收入', '在职人数'])
+    df[snapshot_diff.HASH_COLUMN] = snapshot_diff.key_hashes(df)
+    return df
+
+
+def make_scored(df):
+    """模拟评分结果：每行一个评分，按评分降序排名"""
+    scored = df.assign(综合评分=np.linspace(90, 10, len(df)))
+    scored['总排名'] = scored['综合评分'].rank(ascending=False, method='first').astype(int)
+    return scored
+
+
+@pytest.fixture
+def snapshots():
+    base = make_snapshot([
+        ('甲公司', '数据分析师', '游戏', 300000, 5),
+        ('甲公司', '数据分析师', '游戏', 0, 3),          # 重复键：无效薪资不计入均值，在职人数求和
+        ('乙公司', '数据挖掘工程师', '人工智能', 400000, 10),
+        ('丙公司', 'BI工程师', '纯互联网', 250000, 2),   # 当前版本已退出
+        ('丁公司', '数据分析师', '人工智能', 350000, 4)
+    ])
+    current = make_snapshot([
+        ('乙公司', '数据挖掘工程师', '人工智能', 420000, 12),
+        ('甲公司', '数据分析师', '游戏', 330000, 6),
+        ('戊公司', '数据分析师', '游戏', 280000, 1),     # 新进入
+        ('丁公司', '数据分析师', '人工智能', 350000, 4),
+        ('甲公司', '数据科学家', '游戏', 500000, 2)      # 同一公司的另一岗位是另一个键
+    ])
+    return base, current
+
+
+def brute_force(base_table, current_table):
+    merged = current_table.merge(base_table, how='outer', left_index=True, right_index=True,
+                                 suffixes=('_当前', '_基准'), indicator=True)
+    status = merged['_merge'].map({'both': snapshot_diff.STATUS_KEPT, 'left_only': snapshot_diff.STATUS_NEW,
+                                   'right_only': snapshot_diff.STATUS_EXITED})
+    return pd.DataFrame({
+        '公司名称': merged['公司名称_当前'].fillna(merged['公司名称_基准']),
+        '状态': status.astype(object),
+        '基准年收入': merged['平均年收入_基准'],
+        '当前年收入': merged['平均年收入_当前'],
+        '基准在职人数': merged['在职人数_基准'],
+        '当前在职人数': merged['在职人数_当前'],
+        '排名变化': merged['总排名_基准'] - merged['总排名_当前'],
+        '评分变化': merged['综合评分_当前'] - merged['综合评分_基准']
+    }, index=merged.index)
+
+
+@pytest.mark.parametrize('scored', [True, False])
+def test_diff_matches_outer_merge(snapshots, scored):
+    base, current = snapshots
+    base_table = snapshot_diff.snapshot_table(base, make_scored(base) if scored else None)
+    current_table = snapshot_diff.snapshot_table(current, make_scored(current) if scored else None)
+    diff = snapshot_diff.diff_snapshots(base_table, current_table)
+
+    # 当前版本的键按原顺序在前，退出的键在后
+    assert list(diff.index[:len(current_table)]) == list(current_table.index)
+    assert set(diff.index[len(current_table):]) == set(base_table.index) - set(current_table.index)
+
+    expected = brute_force(base_table, current_table).loc[diff.index]
+    pd.testing.assert_frame_equal(diff[expected.columns], expected, check_dtype=False, check_names=False)
+    np.testing.assert_allclose(diff['年收入变化率'], diff['年收入变化'] / diff['基准年收入'] * 100)
+    if not scored:
+        assert diff['排名变化'].isna().all()
+
+
+def test_snapshot_table_aggregates_duplicate_keys(snapshots):
+    base, _ = snapshots
+    table = snapshot_diff.snapshot_table(base, make_scored(base))
+    row = table.loc[snapshot_diff.key_hashes(base.iloc[[0]])[0]]
+    assert row['平均年收入'] == 300000
+    assert row['在职人数'] == 8
+    # 重复键取最高评分、最好名次
+    assert row['综合评分'] == 90 and row['总排名'] == 1
+    assert len(table) == 4
+
+
+def test_summary_counts(snapshots):
+    base, current = snapshots
+    diff = snapshot_diff.diff_snapshots(snapshot_diff.snapshot_table(base, None),
+                                        snapshot_diff.snapshot_table(current, None))
+    summary = snapshot_diff.summarize(diff)
+    assert (summary['kept'], summary['new'], summary['exited']) == (3, 2, 1)
+    # 持续键：乙 +20000、甲 +30000、丁 0
+    assert summary['salary_change_mean'] == pytest.approx(50000 / 3)
+    assert summary['salary_change_median'] == 20000
+    assert summary['team_change'] == (12 + 6 + 1 + 4 + 2) - (8 + 10 + 2 + 4)
+
+    movers = snapshot_diff.top_movers(diff, '年收入变化', n=1)
+    assert list(movers['公司名称']) == ['乙公司', '甲公司']
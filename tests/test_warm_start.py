@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+默认视图预计算：版本键随影响默认视图的配置变化，后台预热失败不被缓存
+"""
+import pytest
+
+import config
+import warm_start
+
+
+def test_artifact_key_tracks_config(tmp_path, monkeypatch):
+    path = str(tmp_path / 'warm_start.json')
+    warm_start.save_artifact({'views': {}}, path)
+    key = warm_start.artifact_key()
+    assert warm_start.load_artifact(path)['key'] == key
+
+    for name, value in [('DS_KEYWORDS', config.DS_KEYWORDS + ['算法']), ('DATA_LAYOUT', 'sqlite'),
+                        ('CITY_TIERS', dict(config.CITY_TIERS, 一线=['北京'])),
+                        ('SCORE_WEIGHTS', dict(config.SCORE_WEIGHTS, 薪资评分=0))]:
+        with monkeypatch.context() as patch:
+            patch.setattr(config, name, value)
+            assert warm_start.artifact_key() != key, name
+            # 配置变化后旧的预计算文件不再使用
+            assert warm_start.load_artifact(path) is None, name
+    assert warm_start.artifact_key() == key
+    assert warm_start.load_artifact(path) is not None
+
+
+def test_failed_warmup_is_retried(dashboard, monkeypatch):
+    calls = []
+
+    def failing():
+        calls.append('fail')
+        raise OSError('数据文件读取失败')
+
+    dashboard.start_background_warmup.clear()
+    monkeypatch.setattr(dashboard, '_warmup', failing)
+    with pytest.raises(OSError):
+        dashboard.load_live_data()
+
+    monkeypatch.setattr(dashboard, '_warmup', lambda: calls.append('ok'))
+    df, options, overview = dashboard.load_live_data()
+    assert calls == ['fail', 'ok'] and options is not None
+    dashboard.start_background_warmup.clear()
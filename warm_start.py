@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+默认视图预计算（冷启动加速）
+
+部署时运行 `python warm_start.py` 生成预计算文件。会话首屏直接读取该文件渲染，
+无需导入pandas/plotly、加载数据和计算各标签页；文件以数据集版本和影响默认视图的配置为键，
+数据或配置更新后自动失效。
+"""
+import hashlib
+import json
+import os
+
+import config
+from fingerprint import dataset_version, path_tag
+
+# 预计算文件格式版本，分析逻辑或文件结构变化时递增
+ARTIFACT_SCHEMA = 6
+
+# 影响默认视图结果的配置项（DS岗位关键词、城市等级、数据布局、异常值和评分设置）
+ARTIFACT_CONFIG = ['DS_KEYWORDS', 'CITY_TIERS', 'DATA_LAYOUT', 'UNKNOWN_DATES', 'OUTLIER_METHODS',
+                   'OUTLIER_MULTIPLIERS', 'DEFAULT_OUTLIER_METHOD', 'DEFAULT_OUTLIER_MULTIPLIER', 'DEFAULT_FILTERS',
+                   'SCORE_WEIGHTS', 'RANKING_OPTIONS', 'RANKING_SAMPLES', 'RANKING_WEIGHT_SPREAD', 'RANKING_SEED']
+
+# 已读取的预计算文件（按数据集版本缓存，避免每次重跑都解析JSON）
+_artifact_cache = {}
+
+
+def _json_default(value):
+    """numpy标量转换为Python内置类型"""
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"无法序列化类型: {type(value)}")
+
+
+def serialize_result(result):
+    """将 (分析结果, 错误信息) 中的图表转换为plotly JSON，统计指标和汇总记录（字典、列表）原样保存"""
+    analysis, error = result
+    if analysis is None:
+        return [None, error]
+    
+    serialized = {}
+    for key, value in analysis.items():
+        if key == 'stats' or value is None or isinstance(value, (dict, list)):
+            serialized[key] = value
+        else:
+            serialized[key] = json.loads(value.to_json())
+    return [serialized, error]
+
+
+def config_tag():
+    """影响默认视图的配置项的短哈希"""
+    settings = repr([(name, getattr(config, name)) for name in ARTIFACT_CONFIG])
+    return hashlib.sha1(settings.encode('utf-8')).hexdigest()[:12]
+
+
+def artifact_key():
+    """预计算文件的版本键：数据集版本、数据文件路径、配置和文件格式版本"""
+    return f"{dataset_version()}:{path_tag()}:{config_tag()}:{ARTIFACT_SCHEMA}"
+
+
+def load_artifact(path=config.WARM_START_FILE):
+    """读取预计算文件，不存在或版本不匹配时返回None"""
+    try:
+        key = artifact_key()
+        if key in _artifact_cache:
+            return _artifact_cache[key]
+        with open(path, encoding='utf-8') as f:
+            artifact = json.load(f)
+    except (OSError, ValueError):
+        return None
+    
+    if artifact.get('key') != key:
+        return None
+    _artifact_cache[key] = artifact
+    return artifact
+
+
+def save_artifact(payload, path=config.WARM_START_FILE):
+    """写入预计算文件（先写临时文件再替换，避免读到半个文件）"""
+    payload = dict(payload, key=artifact_key())
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, default=_json_default)
+    os.replace(tmp_path, path)
+    _artifact_cache.clear()
+
+
+def main():
+    """部署时生成默认视图的预计算文件"""
+    import DS_interactive_dashboard as dashboard
+    
+    dashboard.ensure_heavy_modules()
+    # 按数据布局取数：分区、SQLite布局下筛选条件下推，不加载全量数据
+    df, options, overview = dashboard.load_layout_data()
+    if options is None:
+        raise SystemExit("数据加载失败，未生成预计算文件")
+    
+    selection = dashboard.get_default_selection(options)
+    views = dashboard.compute_views(df, selection, overview['total'])
+    dashboard.save_warm_start(options, overview, selection, views)
+    print(f"已生成预计算文件: {config.WARM_START_FILE}")
+
+
+if __name__ == "__main__":
+    main()